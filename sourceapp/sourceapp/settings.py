@@ -101,6 +101,8 @@ SOCIAL_AUTH_FACEBOOK_PROFILE_EXTRA_PARAMS = {
 CORS_ALLOW_ALL_ORIGINS = True
 
 MIDDLEWARE = [
+    'workspace.instrumentation.InstrumentationMiddleware',
+    'workspace.replicas.ReplicaMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
@@ -138,20 +140,81 @@ WSGI_APPLICATION = 'sourceapp.wsgi.application'
 
 DATABASES = {
     'default': {
-        'ENGINE': 'django.db.backends.mysql',
+        # django.db.backends.mysql with a per-process connection pool (workspace/backends/mysql_pool)
+        'ENGINE': 'workspace.backends.mysql_pool',
         'NAME': 'sourcedb',
         'USER': 'root',
         'PASSWORD': '12345',
-        'HOST': ''
+        'HOST': '',
+        # connections per process, seconds to wait for one, idle/lifetime limits, and how long a
+        # connection may sit idle before it is pinged on checkout
+        'POOL': {'MAX_SIZE': 10, 'TIMEOUT': 5, 'MAX_IDLE': 300, 'MAX_LIFETIME': 3600, 'CHECK_AFTER': 30},
     }
 }
 
+# Read replicas (aliases in DATABASES) and their relative weights, e.g. {'replica1': 2, 'replica2': 1}.
+# Safe-method requests read from one of them; a client that wrote is kept on the primary for
+# REPLICA_PIN_SECONDS so it reads its own writes.
+DATABASE_REPLICAS = {}
+REPLICA_PIN_SECONDS = 10
+DATABASE_ROUTERS = ['workspace.replicas.ReplicaRouter']
+
 AUTH_USER_MODEL = 'workspace.User'
 
 import pymysql
 
 pymysql.install_as_MySQLdb()
 
+# Use a shared backend (memcached/redis) when running several worker processes,
+# otherwise cache invalidation only reaches the process that made the change.
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    }
+}
+
+# Token-bucket rate limits per endpoint: 'user' applies per authenticated user, 'anon' per client IP,
+# 'burst' overrides the bucket size (defaults to the rate's count)
+THROTTLES = {
+    'send_mail': {'user': '10/hour', 'burst': 3},
+    'search': {'user': '120/min', 'anon': '60/min', 'burst': 20},
+    'signup': {'anon': '5/hour'},
+}
+# 'local' keeps buckets in each process; 'cache' shares them through THROTTLE_CACHE
+THROTTLE_BACKEND = 'local'
+THROTTLE_CACHE = 'default'
+
+# Upper bound (seconds) on how long a process serves its copy of the category/work type tables
+REFERENCE_CACHE_TTL = 300
+
+# Seconds a composed /users/current-user/ payload is served from the cache
+PROFILE_CACHE_TTL = 300
+
+# Days a recruitment stays open after date_start when it is posted without a deadline
+RECRUITMENT_DURATION_DAYS = 30
+
+# Days a deactivated recruitment stays in the hot tables before archive_recruitments moves it out
+ARCHIVE_AFTER_DAYS = 90
+
+# Recommendation feature matrix: seconds between incremental refreshes / full rebuilds (per process)
+RECOMMEND_REFRESH_INTERVAL = 30
+RECOMMEND_REBUILD_INTERVAL = 3600
+
+# Request instrumentation (exported at /metrics/ for admin users)
+SLOW_QUERY_MS = 200  # queries slower than this are logged with their EXPLAIN plan
+INSTRUMENTATION_LOG_REQUESTS = False  # log one timing line per request
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler'},
+    },
+    'loggers': {
+        'workspace': {'handlers': ['console'], 'level': 'INFO'},
+    },
+}
+
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 
@@ -198,6 +261,14 @@ EMAIL_USE_TLS = True
 EMAIL_HOST_USER = 'phphongcat@gmail.com'
 EMAIL_HOST_PASSWORD = 'lnyo hssp fbpr rjcz'
 
+# Outbox delivery (python manage.py send_outbox)
+OUTBOX_BATCH_SIZE = 50
+OUTBOX_MAX_ATTEMPTS = 5
+OUTBOX_RETRY_DELAY = 60  # seconds, doubled after every failed attempt
+
+# Cloudinary uploads run on a shared pool of this many threads (0 = upload inline)
+UPLOAD_WORKERS = 8
+
 SOCIAL_AUTH_URL_NAMESPACE = 'social'
 
 CLIENT_ID = 'OtKEc3aGI68E2AADgpHxNzEiPO9qaGaNyZOTfXnh'
@@ -1,12 +1,11 @@
 from django.contrib import admin
-from django.db.models import Count, Avg
 from django.shortcuts import redirect
 from django.template.response import TemplateResponse
 from django.urls.conf import path
 from django.utils.dateparse import parse_date
 from django.utils.safestring import mark_safe
 
-from . import models
+from . import media, models, rollups
 
 
 class CompanyImageInline(admin.TabularInline):
@@ -16,7 +15,7 @@ class CompanyImageInline(admin.TabularInline):
 
     def image_preview(self, obj):
         if obj.image:
-            return mark_safe(f'<img src="{obj.image.url}" width="100" style="border-radius: 5px;" />')
+            return mark_safe(f'<img src="{media.url(obj.image)}" width="100" style="border-radius: 5px;" />')
         return "No Image"
 
     image_preview.short_description = "Image"
@@ -25,6 +24,7 @@ class CompanyImageInline(admin.TabularInline):
 class CompanyAdmin(admin.ModelAdmin):
     list_display = ['name', 'verified', 'user', 'verify_button']
     list_filter = ['verified']
+    readonly_fields = models.Company.counter_fields
     inlines = [CompanyImageInline]
 
     def verify_button(self, obj):
@@ -63,32 +63,10 @@ class MyAdminSite(admin.AdminSite):
         start_date_parsed = parse_date(start_date) if start_date else None
         end_date_parsed = parse_date(end_date) if end_date else None
 
-        recruitments = models.Recruitment.objects.all()
-        if start_date_parsed:
-            recruitments = recruitments.filter(date_start__gte=start_date_parsed)
-        if end_date_parsed:
-            recruitments = recruitments.filter(date_start__lte=end_date_parsed)
-
-        category_stats = models.Category.objects.filter(
-            recruitment__in=recruitments
-        ).annotate(
-            cate_count=Count('recruitment'),
-            avg_salary=Avg('recruitment__salary')
-        ).values('name', 'cate_count', 'avg_salary')
-
-        recruitment_stats = [
-            {**item, 'avg_salary': float(item['avg_salary']) if item['avg_salary'] is not None else 0.0}
-            for item in category_stats
-        ]
-
-        work_type_stats = models.WorkType.objects.filter(
-            recruitment__in=recruitments
-        ).annotate(
-            job_count=Count('recruitment')
-        ).values('name', 'job_count')
+        recruitment_stats, work_type_stats = rollups.stats(start_date_parsed, end_date_parsed)
 
-        user_count = models.User.objects.filter(role=0, is_staff=0).count()
-        company_count = models.Company.objects.count()
+        user_count = rollups.counter(rollups.USERS)
+        company_count = rollups.counter(rollups.COMPANIES)
 
         context = {
             'recruitment_stats': recruitment_stats,
@@ -105,4 +83,5 @@ class MyAdminSite(admin.AdminSite):
 admin_site = MyAdminSite(name='admin')
 admin_site.register(models.Category)
 admin_site.register(models.WorkType)
+admin_site.register(models.Province)
 admin_site.register(models.Company, CompanyAdmin)
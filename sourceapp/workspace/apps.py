@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class WorkspaceConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'workspace'
+
+    def ready(self):
+        from . import signals  # noqa: F401
@@ -0,0 +1,83 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import QuerySet
+from django.utils import timezone
+
+from . import models
+
+BATCH_SIZE = 1000
+
+
+def _copied(archive_model):
+    return [f.attname for f in archive_model._meta.concrete_fields if f.name != 'archived_date']
+
+
+def candidates(cutoff=None):
+    # recruitments switched off longer ago than the grace period (they may still be switched back on)
+    cutoff = cutoff or timezone.now() - timedelta(days=settings.ARCHIVE_AFTER_DAYS)
+    return models.Recruitment.objects.filter(active=False, deactivated_date__lt=cutoff)
+
+
+def _delete(model, field, ids):
+    # one DELETE ... WHERE field IN (...): no collector, no per-row signals, no cascade lookups
+    quote = connection.ops.quote_name
+    placeholders = ', '.join(['%s'] * len(ids))
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {quote(model._meta.db_table)} '
+                       f'WHERE {quote(model._meta.get_field(field).column)} IN ({placeholders})', ids)
+
+
+def archive_chunk(cutoff=None, chunk_size=500):
+    # one chunk per transaction: copy the recruitments and their applications, then drop the hot rows.
+    # An interrupted run loses at most the open chunk, and the next run picks up what is still hot.
+    with transaction.atomic():
+        ids = list(candidates(cutoff).order_by('id').select_for_update(skip_locked=True)
+                   .values_list('id', flat=True)[:chunk_size])
+        if not ids:
+            return 0
+
+        models.ArchivedRecruitment.objects.bulk_create([
+            models.ArchivedRecruitment(**row)
+            for row in models.Recruitment.objects.filter(id__in=ids).values(*_copied(models.ArchivedRecruitment))
+        ])
+        models.ArchivedApply.objects.bulk_create([
+            models.ArchivedApply(**row)
+            for row in models.Apply.objects.filter(recruitment_id__in=ids).values(*_copied(models.ArchivedApply))
+        ], batch_size=BATCH_SIZE)
+
+        # plain DELETEs skip the Apply counter signals on purpose: the hot recruitment counters go away with
+        # their rows, and Company.hire_count keeps counting the hires that are now archived. Inactive
+        # recruitments carry nothing in the daily rollups.
+        _delete(models.Apply, 'recruitment', ids)
+        _delete(models.RecruitmentTerm, 'recruitment', ids)
+        _delete(models.Recruitment, 'id', ids)
+        return len(ids)
+
+
+def archive_recruitments(cutoff=None, chunk_size=500):
+    archived = 0
+    while True:
+        count = archive_chunk(cutoff, chunk_size)
+        if not count:
+            return archived
+        archived += count
+
+
+def union(hot, archived, fields):
+    # hot and archived rows as one UNION ALL over the same projection; ids never collide
+    return hot.order_by().values(*fields).union(archived.order_by().values(*fields), all=True)
+
+
+def narrow(queryset, *args, **kwargs):
+    # a UNION cannot be filtered once combined, so the condition goes into each of its parts
+    if not queryset.query.combinator:
+        return queryset.filter(*args, **kwargs)
+
+    combined = queryset.all()
+    combined.query.combined_queries = tuple(
+        QuerySet(query.model, query.clone()).filter(*args, **kwargs).query
+        for query in queryset.query.combined_queries
+    )
+    return combined
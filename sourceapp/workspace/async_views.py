@@ -0,0 +1,142 @@
+import functools
+
+from asgiref.sync import sync_to_async
+from django.core.exceptions import ValidationError
+from django.http import Http404, HttpResponse
+from rest_framework import exceptions, status
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.settings import api_settings
+
+from . import conditional, filters, models, reference, throttles, views
+
+# Async twins of the read-heavy DRF endpoints, mounted under /async/. They reuse the viewsets'
+# querysets, filters, paginators and serializers so the responses are identical; only the I/O differs.
+
+REFERENCE_TABLES = ['category', 'work_type', 'province']
+
+
+def _render(data, status_code=status.HTTP_200_OK, headers=None):
+    body = b'' if data is None else JSONRenderer().render(data)
+    return HttpResponse(body, status=status_code, content_type='application/json', headers=headers)
+
+
+def async_api(authenticated=False, throttle_classes=()):
+    def decorator(view):
+        @functools.wraps(view)
+        async def wrapper(request, *args, **kwargs):
+            authenticators = [auth() for auth in api_settings.DEFAULT_AUTHENTICATION_CLASSES]
+            request = Request(request, authenticators=authenticators)
+            try:
+                if request.method not in ('GET', 'HEAD'):
+                    raise exceptions.MethodNotAllowed(request.method)
+
+                # token lookups are sync-only, as in DRF every request is authenticated up front
+                user = await sync_to_async(lambda: request.user)()
+                if authenticated and not user.is_authenticated:
+                    raise exceptions.NotAuthenticated()
+
+                for throttle in [throttle_class() for throttle_class in throttle_classes]:
+                    if not await sync_to_async(throttle.allow_request)(request, None):
+                        raise exceptions.Throttled(throttle.wait())
+
+                return await view(request, *args, **kwargs)
+            except Http404 as e:
+                exc = exceptions.NotFound(*e.args)
+            except exceptions.APIException as e:
+                exc = e
+
+            headers = {}
+            if isinstance(exc, (exceptions.NotAuthenticated, exceptions.AuthenticationFailed)):
+                auth_header = authenticators[0].authenticate_header(request) if authenticators else None
+                if auth_header:
+                    headers['WWW-Authenticate'] = auth_header
+                else:
+                    exc.status_code = status.HTTP_403_FORBIDDEN
+            if isinstance(exc, exceptions.Throttled) and exc.wait is not None:
+                headers['Retry-After'] = '%d' % exc.wait
+            detail = exc.detail if isinstance(exc.detail, (list, dict)) else {'detail': exc.detail}
+            return _render(detail, exc.status_code, headers)
+        return wrapper
+    return decorator
+
+
+async def _list(request, viewset, filter_queryset=None):
+    queryset = viewset.queryset.all()
+    if filter_queryset:
+        queryset = filter_queryset(queryset, request.query_params)
+
+    values = await queryset.order_by().aaggregate(**conditional.aggregates(viewset.conditional_related))
+    etag, last_modified = conditional.validators(values, viewset.conditional_references, timestamped=False)
+    response = conditional.not_modified(request, etag, last_modified)
+    if response:
+        return response
+
+    paginator = viewset.pagination_class()
+    page = await paginator.apaginate_queryset(queryset, request, count=values['count'])
+    data = viewset.serializer_class(page, many=True, context={'request': request}).data
+    return conditional.add_headers(_render(paginator.get_paginated_response(data).data), etag, last_modified)
+
+
+async def _reference_list(request, viewset):
+    tag = reference.etag(viewset.reference_name)
+    if reference.not_modified(request, tag):
+        return _render(None, status.HTTP_304_NOT_MODIFIED, {'ETag': tag})
+
+    data = await sync_to_async(reference.listing)(viewset.reference_name, viewset.serializer_class)
+    return _render(data, headers={'ETag': tag})
+
+
+@async_api(throttle_classes=[throttles.SearchThrottle])
+async def recruitment_list(request):
+    # filters and serializers read the reference tables; load them off the event loop first
+    await reference.awarm(*REFERENCE_TABLES)
+    return await _list(request, views.RecruitmentViewSet, filters.recruitments)
+
+
+@async_api()
+async def recruitment_detail(request, pk):
+    await reference.awarm(*REFERENCE_TABLES)
+    queryset = filters.recruitments(views.RecruitmentViewSet.queryset.all(), request.query_params)
+    try:
+        recruitment = await queryset.filter(pk=pk).afirst()
+    except (TypeError, ValueError, ValidationError):
+        raise Http404
+    if recruitment is None:
+        raise Http404('No Recruitment matches the given query.')
+
+    viewset = views.RecruitmentViewSet
+    etag, last_modified = conditional.validators(conditional.object_values(recruitment, viewset.conditional_related),
+                                                 viewset.conditional_references)
+    response = conditional.not_modified(request, etag, last_modified)
+    if response:
+        return response
+
+    data = viewset.serializer_class(recruitment, context={'request': request}).data
+    return conditional.add_headers(_render(data), etag, last_modified)
+
+
+@async_api(authenticated=True)
+async def recruitment_applied(request, pk):
+    applied = await models.Apply.objects.filter(resume__user=request.user, recruitment_id=pk).aexists()
+    return _render({'applied': applied})
+
+
+@async_api()
+async def category_list(request):
+    return await _reference_list(request, views.CategoryViewSet)
+
+
+@async_api()
+async def work_type_list(request):
+    return await _reference_list(request, views.WorkTypeViewSet)
+
+
+@async_api(authenticated=True)
+async def user_comment_list(request):
+    return await _list(request, views.UserCommentViewSet, filters.user_comments)
+
+
+@async_api(authenticated=True)
+async def company_comment_list(request):
+    return await _list(request, views.CompanyCommentViewSet, filters.company_comments)
@@ -0,0 +1,69 @@
+import threading
+
+from django.db.backends.mysql import base
+
+from .pool import ConnectionPool
+
+# DATABASES[alias]['POOL'] keys -> ConnectionPool arguments
+POOL_OPTIONS = {
+    'MAX_SIZE': 'max_size',
+    'TIMEOUT': 'timeout',
+    'MAX_IDLE': 'max_idle',
+    'MAX_LIFETIME': 'max_lifetime',
+    'CHECK_AFTER': 'check_after',
+}
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+class PoolTimeoutError(base.Database.OperationalError):
+    # surfaces as django.db.OperationalError like any other failure to connect
+    pass
+
+
+def get_pool(alias, settings_dict, conn_params):
+    # one pool per alias and target database (the test runner points an alias at another database)
+    key = (alias, conn_params.get('host'), conn_params.get('port'), conn_params.get('unix_socket'),
+           conn_params.get('user'), conn_params.get('database'))
+    with _pools_lock:
+        pool = _pools.get(key)
+        if pool is None:
+            options = {POOL_OPTIONS[k]: v for k, v in settings_dict.get('POOL', {}).items()}
+            pool = _pools[key] = ConnectionPool(alias, lambda: base.Database.connect(**conn_params),
+                                                timeout_error=PoolTimeoutError, **options)
+        return pool
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    # With CONN_MAX_AGE = 0 Django closes the connection at the end of every request; here that hands it
+    # back to the pool, and the next request's connect() checks one out instead of a new TCP handshake.
+    pool = None
+
+    def get_new_connection(self, conn_params):
+        self.pool = get_pool(self.alias, self.settings_dict, conn_params)
+        connection = self.pool.acquire()
+        if connection.encoders.get(bytes) is bytes:
+            connection.encoders.pop(bytes)
+        return connection
+
+    def is_usable(self):
+        # the stock check lets pymysql reconnect behind the pool's back
+        try:
+            self.connection.ping(reconnect=False)
+        except self.Database.Error:
+            return False
+        return True
+
+    def _close(self):
+        if self.connection is None:
+            return
+        # closed inside atomic() Django keeps the dead handle around, and a half-finished transaction
+        # must not reach the next borrower either: neither goes back to the pool, nor does a connection
+        # that raised during the request or no longer answers
+        discard = self.in_atomic_block or not self.autocommit or self.errors_occurred or not self.is_usable()
+        with self.wrap_database_errors:
+            if self.pool is None:
+                self.connection.close()
+            else:
+                self.pool.release(self.connection, discard=discard)
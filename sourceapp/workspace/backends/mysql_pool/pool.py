@@ -0,0 +1,151 @@
+import threading
+import time
+from collections import deque
+
+from workspace import instrumentation
+
+
+class PoolTimeout(Exception):
+    pass
+
+
+class Entry:
+    def __init__(self, connection, now):
+        self.connection = connection
+        self.created = now
+        self.returned = now
+
+
+class ConnectionPool:
+    # Thread-safe, so one pool per process serves WSGI worker threads and the threads ASGI runs sync ORM
+    # code on alike. Idle connections are reused newest first; the oldest are the ones evicted.
+    def __init__(self, name, connect, max_size=10, timeout=5, max_idle=300, max_lifetime=3600, check_after=30,
+                 timeout_error=PoolTimeout):
+        self.name = name
+        self.connect = connect
+        self.max_size = max_size
+        self.timeout = timeout
+        self.max_idle = max_idle
+        self.max_lifetime = max_lifetime
+        self.check_after = check_after
+        self.timeout_error = timeout_error
+
+        self.idle = deque()
+        self.busy = {}  # id(connection) -> Entry
+        self.size = 0
+        self.condition = threading.Condition()
+
+    def _count(self, event, value=1):
+        instrumentation.incr(f'db_pool.{self.name}.{event}', value)
+
+    def _expired(self, entry, now):
+        return now - entry.created >= self.max_lifetime
+
+    def _evict(self, now):
+        # called with the lock held; the caller closes what is returned, outside of it
+        evicted = []
+        while self.idle and (now - self.idle[0].returned >= self.max_idle or self._expired(self.idle[0], now)):
+            evicted.append(self.idle.popleft())
+        self.size -= len(evicted)
+        return evicted
+
+    def _discard(self, connection):
+        try:
+            connection.close()
+        except Exception:
+            pass
+
+    def acquire(self):
+        start = time.monotonic()
+        deadline = start + self.timeout
+        while True:
+            evicted = []
+            with self.condition:
+                while True:
+                    now = time.monotonic()
+                    evicted += self._evict(now)
+                    if self.idle:
+                        entry = self.idle.pop()
+                        break
+                    if self.size < self.max_size:
+                        self.size += 1
+                        entry = None
+                        break
+                    if now >= deadline:
+                        self._count('timeouts')
+                        instrumentation.observe(f'db_pool {self.name}', 'wait_ms', (now - start) * 1000)
+                        raise self.timeout_error(f'No connection available in pool "{self.name}" after {self.timeout}s')
+                    self.condition.wait(deadline - now)
+
+            for stale in evicted:
+                self._discard(stale.connection)
+            if evicted:
+                self._count('evicted', len(evicted))
+
+            if entry is None:
+                entry = self._open()
+            elif now - entry.returned >= self.check_after and not self._healthy(entry.connection):
+                self._count('broken')
+                self._forget(entry.connection)
+                continue
+            else:
+                self._count('reused')
+
+            with self.condition:
+                self.busy[id(entry.connection)] = entry
+            instrumentation.observe(f'db_pool {self.name}', 'wait_ms', (time.monotonic() - start) * 1000)
+            return entry.connection
+
+    def _open(self):
+        try:
+            connection = self.connect()
+        except BaseException:
+            with self.condition:
+                self.size -= 1
+                self.condition.notify()
+            raise
+        self._count('created')
+        return Entry(connection, time.monotonic())
+
+    def _healthy(self, connection):
+        try:
+            # without reconnect=False pymysql silently reconnects, and a dead connection looks healthy
+            connection.ping(reconnect=False)
+        except Exception:
+            return False
+        return True
+
+    def _forget(self, connection):
+        with self.condition:
+            self.busy.pop(id(connection), None)
+            self.size -= 1
+            self.condition.notify()
+        self._discard(connection)
+
+    def release(self, connection, discard=False):
+        now = time.monotonic()
+        with self.condition:
+            entry = self.busy.pop(id(connection), None)
+            if entry is None:
+                # not ours (already released, or the pool was reset); just close it
+                discard = True
+            elif not discard and not self._expired(entry, now):
+                entry.returned = now
+                self.idle.append(entry)
+                self.condition.notify()
+                return
+            else:
+                self.size -= 1
+                self.condition.notify()
+        self._discard(connection)
+
+    def close(self):
+        with self.condition:
+            idle, self.idle = list(self.idle), deque()
+            self.size -= len(idle)
+        for entry in idle:
+            self._discard(entry.connection)
+
+    def stats(self):
+        with self.condition:
+            return {'size': self.size, 'idle': len(self.idle), 'busy': len(self.busy), 'max_size': self.max_size}
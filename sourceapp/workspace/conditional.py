@@ -0,0 +1,73 @@
+import hashlib
+
+from django.db.models import Count, Max, Sum
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+from rest_framework.response import Response
+
+from . import reference
+
+
+def aggregates(related=()):
+    # one aggregate over the filtered queryset: newest updated_date, row count and id sum, for the rows and for
+    # each related table that shows up in the representation (count and ids catch rows leaving the list)
+    fields = {'updated': Max('updated_date'), 'count': Count('id', distinct=True), 'ids': Sum('id', distinct=True)}
+    for name in related:
+        fields[f'{name}_updated'] = Max(f'{name}__updated_date')
+        fields[f'{name}_count'] = Count(f'{name}__id')
+    return fields
+
+
+def object_values(instance, related=()):
+    values = {'id': instance.pk, 'updated': instance.updated_date}
+    for name in related:
+        values[f'{name}_updated'] = getattr(getattr(instance, name), 'updated_date', None)
+    return values
+
+
+def validators(values, references=(), timestamped=True):
+    # Lists pass timestamped=False: rows leaving a list never raise its newest updated_date, so a
+    # Last-Modified there would answer If-Modified-Since with a stale 304. Only the ETag validates them.
+    parts = sorted(values.items()) + [(name, reference.version(name)) for name in references]
+    etag = '"%s"' % hashlib.md5(repr(parts).encode(), usedforsecurity=False).hexdigest()
+    if not timestamped:
+        return etag, None
+
+    timestamps = [v for k, v in values.items() if k.endswith('updated') and v is not None]
+    last_modified = int(max(timestamps).timestamp()) if timestamps else None
+    return etag, last_modified
+
+
+def not_modified(request, etag, last_modified):
+    # a 304 (or 412) when the client's copy is still current, otherwise None
+    return get_conditional_response(request, etag=etag, last_modified=last_modified)
+
+
+def add_headers(response, etag, last_modified):
+    if 200 <= response.status_code < 300:
+        response['ETag'] = etag
+        if last_modified is not None:
+            response['Last-Modified'] = http_date(last_modified)
+    return response
+
+
+class ConditionalGetMixin:
+    # relations and reference tables whose data is part of each row's representation
+    conditional_related = []
+    conditional_references = []
+
+    def conditional(self, request, values, render, timestamped=True):
+        etag, last_modified = validators(values, self.conditional_references, timestamped)
+        return not_modified(request, etag, last_modified) or add_headers(render(), etag, last_modified)
+
+    def list(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
+        values = queryset.order_by().aggregate(**aggregates(self.conditional_related))
+        self.row_count = values['count']
+        render = super().list
+        return self.conditional(request, values, lambda: render(request, *args, **kwargs), timestamped=False)
+
+    def retrieve(self, request, *args, **kwargs):
+        instance = self.get_object()
+        values = object_values(instance, self.conditional_related)
+        return self.conditional(request, values, lambda: Response(self.get_serializer(instance).data))
@@ -0,0 +1,148 @@
+from collections import defaultdict
+
+from django.db import transaction
+from django.db.models import Case, Count, F, Value, When
+from django.utils import timezone
+
+from . import models
+
+HIRED = 4
+# Apply.status -> Recruitment column, e.g. 4 -> 'hired_count'
+STATUS_FIELDS = {status: f'{label.lower()}_count' for status, label in models.Apply.STATUS}
+RECRUITMENT_FIELDS = models.Recruitment.counter_fields
+COMPANY_FIELDS = models.Company.counter_fields
+
+APPLY_FIELDS = ['active', 'status', 'recruitment_id']
+FOLLOW_FIELDS = ['active', 'company_id']
+
+
+def _adjust(model, deltas):
+    # deltas: {pk: {field: delta}} -> a single UPDATE using F() so concurrent writers never lose increments
+    deltas = {pk: {f: d for f, d in fields.items() if d} for pk, fields in deltas.items()}
+    deltas = {pk: fields for pk, fields in deltas.items() if fields}
+    if not deltas:
+        return
+
+    changes = {}
+    for field in {f for fields in deltas.values() for f in fields}:
+        whens = [When(pk=pk, then=Value(fields[field])) for pk, fields in deltas.items() if field in fields]
+        changes[field] = F(field) + Case(*whens, default=Value(0))
+    model.objects.filter(pk__in=deltas).update(updated_date=timezone.now(), **changes)
+
+
+def apply_snapshot(values):
+    # what an application contributes to the counters, or None when it is not counted
+    if not values or not values['active']:
+        return None
+    return values['recruitment_id'], values['status']
+
+
+def move_applies(moves, companies=None):
+    # moves: [(old snapshot, new snapshot)] for any number of applications;
+    # companies: {recruitment_id: company_id} when the caller already knows them
+    recruitments = defaultdict(lambda: defaultdict(int))
+    hires = defaultdict(int)
+    for old, new in moves:
+        if old == new:
+            continue
+        for snapshot, sign in ((old, -1), (new, 1)):
+            if snapshot:
+                recruitment_id, status = snapshot
+                recruitments[recruitment_id]['applicant_count'] += sign
+                recruitments[recruitment_id][STATUS_FIELDS[status]] += sign
+                if status == HIRED:
+                    hires[recruitment_id] += sign
+
+    with transaction.atomic(savepoint=False):
+        _adjust(models.Recruitment, recruitments)
+        if any(hires.values()):
+            if companies is None or not set(hires) <= set(companies):
+                companies = dict(models.Recruitment.objects.filter(id__in=hires).values_list('id', 'company_id'))
+            company_deltas = defaultdict(lambda: defaultdict(int))
+            for recruitment_id, delta in hires.items():
+                company_deltas[companies[recruitment_id]]['hire_count'] += delta
+            _adjust(models.Company, company_deltas)
+
+
+def remove_archived_hire(recruitment_id):
+    company_id = models.ArchivedRecruitment.objects.filter(id=recruitment_id) \
+        .values_list('company_id', flat=True).first()
+    if company_id:
+        _adjust(models.Company, {company_id: {'hire_count': -1}})
+
+
+def follow_snapshot(values):
+    if not values or not values['active']:
+        return None
+    return values['company_id']
+
+
+def move_follow(old, new):
+    if old == new:
+        return
+
+    companies = defaultdict(lambda: defaultdict(int))
+    if old:
+        companies[old]['follower_count'] -= 1
+    if new:
+        companies[new]['follower_count'] += 1
+    _adjust(models.Company, companies)
+
+
+def _repair(model, rows, expected, fields):
+    now = timezone.now()
+    changed = []
+    for row in rows:
+        wanted = expected.get(row.id, {})
+        if any(getattr(row, f) != wanted.get(f, 0) for f in fields):
+            for f in fields:
+                setattr(row, f, wanted.get(f, 0))
+            row.updated_date = now
+            changed.append(row)
+    model.objects.bulk_update(changed, fields + ['updated_date'])
+    return len(changed)
+
+
+def reconcile(chunk_size=500):
+    # recount from Apply/Follow in id-ordered chunks and rewrite only the rows that drifted
+    repaired = 0
+
+    last_id = 0
+    while True:
+        rows = list(models.Recruitment.objects.filter(id__gt=last_id).order_by('id')
+                    .only('id', 'updated_date', *RECRUITMENT_FIELDS)[:chunk_size])
+        if not rows:
+            break
+
+        expected = defaultdict(lambda: defaultdict(int))
+        for item in models.Apply.objects.filter(active=True, recruitment__in=rows) \
+                .values('recruitment_id', 'status').annotate(n=Count('id')).order_by():
+            expected[item['recruitment_id']]['applicant_count'] += item['n']
+            expected[item['recruitment_id']][STATUS_FIELDS[item['status']]] += item['n']
+
+        with transaction.atomic():
+            repaired += _repair(models.Recruitment, rows, expected, RECRUITMENT_FIELDS)
+        last_id = rows[-1].id
+
+    last_id = 0
+    while True:
+        rows = list(models.Company.objects.filter(id__gt=last_id).order_by('id')
+                    .only('id', 'updated_date', *COMPANY_FIELDS)[:chunk_size])
+        if not rows:
+            break
+
+        expected = defaultdict(lambda: defaultdict(int))
+        for item in models.Follow.objects.filter(active=True, company__in=rows) \
+                .values('company_id').annotate(n=Count('id')).order_by():
+            expected[item['company_id']]['follower_count'] = item['n']
+        # hires stay counted once they are archived
+        for model in (models.Apply, models.ArchivedApply):
+            for item in model.objects.filter(active=True, status=HIRED, recruitment__company__in=rows) \
+                    .values('recruitment__company_id').annotate(n=Count('id')).order_by():
+                expected[item['recruitment__company_id']]['hire_count'] += item['n']
+
+        with transaction.atomic():
+            repaired += _repair(models.Company, rows, expected, COMPANY_FIELDS)
+        last_id = rows[-1].id
+
+    return repaired
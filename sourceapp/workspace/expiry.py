@@ -0,0 +1,42 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from . import models, rollups
+
+
+def default_deadline(date_start):
+    return date_start + timedelta(days=settings.RECRUITMENT_DURATION_DAYS)
+
+
+def expired(today=None):
+    return models.Recruitment.objects.filter(active=True, deadline__lt=today or timezone.localdate())
+
+
+def expire_chunk(today=None, chunk_size=500):
+    # Locks a chunk of due postings with SKIP LOCKED, so several nodes running the command at once each
+    # take different rows. The bulk UPDATE skips save(), so the search terms and daily rollups are
+    # brought in line here. Views' conditional GETs and the recommendation matrix follow updated_date.
+    with transaction.atomic():
+        rows = list(expired(today).order_by('id').select_for_update(skip_locked=True)
+                    .values('id', *rollups.RECRUITMENT_FIELDS)[:chunk_size])
+        if not rows:
+            return 0
+
+        ids = [row['id'] for row in rows]
+        now = timezone.now()
+        models.Recruitment.objects.filter(id__in=ids).update(active=False, deactivated_date=now, updated_date=now)
+        models.RecruitmentTerm.objects.filter(recruitment_id__in=ids).delete()
+        rollups.remove_recruitments([rollups.recruitment_snapshot(row) for row in rows])
+        return len(ids)
+
+
+def expire(today=None, chunk_size=500):
+    total = 0
+    while True:
+        count = expire_chunk(today, chunk_size)
+        if not count:
+            return total
+        total += count
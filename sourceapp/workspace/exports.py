@@ -0,0 +1,114 @@
+import csv
+import json
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import StreamingHttpResponse
+
+from . import archive
+
+CSV = 'csv'
+NDJSON = 'ndjson'
+CONTENT_TYPES = {
+    CSV: 'text/csv; charset=utf-8',
+    NDJSON: 'application/x-ndjson',
+}
+CHUNK_SIZE = 1000
+
+
+class _Echo:
+    def write(self, value):
+        return value
+
+
+def chunks(queryset, chunk_size=CHUNK_SIZE):
+    # keyset batches instead of .iterator(): MySQL drivers buffer the whole result set client-side
+    queryset = queryset.order_by('id')
+    last_id = 0
+    while True:
+        chunk = list(archive.narrow(queryset, id__gt=last_id)[:chunk_size])
+        if not chunk:
+            break
+        yield chunk
+        last_id = chunk[-1]['id']
+
+
+async def achunks(queryset, chunk_size=CHUNK_SIZE):
+    queryset = queryset.order_by('id')
+    last_id = 0
+    while True:
+        chunk = [row async for row in archive.narrow(queryset, id__gt=last_id)[:chunk_size]]
+        if not chunk:
+            break
+        yield chunk
+        last_id = chunk[-1]['id']
+
+
+def _flatten(data, prefix=''):
+    row = {}
+    for key, value in data.items():
+        if isinstance(value, dict):
+            row.update(_flatten(value, f'{prefix}{key}_'))
+        else:
+            row[f'{prefix}{key}'] = value
+    return row
+
+
+def _csv_format():
+    writer = None
+    echo = _Echo()
+
+    def line(row):
+        nonlocal writer
+        row = _flatten(row)
+        if writer is None:
+            writer = csv.DictWriter(echo, fieldnames=list(row))
+            return writer.writeheader() + writer.writerow(row)
+        return writer.writerow(row)
+
+    return '\ufeff', line  # the BOM makes Excel open the Vietnamese names as UTF-8
+
+
+def _ndjson_format():
+    return '', lambda row: json.dumps(row, cls=DjangoJSONEncoder, ensure_ascii=False) + '\n'
+
+
+FORMATS = {CSV: _csv_format, NDJSON: _ndjson_format}
+
+
+def rows(queryset, serializer_class, chunk_size=CHUNK_SIZE):
+    for chunk in chunks(queryset.values(*serializer_class.projection), chunk_size):
+        yield from serializer_class(chunk, many=True).data
+
+
+async def arows(queryset, serializer_class, chunk_size=CHUNK_SIZE):
+    # the same pages through the async ORM: under ASGI Django would buffer a sync iterator whole
+    async for chunk in achunks(queryset.values(*serializer_class.projection), chunk_size):
+        for row in serializer_class(chunk, many=True).data:
+            yield row
+
+
+def lines(rows, file_type):
+    prefix, line = FORMATS[file_type]()
+    if prefix:
+        yield prefix
+    for row in rows:
+        yield line(row)
+
+
+async def alines(rows, file_type):
+    prefix, line = FORMATS[file_type]()
+    if prefix:
+        yield prefix
+    async for row in rows:
+        yield line(row)
+
+
+def stream(queryset, serializer_class, file_type, filename, asynchronous=False):
+    # asynchronous: the request is served by ASGI, which streams only async iterators
+    if asynchronous:
+        content = alines(arows(queryset, serializer_class), file_type)
+    else:
+        content = lines(rows(queryset, serializer_class), file_type)
+    response = StreamingHttpResponse(content, content_type=CONTENT_TYPES[file_type])
+    response['Content-Disposition'] = f'attachment; filename="{filename}.{file_type}"'
+    return response
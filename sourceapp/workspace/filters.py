@@ -0,0 +1,111 @@
+from datetime import datetime
+from decimal import Decimal, InvalidOperation
+
+from django.db.models import Case, Count, IntegerField, Value, When
+from rest_framework.exceptions import ValidationError
+
+from . import locations, reference, search
+
+# salary bucket i holds SALARY_BUCKETS[i - 1] <= salary < SALARY_BUCKETS[i]; the last one is open-ended
+SALARY_BUCKETS = [5_000_000, 10_000_000, 15_000_000, 20_000_000, 30_000_000, 50_000_000]
+
+# facet name -> grouped column (and reference table)
+FACETS = {'category': 'category_id', 'work_type': 'work_type_id', 'province': 'province_id'}
+
+
+def _salary(params, name):
+    value = params.get(name)
+    if not value:
+        return None
+    try:
+        value = Decimal(value)
+    except InvalidOperation:
+        value = None
+    if value is None or not value.is_finite() or value < 0:
+        raise ValidationError({name: 'Mức lương không hợp lệ.'})
+    return value
+
+
+def recruitments(query, params):
+    com_id = params.get('company_id')
+    if com_id:
+        query = query.filter(company_id=com_id)
+
+    cate_id = params.get('category_id')
+    if cate_id:
+        query = query.filter(category__id=cate_id)
+
+    work_id = params.get('work_type_id')
+    if work_id:
+        query = query.filter(work_type__id=work_id)
+
+    province = params.get('province')
+    if province:
+        query = locations.filter_province(query, province)
+
+    k = params.get('key')
+    if k:
+        query = search.search(query, k)
+
+    date = params.get('date_start')
+    if date:
+        try:
+            date_obj = datetime.strptime(date, '%Y-%m-%d').date()
+            query = query.filter(date_start__gte=date_obj)
+        except ValueError:
+            pass
+
+    salary_min = _salary(params, 'salary_min')
+    if salary_min is not None:
+        query = query.filter(salary__gte=salary_min)
+
+    salary_max = _salary(params, 'salary_max')
+    if salary_max is not None:
+        query = query.filter(salary__lte=salary_max)
+
+    return query
+
+
+def salary_bucket():
+    return Case(*[When(salary__lt=bound, then=Value(i)) for i, bound in enumerate(SALARY_BUCKETS)],
+                default=Value(len(SALARY_BUCKETS)), output_field=IntegerField())
+
+
+def facets(query):
+    # one GROUP BY over every (category, work type, province, salary bucket) combination of the filtered
+    # rows, folded into per-facet counts here
+    groups = query.order_by().values(*FACETS.values(), bucket=salary_bucket()).annotate(n=Count('id'))
+
+    total = 0
+    counts = {name: {} for name in FACETS}
+    salary = [0] * (len(SALARY_BUCKETS) + 1)
+    for group in groups:
+        total += group['n']
+        salary[group['bucket']] += group['n']
+        for name, column in FACETS.items():
+            counts[name][group[column]] = counts[name].get(group[column], 0) + group['n']
+
+    result = {'count': total}
+    for name, by_id in counts.items():
+        result[name] = [{'id': pk, 'name': reference.get_name(name, pk), 'count': n}
+                        for pk, n in sorted(by_id.items(), key=lambda item: (-item[1], item[0] or 0))]
+
+    bounds = [None] + SALARY_BUCKETS + [None]
+    result['salary'] = [{'min': bounds[i], 'max': bounds[i + 1], 'count': n} for i, n in enumerate(salary) if n]
+    return result
+
+
+def user_comments(query, params):
+    user_id = params.get('user_id')
+    if user_id:
+        query = query.filter(user__id=user_id)
+
+    return query
+
+
+def company_comments(query, params):
+    company_id = params.get('company_id')
+    if company_id:
+        query = query.filter(company__id=company_id)
+
+    return query
@@ -0,0 +1,192 @@
+import bisect
+import logging
+import threading
+import time
+from contextlib import ExitStack
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.db import connections
+
+logger = logging.getLogger(__name__)
+
+BUCKETS = [1, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000]
+
+_current = ContextVar('workspace_request_stats', default=None)
+_lock = threading.Lock()
+_histograms = {}
+_counters = {}
+
+
+class Histogram:
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(BUCKETS, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def export(self):
+        buckets = {str(bound): n for bound, n in zip(BUCKETS + ['+Inf'], self.counts)}
+        return {'count': self.count, 'sum': round(self.sum, 3), 'buckets': buckets}
+
+
+class RequestStats:
+    def __init__(self):
+        self.db_ms = 0.0
+        self.queries = 0
+        self.serializer_ms = 0.0
+        self.serializer_depth = 0
+        self.explaining = False
+
+
+def observe(key, metric, value):
+    with _lock:
+        _histograms.setdefault(key, {}).setdefault(metric, Histogram()).observe(value)
+
+
+def incr(name, value=1):
+    with _lock:
+        _counters[name] = _counters.get(name, 0) + value
+
+
+def snapshot():
+    with _lock:
+        return {
+            'requests': {key: {metric: h.export() for metric, h in metrics.items()}
+                         for key, metrics in _histograms.items()},
+            'counters': dict(_counters),
+        }
+
+
+def reset():
+    with _lock:
+        _histograms.clear()
+        _counters.clear()
+
+
+class SerializerTimingMixin:
+    # only the outermost to_representation is timed so nested serializers are not counted twice
+    def to_representation(self, instance):
+        stats = _current.get()
+        if stats is None:
+            return super().to_representation(instance)
+
+        stats.serializer_depth += 1
+        start = time.perf_counter()
+        try:
+            return super().to_representation(instance)
+        finally:
+            stats.serializer_depth -= 1
+            if not stats.serializer_depth:
+                stats.serializer_ms += (time.perf_counter() - start) * 1000
+
+
+def _explain(connection, sql, params):
+    prefix = 'EXPLAIN QUERY PLAN ' if connection.vendor == 'sqlite' else 'EXPLAIN '
+    with connection.cursor() as cursor:
+        cursor.execute(prefix + sql, params)
+        return '\n'.join(' | '.join(str(c) for c in row) for row in cursor.fetchall())
+
+
+class QueryTimer:
+    def __init__(self, stats, connection):
+        self.stats = stats
+        self.connection = connection
+
+    def __call__(self, execute, sql, params, many, context):
+        if self.stats.explaining:
+            return execute(sql, params, many, context)
+
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed = (time.perf_counter() - start) * 1000
+            self.stats.db_ms += elapsed
+            self.stats.queries += 1
+            if elapsed >= settings.SLOW_QUERY_MS:
+                self.slow_query(sql, params, many, elapsed)
+
+    def slow_query(self, sql, params, many, elapsed):
+        plan = ''
+        if not many and sql.lstrip().upper().startswith('SELECT'):
+            self.stats.explaining = True
+            try:
+                plan = _explain(self.connection, sql, params)
+            except Exception as e:
+                plan = f'EXPLAIN failed: {e}'
+            finally:
+                self.stats.explaining = False
+
+        logger.warning('Slow query (%.1f ms) on %s: %s %r\n%s', elapsed, self.connection.alias, sql, params, plan)
+
+
+def view_key(request):
+    match = getattr(request, 'resolver_match', None)
+    return f'{request.method} {match.view_name if match else "unresolved"}'
+
+
+def _install(stats):
+    stack = ExitStack()
+    for connection in connections.all():
+        stack.enter_context(connection.execute_wrapper(QueryTimer(stats, connection)))
+    return stack
+
+
+class InstrumentationMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+
+        stats = RequestStats()
+        token = _current.set(stats)
+        start = time.perf_counter()
+        stack = _install(stats)
+        try:
+            response = self.get_response(request)
+        finally:
+            stack.close()
+            _current.reset(token)
+
+        self.record(request, response, stats, start)
+        return response
+
+    async def __acall__(self, request):
+        stats = RequestStats()
+        token = _current.set(stats)
+        start = time.perf_counter()
+        # async ORM calls run on the thread-sensitive worker, which has its own connections
+        stack = await sync_to_async(_install)(stats)
+        try:
+            response = await self.get_response(request)
+        finally:
+            await sync_to_async(stack.close)()
+            _current.reset(token)
+
+        self.record(request, response, stats, start)
+        return response
+
+    def record(self, request, response, stats, start):
+        wall_ms = (time.perf_counter() - start) * 1000
+        key = view_key(request)
+        observe(key, 'wall_ms', wall_ms)
+        observe(key, 'db_ms', stats.db_ms)
+        observe(key, 'queries', stats.queries)
+        observe(key, 'serializer_ms', stats.serializer_ms)
+
+        if settings.INSTRUMENTATION_LOG_REQUESTS:
+            logger.info('%s status=%s wall=%.1fms db=%.1fms queries=%d serializer=%.1fms',
+                        key, response.status_code, wall_ms, stats.db_ms, stats.queries, stats.serializer_ms)
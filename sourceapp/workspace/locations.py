@@ -0,0 +1,40 @@
+from . import reference, search
+
+
+def _keys(rows):
+    keys = []
+    for row in rows:
+        if row['active']:
+            for key in [row['slug']] + row['aliases'].split(','):
+                if key.strip():
+                    keys.append((' '.join(search.tokenize(key)), row['id']))
+    return keys
+
+
+def resolve(text):
+    # "123 Lê Lợi, Q.1, TP. Hồ Chí Minh" -> id of Hồ Chí Minh; addresses end with the province,
+    # so the match ending last wins, then the longest one
+    text = f" {' '.join(search.tokenize(text))} "
+    if not text.strip():
+        return None
+
+    best = None
+    for key, province_id in reference.derived('province', 'keys', _keys):
+        position = text.rfind(f' {key} ')
+        if position >= 0:
+            candidate = (position + len(key), len(key), province_id)
+            best = candidate if best is None else max(best, candidate)
+
+    return best[2] if best else None
+
+
+def filter_province(queryset, text):
+    if text.isdigit():
+        return queryset.filter(province_id=text)
+
+    province_id = resolve(text)
+    if province_id:
+        return queryset.filter(province_id=province_id)
+
+    # unknown spelling: fall back to the indexed location terms
+    return search.match(queryset, text, fields=['location'])
@@ -0,0 +1,22 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from workspace import archive
+
+
+class Command(BaseCommand):
+    help = 'Move long-inactive recruitments and their applications into the archive tables'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=500)
+        parser.add_argument('--days', type=int, default=settings.ARCHIVE_AFTER_DAYS,
+                            help='Archive recruitments deactivated more than this many days ago')
+
+    def handle(self, *args, **options):
+        # every chunk commits on its own, so an interrupted run is resumed by running the command again
+        cutoff = timezone.now() - timedelta(days=options['days'])
+        archived = archive.archive_recruitments(cutoff, chunk_size=options['chunk_size'])
+        self.stdout.write(self.style.SUCCESS(f'Archived {archived} recruitments.'))
@@ -0,0 +1,39 @@
+from django.core.management.base import BaseCommand
+
+from workspace import locations, models
+
+
+class Command(BaseCommand):
+    help = 'Map free-text recruitment locations onto the Province table'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=1000)
+        parser.add_argument('--all', action='store_true', help='Re-resolve rows that already have a province')
+
+    def handle(self, *args, **options):
+        recruitments = models.Recruitment.objects.order_by('id')
+        if not options['all']:
+            recruitments = recruitments.filter(province__isnull=True)
+
+        matched = unmatched = 0
+        last_id = 0
+        while True:
+            chunk = list(recruitments.filter(id__gt=last_id).only('id', 'location', 'province')[:options['chunk_size']])
+            if not chunk:
+                break
+
+            changed = []
+            for r in chunk:
+                province_id = locations.resolve(r.location)
+                if province_id:
+                    matched += 1
+                else:
+                    unmatched += 1
+                if province_id != r.province_id:
+                    r.province_id = province_id
+                    changed.append(r)
+
+            models.Recruitment.objects.bulk_update(changed, ['province'])
+            last_id = chunk[-1].id
+
+        self.stdout.write(self.style.SUCCESS(f'Matched {matched} recruitments, {unmatched} left without a province.'))
@@ -0,0 +1,27 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from workspace import expiry
+
+
+class Command(BaseCommand):
+    help = 'Deactivate recruitments past their deadline in chunked bulk updates (safe to run on several nodes)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=500)
+        parser.add_argument('--loop', action='store_true', help='Keep running instead of exiting when done')
+        parser.add_argument('--interval', type=float, default=300, help='Seconds to sleep between runs')
+
+    def handle(self, *args, **options):
+        while True:
+            # a long-lived loop outlives CONN_MAX_AGE and the server's wait_timeout, as a request would not
+            close_old_connections()
+            expired = expiry.expire(chunk_size=options['chunk_size'])
+            if expired:
+                self.stdout.write(f'Expired {expired} recruitments.')
+
+            if not options['loop']:
+                break
+            time.sleep(options['interval'])
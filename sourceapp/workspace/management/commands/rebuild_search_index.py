@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from workspace import models, search
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the recruitment search index from scratch'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=500)
+
+    def handle(self, *args, **options):
+        models.RecruitmentTerm.objects.all().delete()
+        search.index_many(models.Recruitment.objects.filter(active=True), chunk_size=options['chunk_size'])
+
+        count = models.RecruitmentTerm.objects.values('recruitment').distinct().count()
+        self.stdout.write(self.style.SUCCESS(f'Indexed {count} recruitments.'))
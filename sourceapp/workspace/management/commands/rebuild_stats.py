@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from workspace import rollups
+
+
+class Command(BaseCommand):
+    help = 'Regenerate the daily recruitment rollups and site counters from scratch'
+
+    def handle(self, *args, **options):
+        rollups.rebuild()
+        self.stdout.write(self.style.SUCCESS('Rollups rebuilt.'))
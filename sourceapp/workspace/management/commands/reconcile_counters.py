@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from workspace import counters
+
+
+class Command(BaseCommand):
+    help = 'Recount the applicant, hire and follower columns and repair any that drifted'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=500)
+
+    def handle(self, *args, **options):
+        repaired = counters.reconcile(chunk_size=options['chunk_size'])
+        self.stdout.write(self.style.SUCCESS(f'Repaired {repaired} rows.'))
@@ -0,0 +1,34 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from workspace import seeding
+
+
+class Command(BaseCommand):
+    help = 'Bulk-create realistic volumes of demo data for load testing'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--recruitments', type=int, default=1000)
+        parser.add_argument('--companies', type=int, default=None)
+        parser.add_argument('--candidates', type=int, default=None)
+        parser.add_argument('--applies', type=int, default=None)
+        parser.add_argument('--follows', type=int, default=None)
+        parser.add_argument('--comments', type=int, default=None)
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            data = seeding.seed(
+                recruitments=options['recruitments'],
+                companies=options['companies'],
+                candidates=options['candidates'],
+                applies=options['applies'],
+                follows=options['follows'],
+                comments=options['comments'],
+                batch_size=options['batch_size'],
+            )
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Seeded {len(data['companies'])} companies, {len(data['candidates'])} candidates "
+            f"and {len(data['recruitments'])} recruitments."
+        ))
@@ -0,0 +1,25 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from workspace import outbox
+
+
+class Command(BaseCommand):
+    help = 'Deliver pending outbox emails in batches over a single SMTP connection per batch'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=None)
+        parser.add_argument('--loop', action='store_true', help='Keep polling instead of exiting when drained')
+        parser.add_argument('--interval', type=float, default=5, help='Seconds to sleep when nothing is due')
+
+    def handle(self, *args, **options):
+        while True:
+            sent, failed = outbox.deliver(options['batch_size'])
+            if sent or failed:
+                self.stdout.write(f'Sent {sent}, failed {failed}.')
+                continue
+
+            if not options['loop']:
+                break
+            time.sleep(options['interval'])
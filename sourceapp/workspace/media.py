@@ -0,0 +1,31 @@
+from functools import lru_cache
+
+from cloudinary import utils
+
+URL_CACHE_SIZE = 10000
+
+# passed to cloudinary_url by name; taken from the resource unless the caller overrides them
+EXPLICIT_OPTIONS = ['format', 'version', 'type', 'resource_type']
+
+
+@lru_cache(maxsize=URL_CACHE_SIZE)
+def _build(public_id, format, version, type, resource_type, options):
+    return utils.cloudinary_url(public_id, format=format, version=version, type=type,
+                                resource_type=resource_type or 'image', **dict(options))[0]
+
+
+def url(resource, **options):
+    # same result as CloudinaryResource.url, but signing/building happens once per public_id and transformation
+    public_id = getattr(resource, 'public_id', None)
+    if not public_id:
+        return ''
+
+    options = {**resource.url_options, **options}
+    explicit = [options.pop(key, getattr(resource, key)) for key in EXPLICIT_OPTIONS]
+    options = tuple(sorted(options.items()))
+    try:
+        hash(options)
+    except TypeError:
+        # e.g. a list of chained transformations: build it without the cache
+        return _build.__wrapped__(public_id, *explicit, options)
+    return _build(public_id, *explicit, options)
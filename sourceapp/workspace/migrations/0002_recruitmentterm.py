@@ -0,0 +1,37 @@
+# Generated by Django 5.1.6 on 2026-10-18 16:18
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('workspace', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='apply',
+            name='status',
+            field=models.IntegerField(choices=[(0, 'Default'), (1, 'Rejected'), (2, 'Interview'), (3, 'Offer'), (4, 'Hired'), (5, 'Cancelled'), (6, 'Declined')], default=0),
+        ),
+        migrations.AlterField(
+            model_name='recruitment',
+            name='company',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='workspace.company'),
+        ),
+        migrations.CreateModel(
+            name='RecruitmentTerm',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('term', models.CharField(max_length=50)),
+                ('field', models.CharField(choices=[('title', 'Title'), ('description', 'Description'), ('company', 'Company'), ('category', 'Category'), ('location', 'Location')], max_length=20)),
+                ('weight', models.IntegerField(default=1)),
+                ('recruitment', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='terms', to='workspace.recruitment')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['field', 'term', 'recruitment'], name='workspace_r_field_47d05f_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,57 @@
+# Generated by Django 5.1.6 on 2026-10-18 16:19
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('workspace', '0002_recruitmentterm'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='apply',
+            index=models.Index(fields=['recruitment', 'active', 'status'], name='workspace_a_recruit_1f332c_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='apply',
+            index=models.Index(fields=['resume', 'active', 'status'], name='workspace_a_resume__204448_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='companycomment',
+            index=models.Index(fields=['company', 'active'], name='workspace_c_company_546da3_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='follow',
+            index=models.Index(fields=['user', 'active'], name='workspace_f_user_id_78fafc_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='follow',
+            index=models.Index(fields=['company', 'active'], name='workspace_f_company_0432b8_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='recruitment',
+            index=models.Index(fields=['active', 'id'], name='workspace_r_active_426f89_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='recruitment',
+            index=models.Index(fields=['company', 'active', 'id'], name='workspace_r_company_4a5319_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='recruitment',
+            index=models.Index(fields=['category', 'active', 'id'], name='workspace_r_categor_97f155_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='recruitment',
+            index=models.Index(fields=['work_type', 'active', 'id'], name='workspace_r_work_ty_0fa97e_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='recruitment',
+            index=models.Index(fields=['date_start', 'active'], name='workspace_r_date_st_852bb2_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='usercomment',
+            index=models.Index(fields=['user', 'active'], name='workspace_u_user_id_11a7c3_idx'),
+        ),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 5.1.6 on 2026-10-18 16:26
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('workspace', '0005_daily_stats'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Province',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_date', models.DateTimeField(auto_now_add=True)),
+                ('updated_date', models.DateTimeField(auto_now=True)),
+                ('active', models.BooleanField(default=True)),
+                ('name', models.CharField(max_length=100, unique=True)),
+                ('slug', models.CharField(max_length=100, unique=True)),
+                ('aliases', models.CharField(blank=True, max_length=255)),
+            ],
+            options={
+                'abstract': False,
+            },
+        ),
+        migrations.AddField(
+            model_name='recruitment',
+            name='province',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to='workspace.province'),
+        ),
+        migrations.AddIndex(
+            model_name='recruitment',
+            index=models.Index(fields=['province', 'active', 'id'], name='workspace_r_provinc_4b50ef_idx'),
+        ),
+    ]
@@ -0,0 +1,101 @@
+import re
+import unicodedata
+
+from django.db import migrations
+
+# the 63 provinces and centrally-run cities, with the spellings clients commonly send
+PROVINCES = [
+    ('Hà Nội', ['hn', 'hanoi', 'tp ha noi']),
+    ('Hồ Chí Minh', ['hcm', 'tp hcm', 'tphcm', 'sai gon', 'saigon', 'tp ho chi minh']),
+    ('Hải Phòng', ['haiphong']),
+    ('Đà Nẵng', ['danang']),
+    ('Cần Thơ', ['cantho']),
+    ('An Giang', []),
+    ('Bà Rịa - Vũng Tàu', ['vung tau', 'ba ria', 'brvt']),
+    ('Bắc Giang', []),
+    ('Bắc Kạn', ['bac can']),
+    ('Bạc Liêu', []),
+    ('Bắc Ninh', []),
+    ('Bến Tre', []),
+    ('Bình Định', []),
+    ('Bình Dương', []),
+    ('Bình Phước', []),
+    ('Bình Thuận', []),
+    ('Cà Mau', []),
+    ('Cao Bằng', []),
+    ('Đắk Lắk', ['dak lak', 'daklak']),
+    ('Đắk Nông', ['dak nong']),
+    ('Điện Biên', []),
+    ('Đồng Nai', []),
+    ('Đồng Tháp', []),
+    ('Gia Lai', []),
+    ('Hà Giang', []),
+    ('Hà Nam', []),
+    ('Hà Tĩnh', []),
+    ('Hải Dương', []),
+    ('Hậu Giang', []),
+    ('Hòa Bình', ['hoa binh']),
+    ('Hưng Yên', []),
+    ('Khánh Hòa', ['nha trang']),
+    ('Kiên Giang', []),
+    ('Kon Tum', []),
+    ('Lai Châu', []),
+    ('Lâm Đồng', ['da lat']),
+    ('Lạng Sơn', []),
+    ('Lào Cai', []),
+    ('Long An', []),
+    ('Nam Định', []),
+    ('Nghệ An', []),
+    ('Ninh Bình', []),
+    ('Ninh Thuận', []),
+    ('Phú Thọ', []),
+    ('Phú Yên', []),
+    ('Quảng Bình', []),
+    ('Quảng Nam', []),
+    ('Quảng Ngãi', []),
+    ('Quảng Ninh', []),
+    ('Quảng Trị', []),
+    ('Sóc Trăng', []),
+    ('Sơn La', []),
+    ('Tây Ninh', []),
+    ('Thái Bình', []),
+    ('Thái Nguyên', []),
+    ('Thanh Hóa', []),
+    ('Thừa Thiên Huế', ['hue', 'tt hue']),
+    ('Tiền Giang', []),
+    ('Trà Vinh', []),
+    ('Tuyên Quang', []),
+    ('Vĩnh Long', []),
+    ('Vĩnh Phúc', []),
+    ('Yên Bái', []),
+]
+
+
+def _normalize(text):
+    text = unicodedata.normalize('NFD', text).lower().replace('đ', 'd')
+    text = ''.join(c for c in text if unicodedata.category(c) != 'Mn')
+    return ' '.join(re.findall(r'[a-z0-9]+', text))
+
+
+def seed(apps, schema_editor):
+    Province = apps.get_model('workspace', 'Province')
+    Province.objects.bulk_create([
+        Province(name=name, slug=_normalize(name), aliases=','.join(aliases))
+        for name, aliases in PROVINCES
+    ], ignore_conflicts=True)
+
+
+def unseed(apps, schema_editor):
+    Province = apps.get_model('workspace', 'Province')
+    Province.objects.filter(name__in=[name for name, aliases in PROVINCES]).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('workspace', '0006_province'),
+    ]
+
+    operations = [
+        migrations.RunPython(seed, unseed),
+    ]
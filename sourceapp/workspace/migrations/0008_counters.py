@@ -0,0 +1,91 @@
+# Generated by Django 5.1.6 on 2026-10-18 16:41
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+STATUS_FIELDS = ['default_count', 'rejected_count', 'interview_count', 'offer_count', 'hired_count',
+                 'cancelled_count', 'declined_count']
+
+
+def _count(queryset, outer):
+    return Coalesce(Subquery(queryset.filter(**{outer: OuterRef('pk')}).values(outer)
+                             .annotate(n=Count('id')).values('n')), Value(0))
+
+
+def backfill(apps, schema_editor):
+    Apply = apps.get_model('workspace', 'Apply')
+    Follow = apps.get_model('workspace', 'Follow')
+    Recruitment = apps.get_model('workspace', 'Recruitment')
+    Company = apps.get_model('workspace', 'Company')
+
+    applies = Apply.objects.filter(active=True).order_by()
+    Recruitment.objects.update(
+        applicant_count=_count(applies, 'recruitment'),
+        **{field: _count(applies.filter(status=status), 'recruitment') for status, field in enumerate(STATUS_FIELDS)},
+    )
+    Company.objects.update(
+        follower_count=_count(Follow.objects.filter(active=True).order_by(), 'company'),
+        hire_count=_count(applies.filter(status=4), 'recruitment__company'),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('workspace', '0007_seed_provinces'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='company',
+            name='follower_count',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='company',
+            name='hire_count',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='recruitment',
+            name='applicant_count',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='recruitment',
+            name='cancelled_count',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='recruitment',
+            name='declined_count',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='recruitment',
+            name='default_count',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='recruitment',
+            name='hired_count',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='recruitment',
+            name='interview_count',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='recruitment',
+            name='offer_count',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='recruitment',
+            name='rejected_count',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.RunPython(backfill, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.1.6 on 2026-10-18 16:45
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('workspace', '0008_counters'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='recruitment',
+            index=models.Index(fields=['updated_date'], name='workspace_r_updated_08b017_idx'),
+        ),
+    ]
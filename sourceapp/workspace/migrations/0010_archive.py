@@ -0,0 +1,57 @@
+# Generated by Django 5.1.6 on 2026-10-18 16:53
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('workspace', '0009_recruitment_updated_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchivedRecruitment',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('created_date', models.DateTimeField()),
+                ('updated_date', models.DateTimeField()),
+                ('active', models.BooleanField(default=False)),
+                ('archived_date', models.DateTimeField(auto_now_add=True)),
+                ('title', models.CharField(max_length=255)),
+                ('description', models.TextField()),
+                ('salary', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('date_start', models.DateField()),
+                ('location', models.CharField(max_length=255)),
+                ('applicant_count', models.IntegerField(default=0)),
+                ('default_count', models.IntegerField(default=0)),
+                ('rejected_count', models.IntegerField(default=0)),
+                ('interview_count', models.IntegerField(default=0)),
+                ('offer_count', models.IntegerField(default=0)),
+                ('hired_count', models.IntegerField(default=0)),
+                ('cancelled_count', models.IntegerField(default=0)),
+                ('declined_count', models.IntegerField(default=0)),
+                ('category', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='workspace.category')),
+                ('company', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='archived_recruitments', to='workspace.company')),
+                ('province', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='workspace.province')),
+                ('work_type', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='workspace.worktype')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='ArchivedApply',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('created_date', models.DateTimeField()),
+                ('updated_date', models.DateTimeField()),
+                ('active', models.BooleanField(default=True)),
+                ('archived_date', models.DateTimeField(auto_now_add=True)),
+                ('status', models.IntegerField(choices=[(0, 'Default'), (1, 'Rejected'), (2, 'Interview'), (3, 'Offer'), (4, 'Hired'), (5, 'Cancelled'), (6, 'Declined')], default=0)),
+                ('resume', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='archived_applies', to='workspace.resume')),
+                ('recruitment', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='applies', to='workspace.archivedrecruitment')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['recruitment', 'active', 'status'], name='workspace_a_recruit_e1bc6b_idx'), models.Index(fields=['resume', 'active', 'status'], name='workspace_a_resume__30139c_idx')],
+            },
+        ),
+    ]
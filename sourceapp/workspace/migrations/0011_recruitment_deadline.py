@@ -0,0 +1,35 @@
+# Generated by Django 5.1.6 on 2026-10-18 16:55
+
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import ExpressionWrapper, F
+
+
+def backfill(apps, schema_editor):
+    # existing postings get the default window from their start date, so long-stale ones expire
+    Recruitment = apps.get_model('workspace', 'Recruitment')
+    duration = timedelta(days=settings.RECRUITMENT_DURATION_DAYS)
+    Recruitment.objects.filter(deadline__isnull=True).update(
+        deadline=ExpressionWrapper(F('date_start') + duration, output_field=models.DateField()))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('workspace', '0010_archive'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='recruitment',
+            name='deadline',
+            field=models.DateField(blank=True, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='recruitment',
+            index=models.Index(fields=['active', 'deadline'], name='workspace_r_active_c6e1bb_idx'),
+        ),
+        migrations.RunPython(backfill, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 5.1.6 on 2026-10-18 17:16
+
+from django.db import migrations, models
+from django.db.models import F
+
+
+def backfill(apps, schema_editor):
+    # the best guess for postings already switched off is their last change
+    Recruitment = apps.get_model('workspace', 'Recruitment')
+    Recruitment.objects.filter(active=False).update(deactivated_date=F('updated_date'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('workspace', '0011_recruitment_deadline'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='recruitment',
+            name='deactivated_date',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='recruitment',
+            index=models.Index(fields=['active', 'deactivated_date'], name='workspace_r_active_9e911c_idx'),
+        ),
+        migrations.RunPython(backfill, migrations.RunPython.noop),
+    ]
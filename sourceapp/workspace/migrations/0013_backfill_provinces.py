@@ -0,0 +1,59 @@
+import re
+import unicodedata
+
+from django.db import migrations
+
+CHUNK_SIZE = 1000
+
+
+def _normalize(text):
+    text = unicodedata.normalize('NFD', text or '').lower().replace('đ', 'd')
+    text = ''.join(c for c in text if unicodedata.category(c) != 'Mn')
+    return ' '.join(re.findall(r'[a-z0-9]+', text))
+
+
+def _resolve(keys, location):
+    # same rule as workspace.locations.resolve: the match ending last wins, then the longest one
+    text = f' {_normalize(location)} '
+    best = None
+    for key, province_id in keys:
+        position = text.rfind(f' {key} ')
+        if position >= 0:
+            candidate = (position + len(key), len(key), province_id)
+            best = candidate if best is None else max(best, candidate)
+    return best[2] if best else None
+
+
+def backfill(apps, schema_editor):
+    # rows written before province_id existed: without it a known province filters them out entirely
+    Province = apps.get_model('workspace', 'Province')
+    Recruitment = apps.get_model('workspace', 'Recruitment')
+
+    keys = [(_normalize(key), province.id) for province in Province.objects.filter(active=True)
+            for key in [province.slug] + province.aliases.split(',') if key.strip()]
+
+    last_id = 0
+    while True:
+        chunk = list(Recruitment.objects.filter(province__isnull=True, id__gt=last_id)
+                     .order_by('id').only('id', 'location')[:CHUNK_SIZE])
+        if not chunk:
+            break
+
+        changed = []
+        for recruitment in chunk:
+            recruitment.province_id = _resolve(keys, recruitment.location)
+            if recruitment.province_id:
+                changed.append(recruitment)
+        Recruitment.objects.bulk_update(changed, ['province'])
+        last_id = chunk[-1].id
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('workspace', '0012_recruitment_deactivated_date'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill, migrations.RunPython.noop),
+    ]
@@ -2,6 +2,7 @@ from cloudinary.models import CloudinaryField
 from django.contrib.auth.models import AbstractUser
 from django.contrib.contenttypes.models import ContentType
 from django.db import models
+from django.utils import timezone
 
 
 class User(AbstractUser):
@@ -33,6 +34,18 @@ class ModelBase(models.Model):
         abstract = True
 
 
+class CounterFieldsMixin:
+    # denormalized counters only move through F() updates (workspace.counters);
+    # a plain save of an existing row must not write back the copy it loaded
+    counter_fields = []
+
+    def save(self, *args, **kwargs):
+        if not self._state.adding and kwargs.get('update_fields') is None:
+            kwargs['update_fields'] = [f.name for f in self._meta.concrete_fields
+                                       if not f.primary_key and f.name not in self.counter_fields]
+        super().save(*args, **kwargs)
+
+
 class Category(ModelBase):
     name = models.CharField(max_length=100, unique=True)
     description = models.CharField(max_length=255)
@@ -48,11 +61,26 @@ class WorkType(ModelBase):
         return self.name
 
 
-class Company(ModelBase):
+class Province(ModelBase):
+    name = models.CharField(max_length=100, unique=True)
+    # normalized (lowercase, no diacritics) forms used to match free-text locations
+    slug = models.CharField(max_length=100, unique=True)
+    aliases = models.CharField(max_length=255, blank=True)
+
+    def __str__(self):
+        return self.name
+
+
+class Company(CounterFieldsMixin, ModelBase):
+    counter_fields = ['follower_count', 'hire_count']
+
     name = models.CharField(max_length=255)
     code = models.CharField(max_length=20, unique=True)
     verified = models.BooleanField(default=False)
 
+    follower_count = models.IntegerField(default=0)
+    hire_count = models.IntegerField(default=0)
+
     # relationship
     user = models.OneToOneField(User, related_name="company", on_delete=models.CASCADE)
 
@@ -84,22 +112,117 @@ class Resume(ModelBase):
         return f"{self.name}"
 
 
-class Recruitment(ModelBase):
+class Recruitment(CounterFieldsMixin, ModelBase):
+    counter_fields = ['applicant_count', 'default_count', 'rejected_count', 'interview_count', 'offer_count',
+                      'hired_count', 'cancelled_count', 'declined_count']
+
     title = models.CharField(max_length=255)
     description = models.TextField()
     salary = models.DecimalField(max_digits=10, decimal_places=2)
     date_start = models.DateField(null=False)
+    # last day the posting is open; expire_recruitments deactivates it after that
+    deadline = models.DateField(null=True, blank=True)
+    # when the posting was last switched off; archive_recruitments counts the grace period from here,
+    # since updated_date also moves with every application status change
+    deactivated_date = models.DateTimeField(null=True, blank=True)
     location = models.CharField(max_length=255)
 
+    # active applications, in total and per Apply.status
+    applicant_count = models.IntegerField(default=0)
+    default_count = models.IntegerField(default=0)
+    rejected_count = models.IntegerField(default=0)
+    interview_count = models.IntegerField(default=0)
+    offer_count = models.IntegerField(default=0)
+    hired_count = models.IntegerField(default=0)
+    cancelled_count = models.IntegerField(default=0)
+    declined_count = models.IntegerField(default=0)
+
     # foreignKey
     category = models.ForeignKey(Category, on_delete=models.CASCADE)
     work_type = models.ForeignKey(WorkType, on_delete=models.CASCADE)
     company = models.ForeignKey(Company, on_delete=models.CASCADE)
+    province = models.ForeignKey(Province, null=True, blank=True, on_delete=models.SET_NULL)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['active', 'id']),
+            models.Index(fields=['province', 'active', 'id']),
+            models.Index(fields=['company', 'active', 'id']),
+            models.Index(fields=['category', 'active', 'id']),
+            models.Index(fields=['work_type', 'active', 'id']),
+            models.Index(fields=['date_start', 'active']),
+            models.Index(fields=['updated_date']),
+            models.Index(fields=['active', 'deadline']),
+            models.Index(fields=['active', 'deactivated_date']),
+        ]
 
     def __str__(self):
         return f"{self.title} - {self.company.name}"
 
 
+class RecruitmentTerm(models.Model):
+    FIELDS = [
+        ('title', 'Title'),
+        ('description', 'Description'),
+        ('company', 'Company'),
+        ('category', 'Category'),
+        ('location', 'Location'),
+    ]
+
+    term = models.CharField(max_length=50)
+    field = models.CharField(max_length=20, choices=FIELDS)
+    weight = models.IntegerField(default=1)
+
+    # foreignKey
+    recruitment = models.ForeignKey(Recruitment, related_name="terms", on_delete=models.CASCADE)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['field', 'term', 'recruitment']),
+        ]
+
+    def __str__(self):
+        return f"{self.term} ({self.field})"
+
+
+class CategoryDailyStat(models.Model):
+    date = models.DateField()
+    count = models.IntegerField(default=0)
+    salary_sum = models.DecimalField(max_digits=16, decimal_places=2, default=0)
+
+    # foreignKey
+    category = models.ForeignKey(Category, on_delete=models.CASCADE)
+
+    class Meta:
+        unique_together = ('date', 'category')
+
+    def __str__(self):
+        return f"{self.category_id} @ {self.date}: {self.count}"
+
+
+class WorkTypeDailyStat(models.Model):
+    date = models.DateField()
+    count = models.IntegerField(default=0)
+    salary_sum = models.DecimalField(max_digits=16, decimal_places=2, default=0)
+
+    # foreignKey
+    work_type = models.ForeignKey(WorkType, on_delete=models.CASCADE)
+
+    class Meta:
+        unique_together = ('date', 'work_type')
+
+    def __str__(self):
+        return f"{self.work_type_id} @ {self.date}: {self.count}"
+
+
+class Counter(models.Model):
+    name = models.CharField(max_length=50, unique=True)
+    value = models.BigIntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.name}: {self.value}"
+
+
 class Apply(ModelBase):
     STATUS = [
         (0, 'Default'),
@@ -110,6 +233,9 @@ class Apply(ModelBase):
         (5, 'Cancelled'),
         (6, 'Declined'),
     ]
+    # statuses an employer may set, and candidate-side outcomes the employer can no longer change
+    EMPLOYER_STATUSES = [0, 1, 2, 3, 4]
+    CLOSED_STATUSES = [5, 6]
 
     status = models.IntegerField(choices=STATUS, default=0)
 
@@ -117,6 +243,12 @@ class Apply(ModelBase):
     resume = models.ForeignKey(Resume, on_delete=models.CASCADE)
     recruitment = models.ForeignKey(Recruitment, on_delete=models.CASCADE)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['recruitment', 'active', 'status']),
+            models.Index(fields=['resume', 'active', 'status']),
+        ]
+
     def __str__(self):
         return f"{self.resume.user.full_name()} applied for {self.recruitment.title}"
 
@@ -136,11 +268,20 @@ class Follow(Interact):
 
     class Meta:
         unique_together = ('user', 'company')
+        indexes = [
+            models.Index(fields=['user', 'active']),
+            models.Index(fields=['company', 'active']),
+        ]
 
 
 class UserComment(Interact):
     content = models.CharField(max_length=255)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['user', 'active']),
+        ]
+
     def __str__(self):
         return f"{self.user.full_name()} commented on {self.company.user.full_name()}"
 
@@ -148,5 +289,92 @@ class UserComment(Interact):
 class CompanyComment(Interact):
     content = models.CharField(max_length=255)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['company', 'active']),
+        ]
+
+    def __str__(self):
+        return f"{self.company.user.full_name()} commented on {self.user.full_name()}"
+
+
+class OutboxEmail(ModelBase):
+    STATUS = [
+        (0, 'Pending'),
+        (1, 'Sent'),
+        (2, 'Failed'),
+    ]
+
+    subject = models.CharField(max_length=255)
+    message = models.TextField()
+    from_email = models.CharField(max_length=254, null=True, blank=True)
+    recipient = models.CharField(max_length=254)
+    status = models.IntegerField(choices=STATUS, default=0)
+    attempts = models.IntegerField(default=0)
+    next_attempt = models.DateTimeField(default=timezone.now)
+    last_error = models.TextField(blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'next_attempt']),
+        ]
+
+    def __str__(self):
+        return f"{self.subject} -> {self.recipient}"
+
+
+# Cold copies of inactive recruitments and their applications, moved by archive.archive_recruitments.
+# They keep their original ids so links and exports stay stable, and are read-only from then on.
+class ArchivedRecruitment(models.Model):
+    id = models.BigIntegerField(primary_key=True)
+    created_date = models.DateTimeField()
+    updated_date = models.DateTimeField()
+    active = models.BooleanField(default=False)
+    archived_date = models.DateTimeField(auto_now_add=True)
+
+    title = models.CharField(max_length=255)
+    description = models.TextField()
+    salary = models.DecimalField(max_digits=10, decimal_places=2)
+    date_start = models.DateField()
+    location = models.CharField(max_length=255)
+
+    applicant_count = models.IntegerField(default=0)
+    default_count = models.IntegerField(default=0)
+    rejected_count = models.IntegerField(default=0)
+    interview_count = models.IntegerField(default=0)
+    offer_count = models.IntegerField(default=0)
+    hired_count = models.IntegerField(default=0)
+    cancelled_count = models.IntegerField(default=0)
+    declined_count = models.IntegerField(default=0)
+
+    # foreignKey
+    category = models.ForeignKey(Category, related_name='+', on_delete=models.CASCADE)
+    work_type = models.ForeignKey(WorkType, related_name='+', on_delete=models.CASCADE)
+    company = models.ForeignKey(Company, related_name='archived_recruitments', on_delete=models.CASCADE)
+    province = models.ForeignKey(Province, related_name='+', null=True, blank=True, on_delete=models.SET_NULL)
+
+    def __str__(self):
+        return f"{self.title} (archived)"
+
+
+class ArchivedApply(models.Model):
+    id = models.BigIntegerField(primary_key=True)
+    created_date = models.DateTimeField()
+    updated_date = models.DateTimeField()
+    active = models.BooleanField(default=True)
+    archived_date = models.DateTimeField(auto_now_add=True)
+
+    status = models.IntegerField(choices=Apply.STATUS, default=0)
+
+    # foreignKey
+    resume = models.ForeignKey(Resume, related_name='archived_applies', on_delete=models.CASCADE)
+    recruitment = models.ForeignKey(ArchivedRecruitment, related_name='applies', on_delete=models.CASCADE)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['recruitment', 'active', 'status']),
+            models.Index(fields=['resume', 'active', 'status']),
+        ]
+
     def __str__(self):
-        return f"{self.company.user.full_name()} commented on {self.user.full_name()}"
\ No newline at end of file
+        return f"Application {self.id} (archived)"
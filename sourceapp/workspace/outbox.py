@@ -0,0 +1,101 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.db import transaction
+from django.utils import timezone
+
+from . import models
+
+PENDING, SENT, FAILED = 0, 1, 2
+
+# a claimed batch is hidden from other workers for this long; if the worker dies it becomes due again
+CLAIM_LEASE = timedelta(minutes=5)
+
+
+def enqueue(subject, message, recipients, from_email=None, chunk_size=500):
+    chunk = []
+    count = 0
+    for recipient in recipients:
+        chunk.append(models.OutboxEmail(subject=subject, message=message, from_email=from_email or None,
+                                        recipient=recipient))
+        if len(chunk) >= chunk_size:
+            models.OutboxEmail.objects.bulk_create(chunk)
+            count += len(chunk)
+            chunk = []
+
+    models.OutboxEmail.objects.bulk_create(chunk)
+    return count + len(chunk)
+
+
+def notify_followers(company, from_email=None, chunk_size=500):
+    emails = models.Follow.objects.filter(company=company, active=True) \
+        .exclude(user__email='') \
+        .values_list('user__email', flat=True) \
+        .order_by('id') \
+        .iterator(chunk_size=chunk_size)
+
+    return enqueue(
+        subject='Thông báo từ công ty bạn đang theo dõi',
+        message=f'Công ty {company.name} vừa đăng tin tuyển dụng, hãy xem ngay!',
+        recipients=emails,
+        from_email=from_email,
+        chunk_size=chunk_size,
+    )
+
+
+def claim(batch_size):
+    now = timezone.now()
+    with transaction.atomic():
+        batch = list(models.OutboxEmail.objects.select_for_update(skip_locked=True)
+                     .filter(status=PENDING, next_attempt__lte=now)
+                     .order_by('next_attempt', 'id')[:batch_size])
+        models.OutboxEmail.objects.filter(id__in=[e.id for e in batch]).update(next_attempt=now + CLAIM_LEASE)
+    return batch
+
+
+def retry(email, error, now):
+    email.attempts += 1
+    email.last_error = str(error)
+    if email.attempts >= settings.OUTBOX_MAX_ATTEMPTS:
+        email.status = FAILED
+    else:
+        email.next_attempt = now + timedelta(seconds=settings.OUTBOX_RETRY_DELAY * 2 ** (email.attempts - 1))
+
+
+def deliver(batch_size=None):
+    batch = claim(batch_size or settings.OUTBOX_BATCH_SIZE)
+    if not batch:
+        return 0, 0
+
+    now = timezone.now()
+    connection = get_connection(fail_silently=False)
+    try:
+        connection.open()
+    except Exception as e:
+        for email in batch:
+            retry(email, e, now)
+    else:
+        try:
+            for email in batch:
+                message = EmailMessage(subject=email.subject, body=email.message, from_email=email.from_email,
+                                       to=[email.recipient], connection=connection)
+                try:
+                    message.send()
+                except Exception as e:
+                    retry(email, e, now)
+                else:
+                    email.attempts += 1
+                    email.status = SENT
+                    email.next_attempt = now
+        finally:
+            connection.close()
+
+    for email in batch:
+        email.updated_date = now
+    models.OutboxEmail.objects.bulk_update(
+        batch, ['status', 'attempts', 'next_attempt', 'last_error', 'updated_date']
+    )
+
+    sent = sum(1 for e in batch if e.status == SENT)
+    return sent, len(batch) - sent
@@ -1,17 +1,182 @@
+import base64
+import binascii
+import json
+
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.core.paginator import InvalidPage, Page
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
 from rest_framework.pagination import PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+from . import archive
+
+
+class KeysetPageNumberPagination(PageNumberPagination):
+    # ?page=N keeps working; ?pagination=cursor (first page) or ?cursor=... switches to keyset mode,
+    # which skips the COUNT(*) and seeks past the last row instead of using OFFSET
+    cursor_query_param = 'cursor'
+    mode_query_param = 'pagination'
+    invalid_cursor_message = 'Invalid cursor'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.keyset = self.is_keyset(request)
+        if self.keyset:
+            return self.keyset_page(list(self.keyset_queryset(queryset, request)))
+
+        # a view that already counted the filtered rows (conditional GET) spares the paginator's COUNT(*)
+        count = getattr(view, 'row_count', None)
+        if count is None:
+            return super().paginate_queryset(queryset, request, view)
+        return self.fill_page(list(self.numbered_page(queryset, request, count)))
+
+    async def apaginate_queryset(self, queryset, request, view=None, count=None):
+        # same pages as paginate_queryset, fetched with the async ORM
+        self.keyset = self.is_keyset(request)
+        if self.keyset:
+            return self.keyset_page([row async for row in self.keyset_queryset(queryset, request)])
+
+        if count is None:
+            count = await queryset.acount()
+        return self.fill_page([row async for row in self.numbered_page(queryset, request, count)])
+
+    def numbered_page(self, queryset, request, count):
+        paginator = self.django_paginator_class(queryset, self.page_size)
+        paginator.count = count
+        page_number = self.get_page_number(request, paginator)
+        if page_number in self.last_page_strings:
+            page_number = paginator.num_pages
+
+        try:
+            number = paginator.validate_number(page_number)
+        except InvalidPage as exc:
+            raise NotFound(self.invalid_page_message.format(page_number=page_number, message=str(exc)))
+
+        self.request = request
+        self.page = Page([], number, paginator)
+        bottom = (number - 1) * self.page_size
+        return queryset[bottom:bottom + self.page_size]
+
+    def fill_page(self, rows):
+        self.page.object_list = rows
+        return rows
+
+    def is_keyset(self, request):
+        return self.cursor_query_param in request.query_params \
+            or request.query_params.get(self.mode_query_param) == 'cursor'
+
+    def keyset_queryset(self, queryset, request):
+        self.request = request
+        self.ordering = self.get_ordering(queryset)
+        queryset = queryset.order_by(*self.ordering)
+
+        position = self.decode_cursor(request, queryset.model)
+        if position is not None:
+            queryset = archive.narrow(queryset, self.seek(position))
+        return queryset[:self.page_size + 1]
+
+    def keyset_page(self, rows):
+        self.has_next = len(rows) > self.page_size
+        self.page = rows[:self.page_size]
+        return self.page
 
+    def get_paginated_response(self, data):
+        if not self.keyset:
+            return super().get_paginated_response(data)
 
-class RecruitmentPaginator(PageNumberPagination):
+        return Response({
+            'next': self.get_next_link(),
+            'results': data,
+        })
+
+    def get_next_link(self):
+        if not self.keyset:
+            return super().get_next_link()
+        if not self.has_next:
+            return None
+
+        last = self.page[-1]
+        position = [last[f.lstrip('-')] if isinstance(last, dict) else getattr(last, f.lstrip('-'))
+                    for f in self.ordering]
+        url = remove_query_param(self.request.build_absolute_uri(), self.page_query_param)
+        return replace_query_param(url, self.cursor_query_param, self.encode_cursor(position))
+
+    def get_ordering(self, queryset):
+        ordering = [f for f in queryset.query.order_by if isinstance(f, str)] or ['id']
+        if not {'id', '-id', 'pk', '-pk'} & set(ordering):
+            ordering.append('id')
+        return ordering
+
+    def seek(self, position):
+        # (a, b) > (x, y)  ->  a > x OR (a = x AND b > y), honouring each column's direction
+        condition = Q()
+        equal = {}
+        for field, value in zip(self.ordering, position):
+            name = field.lstrip('-')
+            lookup = 'lt' if field.startswith('-') else 'gt'
+            condition |= Q(**equal, **{f'{name}__{lookup}': value})
+            equal[name] = value
+        return condition
+
+    def encode_cursor(self, position):
+        data = json.dumps(position, cls=DjangoJSONEncoder).encode()
+        return base64.urlsafe_b64encode(data).decode()
+
+    def ordering_field(self, model, name):
+        *path, name = name.split('__')
+        opts = model._meta
+        for part in path:
+            opts = opts.get_field(part).related_model._meta
+        return opts.pk if name == 'pk' else opts.get_field(name)
+
+    def coerce(self, model, position):
+        # well-formed JSON still carries whatever the client put in it: each value must fit its column
+        coerced = []
+        for field, value in zip(self.ordering, position):
+            try:
+                value = self.ordering_field(model, field.lstrip('-')).to_python(value)
+            except FieldDoesNotExist:
+                pass
+            except (TypeError, ValueError, ValidationError):
+                raise NotFound(self.invalid_cursor_message)
+            if value is None or isinstance(value, (list, dict)):
+                raise NotFound(self.invalid_cursor_message)
+            coerced.append(value)
+        return coerced
+
+    def decode_cursor(self, request, model):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+
+        try:
+            position = json.loads(base64.urlsafe_b64decode(encoded.encode()))
+        except (binascii.Error, ValueError):
+            raise NotFound(self.invalid_cursor_message)
+
+        if not isinstance(position, list) or len(position) != len(self.ordering):
+            raise NotFound(self.invalid_cursor_message)
+        return self.coerce(model, position)
+
+
+class RecruitmentPaginator(KeysetPageNumberPagination):
     page_size = 5
 
 
-class ResumePaginator(PageNumberPagination):
+class ResumePaginator(KeysetPageNumberPagination):
     page_size = 7
 
 
-class ApplyPagination(PageNumberPagination):
+class ApplyPagination(KeysetPageNumberPagination):
     page_size = 8
 
 
-class CommentPaginator(PageNumberPagination):
+class CommentPaginator(KeysetPageNumberPagination):
     page_size = 10
+
+
+class RecommendationPaginator(PageNumberPagination):
+    # pages over an already ranked list of ids, so there is nothing to seek on
+    page_size = 5
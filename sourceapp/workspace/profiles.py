@@ -0,0 +1,39 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+from . import serializers
+
+
+def _key(user_id):
+    return f'profile:{user_id}'
+
+
+def build(user):
+    response = serializers.UserSerializer(user).data
+    response['supply'] = bool(user.email and user.avatar and user.phone)
+
+    if user.is_employer():
+        if hasattr(user, 'company'):
+            response['has_company'] = True
+            response['verified'] = user.company.verified
+        else:
+            response['has_company'] = False
+            response['verified'] = False
+    else:
+        response['verified'] = user.resumes.exists()
+
+    return dict(response)
+
+
+def get(user, refresh=False):
+    data = None if refresh else cache.get(_key(user.id))
+    if data is None:
+        data = build(user)
+        cache.set(_key(user.id), data, settings.PROFILE_CACHE_TTL)
+    return data
+
+
+def invalidate(user_id):
+    # after commit, so a concurrent read cannot cache the rows this transaction is replacing
+    transaction.on_commit(lambda: cache.delete(_key(user_id)))
@@ -0,0 +1,171 @@
+import copy
+import threading
+import time
+from datetime import timedelta
+
+import numpy as np
+from django.conf import settings
+from django.utils import timezone
+
+from . import filters, models
+
+# Every active recruitment is a row of one-hot features, one per block. The matrix is kept as the column
+# index of each row's hot feature per block (n x len(BLOCKS) int32) instead of a dense n x features
+# array: for a one-hot M, M @ u is exactly u[codes].sum(axis=1), without the memory of a company block.
+BLOCKS = ['category', 'work_type', 'company', 'province', 'salary']
+BLOCK_WEIGHTS = np.array([3.0, 1.5, 2.0, 2.0, 1.0], dtype=np.float32)
+
+# a follow is a deliberate statement of interest in a company, an application is one data point
+APPLY_WEIGHT = 1.0
+FOLLOW_WEIGHT = 2.0
+
+# id, active, then one value per block (salary last, bucketed)
+VALUES = ['id', 'active', 'category_id', 'work_type_id', 'company_id', 'province_id', 'salary']
+
+# re-read rows touched slightly before the last refresh: app and database clocks drift, rows are idempotent
+OVERLAP = timedelta(seconds=5)
+
+_matrix = None
+_lock = threading.Lock()
+
+
+def salary_bucket(salary):
+    return None if salary is None else int(np.searchsorted(filters.SALARY_BUCKETS, float(salary), side='right'))
+
+
+class FeatureMatrix:
+    def __init__(self):
+        # (block, value) -> column; column 0 is "no value" and never carries weight
+        self.columns = {}
+        self.column_blocks = [0]
+        self.ids = np.zeros(0, dtype=np.int64)
+        self.codes = np.zeros((0, len(BLOCKS)), dtype=np.int32)
+        self.alive = np.zeros(0, dtype=bool)
+        self.rows = {}
+        self.watermark = None
+        self.built = self.checked = time.monotonic()
+
+    def column(self, block, value, create=True):
+        if value is None:
+            return 0
+        key = (block, value)
+        col = self.columns.get(key)
+        if col is None:
+            if not create:
+                return 0
+            col = self.columns[key] = len(self.column_blocks)
+            self.column_blocks.append(BLOCKS.index(block))
+        return col
+
+    def features(self, row, create=True):
+        values = list(row[2:6]) + [salary_bucket(row[6])]
+        return [self.column(block, value, create) for block, value in zip(BLOCKS, values)]
+
+    def copy(self):
+        # refreshes build a new matrix and swap it in, so requests never see a half-applied one
+        matrix = copy.copy(self)
+        matrix.columns = dict(self.columns)
+        matrix.column_blocks = list(self.column_blocks)
+        matrix.codes = self.codes.copy()
+        matrix.alive = self.alive.copy()
+        matrix.rows = dict(self.rows)
+        return matrix
+
+
+def _rebuild():
+    started = timezone.now()
+    matrix = FeatureMatrix()
+    rows = list(models.Recruitment.objects.filter(active=True).order_by().values_list(*VALUES))
+
+    matrix.ids = np.array([row[0] for row in rows], dtype=np.int64)
+    matrix.codes = np.array([matrix.features(row) for row in rows], dtype=np.int32).reshape(-1, len(BLOCKS))
+    matrix.alive = np.ones(len(rows), dtype=bool)
+    matrix.rows = {pk: i for i, pk in enumerate(matrix.ids.tolist())}
+    matrix.watermark = started - OVERLAP
+    return matrix
+
+
+def _refresh(matrix):
+    # only rows saved since the last refresh; deactivated and deleted rows are tombstoned until the next rebuild
+    started = timezone.now()
+    changed = list(models.Recruitment.objects.filter(updated_date__gte=matrix.watermark)
+                   .order_by().values_list(*VALUES))
+
+    matrix = matrix.copy()
+    new_ids, new_codes = [], []
+    for row in changed:
+        i = matrix.rows.get(row[0])
+        if i is not None:
+            matrix.alive[i] = row[1]
+            if row[1]:
+                matrix.codes[i] = matrix.features(row)
+        elif row[1]:
+            matrix.rows[row[0]] = len(matrix.ids) + len(new_ids)
+            new_ids.append(row[0])
+            new_codes.append(matrix.features(row))
+
+    if new_ids:
+        matrix.ids = np.concatenate([matrix.ids, np.array(new_ids, dtype=np.int64)])
+        matrix.codes = np.concatenate([matrix.codes, np.array(new_codes, dtype=np.int32)])
+        matrix.alive = np.concatenate([matrix.alive, np.ones(len(new_ids), dtype=bool)])
+
+    # hard deletes (archive_chunk, cascades) leave no row to pull by updated_date; when the live rows no
+    # longer add up to the table, the ones that are gone are tombstoned
+    active = models.Recruitment.objects.filter(active=True)
+    if matrix.alive.sum() != active.count():
+        present = np.array(list(active.values_list('id', flat=True)), dtype=np.int64)
+        matrix.alive &= np.isin(matrix.ids, present)
+    matrix.watermark = started - OVERLAP
+    matrix.checked = time.monotonic()
+    return matrix
+
+
+def matrix():
+    global _matrix
+    now = time.monotonic()
+    current = _matrix
+    if current is not None and now - current.checked < settings.RECOMMEND_REFRESH_INTERVAL:
+        return current
+
+    with _lock:
+        if _matrix is None or now - _matrix.built >= settings.RECOMMEND_REBUILD_INTERVAL:
+            _matrix = _rebuild()
+        elif now - _matrix.checked >= settings.RECOMMEND_REFRESH_INTERVAL:
+            _matrix = _refresh(_matrix)
+        return _matrix
+
+
+def reset():
+    global _matrix
+    with _lock:
+        _matrix = None
+
+
+def affinity(matrix, user):
+    # the user's history as a feature vector, each block normalised to a distribution scaled by its weight
+    u = np.zeros(len(matrix.column_blocks), dtype=np.float32)
+    fields = [f'recruitment__{name}' for name in VALUES]
+    applied = list(models.Apply.objects.filter(resume__user=user, active=True).values_list(*fields))
+    followed = list(models.Follow.objects.filter(user=user, active=True).values_list('company_id', flat=True))
+
+    for row in applied:
+        np.add.at(u, matrix.features(row, create=False), APPLY_WEIGHT)
+    for company_id in followed:
+        u[matrix.column('company', company_id, create=False)] += FOLLOW_WEIGHT
+    u[0] = 0
+
+    blocks = np.array(matrix.column_blocks)
+    totals = np.bincount(blocks, weights=u, minlength=len(BLOCKS))
+    scale = np.divide(BLOCK_WEIGHTS, totals, out=np.zeros_like(BLOCK_WEIGHTS), where=totals > 0)
+    return u * scale[blocks], [row[0] for row in applied]
+
+
+def recommend(user):
+    # recruitment ids, best first; ties (and users without history) fall back to the newest postings
+    matrix_ = matrix()
+    u, applied = affinity(matrix_, user)
+    scores = u[matrix_.codes].sum(axis=1)
+
+    candidates = matrix_.alive & ~np.isin(matrix_.ids, applied)
+    order = np.lexsort((-matrix_.ids, -scores))
+    return matrix_.ids[order[candidates[order]]].tolist()
@@ -0,0 +1,106 @@
+import asyncio
+import time
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.http import parse_etags
+
+from . import models
+
+TABLES = {
+    'category': models.Category,
+    'work_type': models.WorkType,
+    'province': models.Province,
+}
+
+# name -> {'version', 'loaded', 'rows', 'listing', 'derived'}
+_local = {}
+
+
+def _version_key(name):
+    return f'reference:{name}:version'
+
+
+def version(name):
+    # the counter lives in the shared cache so a bump in one worker invalidates every worker's copy
+    value = cache.get(_version_key(name))
+    if value is None:
+        cache.add(_version_key(name), time.time_ns(), timeout=None)
+        value = cache.get(_version_key(name))
+    return value
+
+
+def bump(name):
+    try:
+        cache.incr(_version_key(name))
+    except ValueError:
+        cache.set(_version_key(name), time.time_ns(), timeout=None)
+
+
+def _in_event_loop():
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return False
+    return True
+
+
+def _entry(name):
+    current = version(name)
+    entry = _local.get(name)
+    if entry is None or entry['version'] != current \
+            or time.monotonic() - entry['loaded'] > settings.REFERENCE_CACHE_TTL:
+        # async views warm the tables first; if they changed since, serve the copy we have
+        # rather than run a blocking query on the event loop
+        if entry is not None and _in_event_loop():
+            return entry
+
+        rows = TABLES[name].objects.order_by('id').values()
+        entry = {
+            'version': current,
+            'loaded': time.monotonic(),
+            'rows': {r['id']: r for r in rows},
+            'listing': None,
+            'derived': {},
+        }
+        _local[name] = entry
+    return entry
+
+
+async def awarm(*names):
+    for name in names:
+        await sync_to_async(_entry)(name)
+
+
+def get(name, pk):
+    return _entry(name)['rows'].get(pk)
+
+
+def get_name(name, pk):
+    row = get(name, pk)
+    return row['name'] if row else None
+
+
+def listing(name, serializer_class):
+    entry = _entry(name)
+    if entry['listing'] is None:
+        active = [r for r in entry['rows'].values() if r['active']]
+        entry['listing'] = serializer_class(active, many=True).data
+    return entry['listing']
+
+
+def derived(name, key, build):
+    # memoize a structure computed from the table rows until the table changes
+    entry = _entry(name)
+    if key not in entry['derived']:
+        entry['derived'][key] = build(entry['rows'].values())
+    return entry['derived'][key]
+
+
+def etag(name):
+    return f'"{name}-{version(name)}"'
+
+
+def not_modified(request, tag):
+    return tag in parse_etags(request.headers.get('If-None-Match', ''))
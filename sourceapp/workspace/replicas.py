@@ -0,0 +1,120 @@
+import hashlib
+import random
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, connections
+
+from . import instrumentation
+
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+# a token issued at login is looked up by the very next request, which carries a new Authorization
+# header and so is not pinned by the login's write
+PRIMARY_APPS = {'oauth2_provider'}
+
+_current = ContextVar('workspace_db_routing', default=None)
+
+
+class Routing:
+    def __init__(self, replica=None):
+        self.replica = replica
+        self.wrote = False
+
+
+def choose_replica():
+    replicas = settings.DATABASE_REPLICAS
+    if not replicas:
+        return None
+    return random.choices(list(replicas), weights=list(replicas.values()))[0]
+
+
+def pin_key(request):
+    # the middleware runs before DRF authenticates, so the client is identified by its credentials
+    auth = request.META.get('HTTP_AUTHORIZATION')
+    if auth:
+        ident = 'auth:' + hashlib.sha256(auth.encode()).hexdigest()
+    elif request.COOKIES.get(settings.SESSION_COOKIE_NAME):
+        ident = 'session:' + request.COOKIES[settings.SESSION_COOKIE_NAME]
+    else:
+        ident = 'ip:' + request.META.get('REMOTE_ADDR', '')
+    return f'replicas:pin:{ident}'
+
+
+class ReplicaRouter:
+    # Reads go to the request's replica only for safe-method requests from clients that have not written
+    # recently, and never inside a transaction (it must see its own writes). Everything else, including
+    # management commands and background threads, stays on the primary.
+    def db_for_read(self, model, **hints):
+        routing = _current.get()
+        if routing is None or routing.replica is None or connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return DEFAULT_DB_ALIAS
+        if model._meta.app_label in PRIMARY_APPS:
+            return DEFAULT_DB_ALIAS
+        return routing.replica
+
+    def db_for_write(self, model, **hints):
+        routing = _current.get()
+        if routing is not None:
+            routing.wrote = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # replicas hold the same rows as the primary
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return False if db in settings.DATABASE_REPLICAS else None
+
+
+class ReplicaMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def routing(self, request, pinned):
+        if request.method not in SAFE_METHODS or not settings.DATABASE_REPLICAS:
+            return Routing()
+        if pinned:
+            instrumentation.incr('db_router.pinned')
+            return Routing()
+
+        replica = choose_replica()
+        instrumentation.incr(f'db_router.replica.{replica}')
+        return Routing(replica)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+
+        key = pin_key(request)
+        pinned = request.method in SAFE_METHODS and settings.DATABASE_REPLICAS and cache.get(key)
+        routing = self.routing(request, pinned)
+        token = _current.set(routing)
+        try:
+            response = self.get_response(request)
+        finally:
+            _current.reset(token)
+
+        if routing.wrote and settings.DATABASE_REPLICAS:
+            cache.set(key, True, settings.REPLICA_PIN_SECONDS)
+        return response
+
+    async def __acall__(self, request):
+        key = pin_key(request)
+        pinned = request.method in SAFE_METHODS and settings.DATABASE_REPLICAS and await cache.aget(key)
+        routing = self.routing(request, pinned)
+        token = _current.set(routing)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _current.reset(token)
+
+        if routing.wrote and settings.DATABASE_REPLICAS:
+            await cache.aset(key, True, settings.REPLICA_PIN_SECONDS)
+        return response
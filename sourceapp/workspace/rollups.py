@@ -0,0 +1,133 @@
+from collections import defaultdict
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Count, F, Sum
+
+from . import models
+
+RECRUITMENT_FIELDS = ['active', 'date_start', 'category_id', 'work_type_id', 'salary']
+
+USERS = 'users'
+COMPANIES = 'companies'
+
+
+def recruitment_snapshot(values):
+    # what a recruitment contributes to the rollups, or None when it is not counted
+    if not values or not values['active']:
+        return None
+
+    return values['date_start'], values['category_id'], values['work_type_id'], values['salary'] or Decimal(0)
+
+
+def _add(model, key, count, salary):
+    updated = model.objects.filter(**key).update(count=F('count') + count, salary_sum=F('salary_sum') + salary)
+    # a missing row on removal means the parent is being deleted along with its rollups
+    if not updated and count > 0:
+        model.objects.get_or_create(**key)
+        model.objects.filter(**key).update(count=F('count') + count, salary_sum=F('salary_sum') + salary)
+
+
+def add_recruitment(snapshot, sign=1):
+    date_start, category_id, work_type_id, salary = snapshot
+    _add(models.CategoryDailyStat, {'date': date_start, 'category_id': category_id}, sign, sign * salary)
+    _add(models.WorkTypeDailyStat, {'date': date_start, 'work_type_id': work_type_id}, sign, sign * salary)
+
+
+def move_recruitment(old, new):
+    if old == new:
+        return
+
+    with transaction.atomic():
+        if old:
+            add_recruitment(old, -1)
+        if new:
+            add_recruitment(new, 1)
+
+
+def remove_recruitments(snapshots):
+    # many recruitments leaving at once: one UPDATE per (day, category) and per (day, work type)
+    categories = defaultdict(lambda: [0, Decimal(0)])
+    work_types = defaultdict(lambda: [0, Decimal(0)])
+    for date_start, category_id, work_type_id, salary in [s for s in snapshots if s]:
+        for totals in (categories[date_start, category_id], work_types[date_start, work_type_id]):
+            totals[0] += 1
+            totals[1] += salary
+
+    with transaction.atomic():
+        for (date_start, category_id), (count, salary) in categories.items():
+            _add(models.CategoryDailyStat, {'date': date_start, 'category_id': category_id}, -count, -salary)
+        for (date_start, work_type_id), (count, salary) in work_types.items():
+            _add(models.WorkTypeDailyStat, {'date': date_start, 'work_type_id': work_type_id}, -count, -salary)
+
+
+def is_counted_user(values):
+    return bool(values) and values['role'] == 0 and not values['is_staff']
+
+
+def incr(name, delta=1):
+    if not delta:
+        return
+
+    if not models.Counter.objects.filter(name=name).update(value=F('value') + delta):
+        models.Counter.objects.get_or_create(name=name)
+        models.Counter.objects.filter(name=name).update(value=F('value') + delta)
+
+
+def counter(name):
+    return models.Counter.objects.filter(name=name).values_list('value', flat=True).first() or 0
+
+
+def stats(start_date=None, end_date=None):
+    category_stats = models.CategoryDailyStat.objects.all()
+    work_type_stats = models.WorkTypeDailyStat.objects.all()
+    if start_date:
+        category_stats = category_stats.filter(date__gte=start_date)
+        work_type_stats = work_type_stats.filter(date__gte=start_date)
+    if end_date:
+        category_stats = category_stats.filter(date__lte=end_date)
+        work_type_stats = work_type_stats.filter(date__lte=end_date)
+
+    category_stats = category_stats.values(name=F('category__name')) \
+        .annotate(cate_count=Sum('count'), salary_sum=Sum('salary_sum')) \
+        .filter(cate_count__gt=0) \
+        .order_by('name')
+
+    work_type_stats = work_type_stats.values(name=F('work_type__name')) \
+        .annotate(job_count=Sum('count')) \
+        .filter(job_count__gt=0) \
+        .order_by('name')
+
+    recruitment_stats = [
+        {'name': item['name'], 'cate_count': item['cate_count'],
+         'avg_salary': float(item['salary_sum'] / item['cate_count'])}
+        for item in category_stats
+    ]
+
+    return recruitment_stats, list(work_type_stats)
+
+
+@transaction.atomic
+def rebuild():
+    models.CategoryDailyStat.objects.all().delete()
+    models.WorkTypeDailyStat.objects.all().delete()
+
+    recruitments = models.Recruitment.objects.filter(active=True)
+    models.CategoryDailyStat.objects.bulk_create([
+        models.CategoryDailyStat(date=row['date_start'], category_id=row['category_id'],
+                                 count=row['count'], salary_sum=row['salary_sum'])
+        for row in recruitments.values('date_start', 'category_id')
+        .annotate(count=Count('id'), salary_sum=Sum('salary')).order_by()
+    ], batch_size=1000)
+    models.WorkTypeDailyStat.objects.bulk_create([
+        models.WorkTypeDailyStat(date=row['date_start'], work_type_id=row['work_type_id'],
+                                 count=row['count'], salary_sum=row['salary_sum'])
+        for row in recruitments.values('date_start', 'work_type_id')
+        .annotate(count=Count('id'), salary_sum=Sum('salary')).order_by()
+    ], batch_size=1000)
+
+    for name, value in (
+        (USERS, models.User.objects.filter(role=0, is_staff=False).count()),
+        (COMPANIES, models.Company.objects.count()),
+    ):
+        models.Counter.objects.update_or_create(name=name, defaults={'value': value})
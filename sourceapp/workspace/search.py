@@ -0,0 +1,97 @@
+import re
+import unicodedata
+from collections import Counter
+
+from django.db.models import OuterRef, Q, Subquery, Sum
+
+from . import models
+
+FIELD_WEIGHTS = {
+    'title': 8,
+    'company': 4,
+    'category': 3,
+    'location': 2,
+    'description': 1,
+}
+
+KEY_FIELDS = ['title', 'description', 'company', 'category']
+
+TERM_LENGTH = 50
+
+_TOKEN_RE = re.compile(r'[a-z0-9]+')
+
+
+def normalize(text):
+    # "Hồ Chí Minh" -> "ho chi minh"; đ has no combining form so it is mapped by hand
+    text = unicodedata.normalize('NFD', text or '').lower().replace('đ', 'd')
+    return ''.join(c for c in text if unicodedata.category(c) != 'Mn')
+
+
+def tokenize(text):
+    return [t[:TERM_LENGTH] for t in _TOKEN_RE.findall(normalize(text))]
+
+
+def build_terms(recruitment):
+    sources = {
+        'title': recruitment.title,
+        'description': recruitment.description,
+        'company': recruitment.company.name,
+        'category': recruitment.category.name,
+        'location': recruitment.location,
+    }
+
+    terms = []
+    for field, text in sources.items():
+        for term, count in Counter(tokenize(text)).items():
+            terms.append(models.RecruitmentTerm(recruitment_id=recruitment.id, field=field, term=term,
+                                                weight=count * FIELD_WEIGHTS[field]))
+    return terms
+
+
+def index(recruitment):
+    models.RecruitmentTerm.objects.filter(recruitment_id=recruitment.id).delete()
+    if recruitment.active:
+        models.RecruitmentTerm.objects.bulk_create(build_terms(recruitment))
+
+
+def index_many(recruitments, chunk_size=500):
+    recruitments = recruitments.select_related('company', 'category').order_by('id')
+
+    last_id = 0
+    while True:
+        chunk = list(recruitments.filter(id__gt=last_id)[:chunk_size])
+        if not chunk:
+            break
+
+        ids = [r.id for r in chunk]
+        models.RecruitmentTerm.objects.filter(recruitment_id__in=ids).delete()
+        models.RecruitmentTerm.objects.bulk_create(
+            [t for r in chunk if r.active for t in build_terms(r)], batch_size=chunk_size
+        )
+        last_id = ids[-1]
+
+
+def _terms(tokens, fields):
+    matched = Q()
+    for token in tokens:
+        matched |= Q(term__startswith=token)
+    return models.RecruitmentTerm.objects.filter(matched, field__in=fields)
+
+
+def match(queryset, text, fields=None):
+    fields = fields or KEY_FIELDS
+    for token in set(tokenize(text)):
+        queryset = queryset.filter(id__in=_terms([token], fields).values('recruitment_id'))
+    return queryset
+
+
+def search(queryset, text, fields=None):
+    fields = fields or KEY_FIELDS
+    tokens = set(tokenize(text))
+    if not tokens:
+        return queryset
+
+    rank = _terms(tokens, fields).filter(recruitment=OuterRef('pk')) \
+        .values('recruitment').annotate(total=Sum('weight')).values('total')
+
+    return match(queryset, text, fields).annotate(rank=Subquery(rank)).order_by('-rank', 'id')
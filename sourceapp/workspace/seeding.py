@@ -0,0 +1,109 @@
+import random
+import uuid
+from datetime import date, timedelta
+
+from django.db import connection
+
+from . import counters, expiry, locations, models, rollups, search
+
+LOCATIONS = ['Hà Nội', 'TP. Hồ Chí Minh', 'Đà Nẵng', 'Cần Thơ', 'Hải Phòng', 'Bình Dương', 'Quận 1, Sài Gòn']
+TITLES = ['Lập trình viên Python', 'Kế toán tổng hợp', 'Nhân viên kinh doanh', 'Thiết kế đồ họa',
+          'Chăm sóc khách hàng', 'Kỹ sư cầu nối', 'Quản lý dự án', 'Giáo viên tiếng Anh']
+AVATAR = 'image/upload/v1/seed/avatar.jpg'
+CV = 'image/upload/v1/seed/cv.pdf'
+
+
+def _bulk_create(model, objs, refetch, batch_size):
+    # MySQL cannot return ids from a bulk INSERT, so read the rows back in insertion order
+    created = model.objects.bulk_create(objs, batch_size=batch_size)
+    if connection.features.can_return_rows_from_bulk_insert:
+        return created
+    return list(refetch.order_by('id'))
+
+
+def seed(recruitments=100, companies=None, candidates=None, applies=None, follows=None, comments=None,
+         batch_size=1000, rng=None):
+    rng = rng or random.Random(0)
+    companies = companies or max(1, recruitments // 10)
+    candidates = candidates or max(1, recruitments // 2)
+    applies = recruitments * 3 if applies is None else applies
+    follows = candidates * 3 if follows is None else follows
+    comments = recruitments if comments is None else comments
+    prefix = uuid.uuid4().hex[:8]
+
+    categories = [models.Category.objects.get_or_create(name=f'Ngành {i}', defaults={'description': ''})[0]
+                  for i in range(10)]
+    work_types = [models.WorkType.objects.get_or_create(name=name)[0]
+                  for name in ['Toàn thời gian', 'Bán thời gian', 'Thực tập', 'Từ xa']]
+    provinces = {loc: locations.resolve(loc) for loc in LOCATIONS}
+
+    employers = _bulk_create(models.User, [
+        models.User(username=f'{prefix}-employer{i}', email=f'{prefix}-employer{i}@seed.test', role=1,
+                    phone='0900000000', avatar=AVATAR)
+        for i in range(companies)
+    ], models.User.objects.filter(username__startswith=f'{prefix}-employer'), batch_size)
+    users = _bulk_create(models.User, [
+        models.User(username=f'{prefix}-candidate{i}', email=f'{prefix}-candidate{i}@seed.test',
+                    first_name='Ứng', last_name=f'Viên {i}', phone='0910000000', avatar=AVATAR)
+        for i in range(candidates)
+    ], models.User.objects.filter(username__startswith=f'{prefix}-candidate'), batch_size)
+
+    company_rows = _bulk_create(models.Company, [
+        models.Company(name=f'Công ty {prefix} {i}', code=f'{prefix}{i}', user=u, verified=i % 2 == 0)
+        for i, u in enumerate(employers)
+    ], models.Company.objects.filter(code__startswith=prefix), batch_size)
+    models.CompanyImage.objects.bulk_create([
+        models.CompanyImage(company=c, image=AVATAR) for c in company_rows
+    ], batch_size=batch_size)
+
+    resumes = _bulk_create(models.Resume, [
+        models.Resume(name=f'CV {prefix}', user=u, cv=CV) for u in users
+    ], models.Resume.objects.filter(name=f'CV {prefix}'), batch_size)
+
+    recruitment_objs = []
+    for i in range(recruitments):
+        location = rng.choice(LOCATIONS)
+        date_start = date(2025, 1, 1) + timedelta(days=rng.randrange(365))
+        recruitment_objs.append(models.Recruitment(
+            title=f'{rng.choice(TITLES)} {i}', description='Mô tả công việc ' * 10,
+            salary=rng.randrange(5, 60) * 1000000, date_start=date_start, deadline=expiry.default_deadline(date_start),
+            location=location, province_id=provinces[location], category=rng.choice(categories),
+            work_type=rng.choice(work_types), company=rng.choice(company_rows), active=rng.random() > 0.1,
+        ))
+    recruitment_rows = _bulk_create(models.Recruitment, recruitment_objs,
+                                    models.Recruitment.objects.filter(company__code__startswith=prefix), batch_size)
+
+    pairs = {(rng.randrange(len(resumes)), rng.randrange(len(recruitment_rows))) for _ in range(applies)}
+    models.Apply.objects.bulk_create([
+        models.Apply(resume=resumes[r], recruitment=recruitment_rows[j], status=rng.randrange(7))
+        for r, j in pairs
+    ], batch_size=batch_size)
+
+    follow_pairs = {(rng.randrange(len(users)), rng.randrange(len(company_rows))) for _ in range(follows)}
+    models.Follow.objects.bulk_create([
+        models.Follow(user=users[u], company=company_rows[c]) for u, c in follow_pairs
+    ], batch_size=batch_size)
+
+    models.UserComment.objects.bulk_create([
+        models.UserComment(user=rng.choice(users), company=rng.choice(company_rows), content='Ứng viên tốt')
+        for _ in range(comments)
+    ], batch_size=batch_size)
+    models.CompanyComment.objects.bulk_create([
+        models.CompanyComment(user=rng.choice(users), company=rng.choice(company_rows), content='Công ty tốt')
+        for _ in range(comments)
+    ], batch_size=batch_size)
+
+    # bulk_create skips the signals that maintain these
+    search.index_many(models.Recruitment.objects.filter(company__code__startswith=prefix, active=True))
+    rollups.rebuild()
+    counters.reconcile()
+
+    return {
+        'employers': employers,
+        'candidates': users,
+        'companies': company_rows,
+        'resumes': resumes,
+        'recruitments': recruitment_rows,
+        'categories': categories,
+        'work_types': work_types,
+    }
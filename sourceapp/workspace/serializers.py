@@ -1,5 +1,14 @@
-from rest_framework.serializers import ModelSerializer, ValidationError, CharField
-from . import models
+from rest_framework import serializers
+from rest_framework.serializers import ValidationError, CharField, DateTimeField, IntegerField, SerializerMethodField
+from . import models, media, reference, instrumentation, uploads, counters, expiry
+
+
+class ModelSerializer(instrumentation.SerializerTimingMixin, serializers.ModelSerializer):
+    pass
+
+
+class Serializer(instrumentation.SerializerTimingMixin, serializers.Serializer):
+    pass
 
 
 class CategorySerializer(ModelSerializer):
@@ -22,7 +31,7 @@ class ResumeSerializer(ModelSerializer):
 
     def to_representation(self, instance):
         data = super().to_representation(instance)
-        data['cv'] = instance.cv.url if instance.cv else ''
+        data['cv'] = media.url(instance.cv)
         return data
 
     def validate(self, attrs):
@@ -41,7 +50,7 @@ class ResumeSerializer(ModelSerializer):
 class CompanyImageSerializer(ModelSerializer):
     def to_representation(self, instance):
         data = super().to_representation(instance)
-        data['image'] = instance.image.url if instance.image else ''
+        data['image'] = media.url(instance.image)
         return data
 
     class Meta:
@@ -62,26 +71,54 @@ class CompanySerializer(ModelSerializer):
             if key.startswith('images')
         ]
 
-        for image in image_files:
-            models.CompanyImage.objects.create(company=company, image=image)
+        if uploads.is_deferred(request):
+            uploads.defer_company_images(company, image_files)
+        else:
+            uploads.save_company_images(company, image_files)
 
         return company
 
     class Meta:
         model = models.Company
-        fields = ['id', 'name', 'code', 'verified', 'images']
+        fields = ['id', 'name', 'code', 'verified', 'images'] + counters.COMPANY_FIELDS
+        read_only_fields = counters.COMPANY_FIELDS
 
 
 class RecruitmentSerializer(ModelSerializer):
     company_name = CharField(source='company.name', read_only=True)
-    category_name = CharField(source='category.name', read_only=True)
-    work_type_name = CharField(source='work_type.name', read_only=True)
+    category_name = SerializerMethodField()
+    work_type_name = SerializerMethodField()
+    province_name = SerializerMethodField()
+
+    def get_category_name(self, obj):
+        return reference.get_name('category', obj.category_id)
+
+    def get_work_type_name(self, obj):
+        return reference.get_name('work_type', obj.work_type_id)
+
+    def get_province_name(self, obj):
+        return reference.get_name('province', obj.province_id)
+
+    def validate(self, attrs):
+        date_start = attrs.get('date_start', getattr(self.instance, 'date_start', None))
+        deadline = attrs.get('deadline')
+        # a stored default deadline moves with the start date (see signals); a chosen one has to fit it
+        if 'deadline' not in attrs and self.instance is not None and self.instance.deadline \
+                and self.instance.deadline != expiry.default_deadline(self.instance.date_start):
+            deadline = self.instance.deadline
+        if deadline and date_start and deadline < date_start:
+            raise ValidationError({'deadline': 'Hạn nộp không được trước ngày bắt đầu.'})
+        return attrs
 
     class Meta:
         model = models.Recruitment
         fields = ['id', 'title', 'description', 'salary', 'company_name',
                   'category_name', 'work_type_name', 'location', 'company',
-                  'category', 'work_type', 'date_start']
+                  'category', 'work_type', 'date_start', 'deadline', 'province', 'province_name'] + counters.RECRUITMENT_FIELDS
+        read_only_fields = counters.RECRUITMENT_FIELDS
+        extra_kwargs = {
+            'province': {'read_only': True}
+        }
 
 
 class ApplySerializer(ModelSerializer):
@@ -90,6 +127,71 @@ class ApplySerializer(ModelSerializer):
         fields = ['id', 'resume', 'recruitment', 'status', 'created_date']
 
 
+class ApplyRowSerializer(Serializer):
+    # read-only serializers over Apply.objects.values(*projection) rows, one joined query per page
+    projection = ['id', 'resume_id', 'recruitment_id', 'status', 'created_date']
+
+    id = IntegerField()
+    resume = IntegerField(source='resume_id')
+    recruitment = IntegerField(source='recruitment_id')
+    status = IntegerField()
+    created_date = DateTimeField()
+
+
+def _full_name(row):
+    return f"{row['resume__user__first_name']} {row['resume__user__last_name']}".strip()
+
+
+class CandidateApplySerializer(ApplyRowSerializer):
+    projection = ApplyRowSerializer.projection + [
+        'resume__user_id', 'resume__user__first_name', 'resume__user__last_name', 'resume__user__email',
+        'resume__user__avatar', 'resume__name', 'resume__cv',
+    ]
+
+    user_id = IntegerField(source='resume__user_id')
+    user_name = SerializerMethodField()
+    user_email = CharField(source='resume__user__email')
+    user_avatar = SerializerMethodField()
+    resume_detail = SerializerMethodField()
+
+    def get_user_name(self, row):
+        return _full_name(row)
+
+    def get_user_avatar(self, row):
+        return media.url(row['resume__user__avatar'])
+
+    def get_resume_detail(self, row):
+        return {'id': row['resume_id'], 'name': row['resume__name'], 'cv': media.url(row['resume__cv'])}
+
+
+class EmployeeApplySerializer(ApplyRowSerializer):
+    projection = ApplyRowSerializer.projection + [
+        'resume__user_id', 'resume__user__first_name', 'resume__user__last_name', 'resume__user__avatar',
+        'recruitment__title',
+    ]
+
+    user_id = IntegerField(source='resume__user_id')
+    user_name = SerializerMethodField()
+    user_avatar = SerializerMethodField()
+    work = CharField(source='recruitment__title')
+
+    def get_user_name(self, row):
+        return _full_name(row)
+
+    def get_user_avatar(self, row):
+        return media.url(row['resume__user__avatar'])
+
+
+class MyApplySerializer(ApplyRowSerializer):
+    projection = ApplyRowSerializer.projection + [
+        'recruitment__title', 'recruitment__company_id', 'recruitment__company__name',
+    ]
+
+    work = CharField(source='recruitment__title')
+    company_id = IntegerField(source='recruitment__company_id')
+    company_name = CharField(source='recruitment__company__name')
+
+
 class FollowSerializer(ModelSerializer):
     company_name = CharField(source='company.name', read_only=True)
 
@@ -105,7 +207,7 @@ class FollowSerializer(ModelSerializer):
 class UserSerializer(ModelSerializer):
     def to_representation(self, instance):
         data = super().to_representation(instance)
-        data['avatar'] = instance.avatar.url if instance.avatar else ''
+        data['avatar'] = media.url(instance.avatar)
         return data
 
     def create(self, validated_data):
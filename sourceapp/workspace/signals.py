@@ -0,0 +1,186 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from . import counters, expiry, locations, models, profiles, reference, rollups, search
+
+
+def _previous(sender, instance, fields):
+    if instance.pk is None:
+        return None
+    return sender.objects.filter(pk=instance.pk).values(*fields).first()
+
+
+def _current(instance, fields):
+    # the values as stored: a view may have assigned '0' or 'False' straight from the request
+    return {f: instance._meta.get_field(f).to_python(getattr(instance, f)) for f in fields}
+
+
+@receiver(post_save, sender=models.Recruitment)
+def index_recruitment(sender, instance, **kwargs):
+    search.index(instance)
+
+
+def _renamed(instance):
+    # update_fields cannot tell: CounterFieldsMixin lists every field on a plain save
+    previous = getattr(instance, '_previous', None)
+    return previous is not None and previous['name'] != instance.name
+
+
+@receiver(pre_save, sender=models.Company)
+@receiver(pre_save, sender=models.Category)
+def remember_name(sender, instance, **kwargs):
+    instance._previous = _previous(sender, instance, ['name'])
+
+
+@receiver(post_save, sender=models.Company)
+def index_company_recruitments(sender, instance, created, **kwargs):
+    if not created and _renamed(instance):
+        search.index_many(models.Recruitment.objects.filter(company=instance, active=True))
+
+
+@receiver(post_save, sender=models.Category)
+def index_category_recruitments(sender, instance, created, **kwargs):
+    if not created and _renamed(instance):
+        search.index_many(models.Recruitment.objects.filter(category=instance, active=True))
+
+
+# bumped once the write is committed: a bump inside the transaction lets another worker cache the old rows
+# under the new version, and would invalidate for nothing if the write rolls back
+@receiver(post_save, sender=models.Category)
+@receiver(post_delete, sender=models.Category)
+def bump_category_version(sender, **kwargs):
+    transaction.on_commit(lambda: reference.bump('category'))
+
+
+@receiver(post_save, sender=models.WorkType)
+@receiver(post_delete, sender=models.WorkType)
+def bump_work_type_version(sender, **kwargs):
+    transaction.on_commit(lambda: reference.bump('work_type'))
+
+
+@receiver(post_save, sender=models.Province)
+@receiver(post_delete, sender=models.Province)
+def bump_province_version(sender, **kwargs):
+    transaction.on_commit(lambda: reference.bump('province'))
+
+
+@receiver(pre_save, sender=models.Recruitment)
+def remember_recruitment(sender, instance, **kwargs):
+    instance._previous = _previous(sender, instance, rollups.RECRUITMENT_FIELDS + ['location', 'deadline'])
+
+    previous_location = instance._previous['location'] if instance._previous else None
+    if instance.province_id is None or instance.location != previous_location:
+        instance.province_id = locations.resolve(instance.location)
+
+    if not sender._meta.get_field('active').to_python(instance.active):
+        if instance._previous is None or instance._previous['active']:
+            instance.deactivated_date = timezone.now()
+    else:
+        instance.deactivated_date = None
+
+    # a default deadline follows a moved start date; one the employer picked is left alone
+    date_start = sender._meta.get_field('date_start').to_python(instance.date_start)
+    deadline = sender._meta.get_field('deadline').to_python(instance.deadline)
+    previous = instance._previous
+    if date_start and (deadline is None or previous and date_start != previous['date_start']
+                       and deadline == previous['deadline'] == expiry.default_deadline(previous['date_start'])):
+        instance.deadline = expiry.default_deadline(date_start)
+
+
+@receiver(post_save, sender=models.Recruitment)
+def update_recruitment_rollups(sender, instance, **kwargs):
+    rollups.move_recruitment(
+        rollups.recruitment_snapshot(getattr(instance, '_previous', None)),
+        rollups.recruitment_snapshot(_current(instance, rollups.RECRUITMENT_FIELDS)),
+    )
+
+
+@receiver(post_delete, sender=models.Recruitment)
+def remove_recruitment_rollups(sender, instance, **kwargs):
+    rollups.move_recruitment(rollups.recruitment_snapshot(_current(instance, rollups.RECRUITMENT_FIELDS)), None)
+
+
+@receiver(pre_save, sender=models.User)
+def remember_user(sender, instance, **kwargs):
+    instance._previous = _previous(sender, instance, ['role', 'is_staff'])
+
+
+@receiver(post_save, sender=models.User)
+def count_user(sender, instance, **kwargs):
+    counted = rollups.is_counted_user(_current(instance, ['role', 'is_staff']))
+    rollups.incr(rollups.USERS, counted - rollups.is_counted_user(getattr(instance, '_previous', None)))
+
+
+@receiver(post_delete, sender=models.User)
+def uncount_user(sender, instance, **kwargs):
+    rollups.incr(rollups.USERS, -rollups.is_counted_user(_current(instance, ['role', 'is_staff'])))
+
+
+@receiver(post_save, sender=models.Company)
+def count_company(sender, instance, created, **kwargs):
+    if created:
+        rollups.incr(rollups.COMPANIES)
+
+
+@receiver(post_delete, sender=models.Company)
+def uncount_company(sender, instance, **kwargs):
+    rollups.incr(rollups.COMPANIES, -1)
+
+
+@receiver(post_save, sender=models.User)
+@receiver(post_delete, sender=models.User)
+def invalidate_user_profile(sender, instance, **kwargs):
+    profiles.invalidate(instance.id)
+
+
+@receiver(post_save, sender=models.Company)
+@receiver(post_delete, sender=models.Company)
+@receiver(post_save, sender=models.Resume)
+@receiver(post_delete, sender=models.Resume)
+def invalidate_owner_profile(sender, instance, **kwargs):
+    profiles.invalidate(instance.user_id)
+
+
+@receiver(pre_save, sender=models.Apply)
+def remember_apply(sender, instance, **kwargs):
+    instance._previous = _previous(sender, instance, counters.APPLY_FIELDS)
+
+
+@receiver(post_save, sender=models.Apply)
+def count_apply(sender, instance, **kwargs):
+    counters.move_applies([(
+        counters.apply_snapshot(getattr(instance, '_previous', None)),
+        counters.apply_snapshot(_current(instance, counters.APPLY_FIELDS)),
+    )])
+
+
+@receiver(post_delete, sender=models.Apply)
+def uncount_apply(sender, instance, **kwargs):
+    counters.move_applies([(counters.apply_snapshot(_current(instance, counters.APPLY_FIELDS)), None)])
+
+
+@receiver(post_delete, sender=models.ArchivedApply)
+def uncount_archived_apply(sender, instance, **kwargs):
+    # archived rows only ever go away with their resume, recruitment or company
+    if instance.active and instance.status == counters.HIRED:
+        counters.remove_archived_hire(instance.recruitment_id)
+
+
+@receiver(pre_save, sender=models.Follow)
+def remember_follow(sender, instance, **kwargs):
+    instance._previous = _previous(sender, instance, counters.FOLLOW_FIELDS)
+
+
+@receiver(post_save, sender=models.Follow)
+def count_follow(sender, instance, **kwargs):
+    counters.move_follow(
+        counters.follow_snapshot(getattr(instance, '_previous', None)),
+        counters.follow_snapshot(_current(instance, counters.FOLLOW_FIELDS)),
+    )
+
+
+@receiver(post_delete, sender=models.Follow)
+def uncount_follow(sender, instance, **kwargs):
+    counters.move_follow(counters.follow_snapshot(_current(instance, counters.FOLLOW_FIELDS)), None)
@@ -1,3 +1,1420 @@
-from django.test import TestCase
+import base64
+import csv
+import importlib
+import io
+import json
+import os
+import statistics
+import threading
+import time
+import uuid
+from datetime import date, timedelta
+from unittest import mock, skipIf
 
-# Create your tests here.
+from asgiref.sync import sync_to_async
+from cloudinary import CloudinaryResource
+from django.apps import apps as django_apps
+from django.core import mail
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import connection, transaction
+from django.db.models import QuerySet
+from django.http import HttpResponse
+from django.test import AsyncClient, RequestFactory, SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from django.utils.http import http_date
+from oauth2_provider.models import AccessToken, Application
+from rest_framework.test import APIClient
+
+from . import archive, counters, expiry, exports, instrumentation, locations, media, models, outbox, profiles, \
+    recommend, reference, replicas, rollups, search, seeding, serializers, throttles, views
+from .backends.mysql_pool.base import DatabaseWrapper
+from .backends.mysql_pool.pool import ConnectionPool, PoolTimeout
+
+
+class WorkspaceTestCase(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.employer = models.User.objects.create_user('employer', password='x', role=1, email='employer@test.com')
+        cls.candidate = models.User.objects.create_user('candidate', password='x', email='candidate@test.com')
+        cls.company = models.Company.objects.create(name='Công ty Đông Á', code='DA', user=cls.employer)
+        cls.category = models.Category.objects.create(name='Công nghệ thông tin', description='IT')
+        cls.work_type = models.WorkType.objects.create(name='Toàn thời gian')
+        cls.resume = models.Resume.objects.create(name='CV', user=cls.candidate)
+
+        cls.recruitments = [
+            models.Recruitment.objects.create(
+                title=f'Lập trình viên {i}', description='Python Django', salary=1000 + i,
+                date_start=date(2025, 1, 1 + i), location='Hồ Chí Minh',
+                category=cls.category, work_type=cls.work_type, company=cls.company
+            ) for i in range(5)
+        ]
+        cls.applies = [
+            models.Apply.objects.create(resume=cls.resume, recruitment=r, status=i % 5)
+            for i, r in enumerate(cls.recruitments)
+        ]
+        models.Follow.objects.create(user=cls.candidate, company=cls.company)
+        models.UserComment.objects.create(user=cls.candidate, company=cls.company, content='Tốt')
+        models.CompanyComment.objects.create(user=cls.candidate, company=cls.company, content='Tốt')
+
+    def setUp(self):
+        self.client = APIClient()
+
+
+class IndexUsageTests(WorkspaceTestCase):
+    # small reference tables (category, company, ...) may legitimately be scanned as the outer loop of a join
+    HOT_TABLES = ['workspace_recruitment', 'workspace_apply', 'workspace_follow',
+                  'workspace_usercomment', 'workspace_companycomment']
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+
+        # spread rows over many parents so the planner statistics look like production, not like a toy table
+        employers = models.User.objects.bulk_create([
+            models.User(username=f'employer{i}', role=1) for i in range(20)
+        ])
+        candidates = models.User.objects.bulk_create([models.User(username=f'candidate{i}') for i in range(30)])
+        companies = models.Company.objects.bulk_create([
+            models.Company(name=f'Company {i}', code=f'C{i}', user=u) for i, u in enumerate(employers)
+        ])
+        categories = models.Category.objects.bulk_create([
+            models.Category(name=f'Category {i}', description='') for i in range(10)
+        ])
+        work_types = models.WorkType.objects.bulk_create([models.WorkType(name=f'Work type {i}') for i in range(5)])
+        resumes = models.Resume.objects.bulk_create([models.Resume(name='CV', user=u) for u in candidates])
+
+        recruitments = models.Recruitment.objects.bulk_create([
+            models.Recruitment(
+                title=f'Tin {i}', description='', salary=500, date_start=date(2024, 1, 1) + timedelta(days=i),
+                location='Hà Nội', category=categories[i % 10], work_type=work_types[i % 5],
+                company=companies[i % 20], active=i % 3 != 0
+            ) for i in range(400)
+        ])
+        models.Apply.objects.bulk_create([
+            models.Apply(resume=resumes[i % 30], recruitment=recruitments[i % 400], status=i % 7, active=i % 4 != 0)
+            for i in range(800)
+        ])
+        models.Follow.objects.bulk_create([
+            models.Follow(user=u, company=companies[(i + j) % 20])
+            for i, u in enumerate(candidates) for j in range(3)
+        ])
+        models.UserComment.objects.bulk_create([
+            models.UserComment(user=candidates[i % 30], company=companies[i % 20], content='') for i in range(100)
+        ])
+        models.CompanyComment.objects.bulk_create([
+            models.CompanyComment(user=candidates[i % 30], company=companies[i % 20], content='') for i in range(100)
+        ])
+
+        with connection.cursor() as cursor:
+            if connection.vendor == 'sqlite':
+                cursor.execute('ANALYZE')
+            else:
+                cursor.execute('ANALYZE TABLE ' + ', '.join(cls.HOT_TABLES))
+
+    def full_scans(self, sql):
+        with connection.cursor() as cursor:
+            if connection.vendor == 'sqlite':
+                cursor.execute('EXPLAIN QUERY PLAN ' + sql)
+                details = [row[3] for row in cursor.fetchall()]
+                return [d for d in details if d.split(' ')[:2] in (['SCAN', t] for t in self.HOT_TABLES)]
+
+            cursor.execute('EXPLAIN ' + sql)
+            columns = [c[0] for c in cursor.description]
+            rows = [dict(zip(columns, row)) for row in cursor.fetchall()]
+            return [row['table'] for row in rows if row['type'] == 'ALL' and row['table'] in self.HOT_TABLES]
+
+    def assertIndexed(self, url, user=None):
+        self.client.force_authenticate(user)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200, url)
+
+        for query in queries:
+            sql = query['sql']
+            if sql.startswith('SELECT'):
+                self.assertEqual(self.full_scans(sql), [], f'{url}: {sql}')
+
+    def test_recruitment_filters(self):
+        self.assertIndexed(f'/recruitments/?company_id={self.company.id}')
+        self.assertIndexed(f'/recruitments/?category_id={self.category.id}')
+        self.assertIndexed(f'/recruitments/?work_type_id={self.work_type.id}')
+        self.assertIndexed('/recruitments/?province=TP. Hà Nội')
+
+    # without STAT4 range statistics SQLite always prefers walking the rowid for "ORDER BY id LIMIT n"
+    @skipIf(connection.vendor == 'sqlite', 'SQLite cannot estimate range selectivity')
+    def test_recruitment_date_filter(self):
+        self.assertIndexed('/recruitments/?date_start=2025-01-25')
+
+    def test_apply_listings(self):
+        self.assertIndexed(f'/applies/candidate/{self.recruitments[0].id}/', self.employer)
+        self.assertIndexed(f'/applies/employee/{self.company.id}/', self.employer)
+        self.assertIndexed('/applies/mine/', self.candidate)
+
+    def test_follows_and_comments(self):
+        self.assertIndexed('/follows/', self.candidate)
+        self.assertIndexed(f'/user-comments/?user_id={self.candidate.id}', self.candidate)
+        self.assertIndexed(f'/company-comments/?company_id={self.company.id}', self.candidate)
+
+
+class SearchTests(WorkspaceTestCase):
+    def create(self, title, description=''):
+        return models.Recruitment.objects.create(
+            title=title, description=description, salary=1000, date_start=date(2025, 1, 1), location='Hà Nội',
+            category=self.category, work_type=self.work_type, company=self.company
+        )
+
+    def test_matches_without_diacritics(self):
+        top = self.create('Lập trình viên lập trình Java')
+        described = self.create('Kỹ sư phần mềm', 'Cần người lập trình')
+        self.create('Kế toán', 'Sổ sách')
+
+        found = search.search(models.Recruitment.objects.filter(active=True), 'lap trinh')
+        self.assertEqual([r.id for r in found], [top.id] + [r.id for r in self.recruitments] + [described.id])
+
+        response = self.client.get('/recruitments/', {'key': 'LẬP TRÌNH'})
+        self.assertEqual([r['id'] for r in response.json()['results']],
+                         [top.id] + [r.id for r in self.recruitments[:4]])
+
+    def test_every_word_must_match(self):
+        self.create('Lập trình viên', 'Java')
+        response = self.client.get('/recruitments/', {'key': 'lap trinh django'})
+        self.assertEqual(response.json()['count'], 5)
+
+    def test_reindexed_only_on_rename(self):
+        for instance in (self.company, self.category):
+            with CaptureQueriesContext(connection) as queries:
+                instance.save()
+            self.assertFalse([q for q in queries if 'workspace_recruitment' in q['sql']], instance)
+
+        self.company.verified = True
+        self.company.save()
+        self.assertEqual(len(search.search(models.Recruitment.objects.all(), 'ten moi')), 0)
+
+        self.company.name = 'Tên mới'
+        self.company.save()
+        self.category.name = 'Ngành mới'
+        self.category.save()
+        self.assertEqual(len(search.search(models.Recruitment.objects.all(), 'ten moi')), 5)
+        self.assertEqual(len(search.search(models.Recruitment.objects.all(), 'nganh moi')), 5)
+
+
+class OutboxTests(WorkspaceTestCase):
+    def post_recruitment(self):
+        self.client.force_authenticate(self.employer)
+        return self.client.post('/recruitments/', {
+            'title': 'Tin mới', 'description': 'Mô tả', 'salary': '1000', 'date_start': '2025-06-01',
+            'location': 'Hà Nội', 'category': self.category.id, 'work_type': self.work_type.id,
+            'company': self.company.id,
+        }, format='json')
+
+    def test_followers_notified_with_the_posting(self):
+        self.assertEqual(self.post_recruitment().status_code, 201)
+        self.assertEqual(list(models.OutboxEmail.objects.values_list('recipient', flat=True)),
+                         ['candidate@test.com'])
+
+    def test_failed_enqueue_rolls_back_the_posting(self):
+        with mock.patch('workspace.outbox.enqueue', side_effect=RuntimeError):
+            with self.assertRaises(RuntimeError):
+                self.post_recruitment()
+        self.assertFalse(models.Recruitment.objects.filter(title='Tin mới').exists())
+
+
+@override_settings(EMAIL_BACKEND='django.core.mail.backends.locmem.EmailBackend',
+                   OUTBOX_BATCH_SIZE=50, OUTBOX_MAX_ATTEMPTS=3, OUTBOX_RETRY_DELAY=60)
+class OutboxDeliveryTests(TestCase):
+    def setUp(self):
+        outbox.enqueue('Tiêu đề', 'Nội dung', ['a@test.com', 'b@test.com', 'c@test.com'])
+        self.now = timezone.now()
+
+    def at(self, seconds=0):
+        return mock.patch('django.utils.timezone.now', return_value=self.now + timedelta(seconds=seconds))
+
+    def failing(self, **errors):
+        smtp = mock.Mock()
+        for method, error in errors.items():
+            getattr(smtp, method).side_effect = error
+        return mock.patch('workspace.outbox.get_connection', return_value=smtp), smtp
+
+    def test_batch_sent_over_one_connection(self):
+        with mock.patch('workspace.outbox.get_connection', wraps=outbox.get_connection) as get_connection, self.at():
+            self.assertEqual(outbox.deliver(), (3, 0))
+        self.assertEqual(get_connection.call_count, 1)
+        self.assertEqual(sorted(m.to[0] for m in mail.outbox), ['a@test.com', 'b@test.com', 'c@test.com'])
+        self.assertEqual(set(models.OutboxEmail.objects.values_list('status', 'attempts')), {(outbox.SENT, 1)})
+        self.assertEqual(outbox.deliver(), (0, 0))
+
+    def test_lease_lets_another_worker_reclaim(self):
+        with self.at():
+            claimed = outbox.claim(10)
+        self.assertEqual(len(claimed), 3)
+        # the worker died before reporting back: nobody else takes the rows until the lease runs out
+        with self.at(60):
+            self.assertEqual(outbox.claim(10), [])
+        with self.at(outbox.CLAIM_LEASE.total_seconds()):
+            self.assertEqual([e.id for e in outbox.claim(10)], [e.id for e in claimed])
+
+    def test_backoff_doubles_until_failed(self):
+        patch, smtp = self.failing(send_messages=OSError('550'))
+        elapsed = 0
+        with patch:
+            for delay in (60, 120):
+                with self.at(elapsed):
+                    self.assertEqual(outbox.deliver(), (0, 3))
+                for email in models.OutboxEmail.objects.all():
+                    self.assertEqual(email.status, outbox.PENDING)
+                    self.assertEqual(email.next_attempt, self.now + timedelta(seconds=elapsed + delay))
+                    self.assertEqual(email.last_error, '550')
+                elapsed += delay
+            with self.at(elapsed):
+                self.assertEqual(outbox.deliver(), (0, 3))
+        self.assertEqual(set(models.OutboxEmail.objects.values_list('status', 'attempts')), {(outbox.FAILED, 3)})
+        with self.at(elapsed + 3600):
+            self.assertEqual(outbox.deliver(), (0, 0))
+
+    def test_connection_failure_reschedules_the_batch(self):
+        patch, smtp = self.failing(open=OSError('refused'))
+        with patch, self.at():
+            self.assertEqual(outbox.deliver(), (0, 3))
+        smtp.send_messages.assert_not_called()
+        rows = models.OutboxEmail.objects.values_list('status', 'attempts', 'next_attempt', 'last_error')
+        self.assertEqual(set(rows), {(outbox.PENDING, 1, self.now + timedelta(seconds=60), 'refused')})
+
+    def test_command_drains_the_queue(self):
+        out = io.StringIO()
+        call_command('send_outbox', batch_size=2, stdout=out)
+        self.assertEqual(out.getvalue().split('\n')[:2], ['Sent 2, failed 0.', 'Sent 1, failed 0.'])
+        self.assertEqual(len(mail.outbox), 3)
+
+
+class ReferenceTests(WorkspaceTestCase):
+    def test_version_bumped_on_commit(self):
+        before = reference.version('category')
+        with self.captureOnCommitCallbacks(execute=True):
+            models.Category.objects.create(name='Kế toán', description='')
+            self.assertEqual(reference.version('category'), before)
+        self.assertNotEqual(reference.version('category'), before)
+
+    def test_no_bump_on_rollback(self):
+        before = reference.version('category')
+        with self.captureOnCommitCallbacks() as callbacks, transaction.atomic():
+            models.Category.objects.create(name='Kế toán', description='')
+            transaction.set_rollback(True)
+        self.assertEqual(callbacks, [])
+        self.assertEqual(reference.version('category'), before)
+
+
+class RollupTests(WorkspaceTestCase):
+    def test_unchanged_role_from_form(self):
+        users = rollups.counter(rollups.USERS)
+        self.client.force_authenticate(self.candidate)
+        response = self.client.patch('/users/current-user/', {'role': '0', 'phone': '0909'}, format='multipart')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(rollups.counter(rollups.USERS), users)
+
+    def test_deactivate_from_form(self):
+        recruitment = self.recruitments[0]
+        self.client.force_authenticate(self.employer)
+        response = self.client.patch(f'/recruitments/{recruitment.id}/change/', {'active': 'False'}, format='multipart')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(models.CategoryDailyStat.objects.filter(date=recruitment.date_start, count__gt=0).exists())
+        self.assertFalse(models.RecruitmentTerm.objects.filter(recruitment=recruitment).exists())
+        self.assertEqual(rollups.stats()[0][0]['cate_count'], 4)
+
+    def test_invalid_active(self):
+        self.client.force_authenticate(self.employer)
+        response = self.client.patch(f'/recruitments/{self.recruitments[0].id}/change/', {'active': 'maybe'})
+        self.assertEqual(response.status_code, 400)
+
+
+class LocationTests(WorkspaceTestCase):
+    def setUp(self):
+        super().setUp()
+        reference.bump('province')
+        self.provinces = dict(models.Province.objects.values_list('name', 'id'))
+
+    def test_resolves_common_spellings(self):
+        for text, name in [('TP.HCM', 'Hồ Chí Minh'), ('Sài Gòn', 'Hồ Chí Minh'), ('HN', 'Hà Nội'),
+                           ('12 Lê Lợi, Q.1, TP. Hồ Chí Minh', 'Hồ Chí Minh'),
+                           # "ha nam" is in there too, but addresses end with the province
+                           ('Thanh Hà, Nam Định', 'Nam Định')]:
+            self.assertEqual(locations.resolve(text), self.provinces[name], text)
+        self.assertIsNone(locations.resolve('Ở đâu đó'))
+        self.assertIsNone(locations.resolve(''))
+
+    def test_filter_province(self):
+        queryset = models.Recruitment.objects.filter(active=True)
+        everyone = {r.id for r in self.recruitments}
+        hcm = self.provinces['Hồ Chí Minh']
+
+        self.assertEqual({r.id for r in locations.filter_province(queryset, str(hcm))}, everyone)
+        self.assertEqual({r.id for r in locations.filter_province(queryset, 'Sài Gòn')}, everyone)
+        self.assertFalse(locations.filter_province(queryset, 'Hà Nội').exists())
+        # unknown spelling: matched against the location terms instead
+        self.assertEqual({r.id for r in locations.filter_province(queryset, 'Chí Minh')}, everyone)
+        self.assertFalse(locations.filter_province(queryset, 'Đà Lạt').exists())
+
+    def test_backfill(self):
+        models.Recruitment.objects.update(province=None)
+        out = io.StringIO()
+        call_command('backfill_provinces', chunk_size=2, stdout=out)
+        self.assertIn('Matched 5 recruitments, 0 left without a province.', out.getvalue())
+        self.assertEqual(set(models.Recruitment.objects.values_list('province_id', flat=True)),
+                         {self.provinces['Hồ Chí Minh']})
+
+    def test_backfill_migration(self):
+        migration = importlib.import_module('workspace.migrations.0013_backfill_provinces')
+        models.Recruitment.objects.update(province=None)
+        models.Recruitment.objects.filter(id=self.recruitments[0].id).update(location='Thanh Hà, Nam Định')
+        migration.backfill(django_apps, None)
+        self.assertEqual(models.Recruitment.objects.get(id=self.recruitments[0].id).province_id,
+                         self.provinces['Nam Định'])
+        self.assertEqual(models.Recruitment.objects.filter(province_id=self.provinces['Hồ Chí Minh']).count(), 4)
+
+
+class FacetTests(WorkspaceTestCase):
+    def setUp(self):
+        super().setUp()
+        # reference versions only move on commit, which never happens inside a TestCase
+        for name in reference.TABLES:
+            reference.bump(name)
+
+        self.sales = models.Category.objects.create(name='Kinh doanh', description='')
+        for salary in [12_000_000, 60_000_000]:
+            models.Recruitment.objects.create(
+                title='Tin', description='', salary=salary, date_start=date(2025, 1, 1), location='Hà Nội',
+                category=self.sales, work_type=self.work_type, company=self.company)
+
+    def test_counts(self):
+        facets = self.client.get('/recruitments/facets/').json()
+
+        self.assertEqual(facets['count'], 7)
+        self.assertEqual(facets['category'], [
+            {'id': self.category.id, 'name': 'Công nghệ thông tin', 'count': 5},
+            {'id': self.sales.id, 'name': 'Kinh doanh', 'count': 2},
+        ])
+        self.assertEqual(facets['work_type'], [{'id': self.work_type.id, 'name': 'Toàn thời gian', 'count': 7}])
+        self.assertEqual(sum(p['count'] for p in facets['province']), 7)
+        self.assertEqual(facets['salary'], [
+            {'min': None, 'max': 5_000_000, 'count': 5},
+            {'min': 10_000_000, 'max': 15_000_000, 'count': 1},
+            {'min': 50_000_000, 'max': None, 'count': 1},
+        ])
+
+    def test_counts_follow_filters(self):
+        facets = self.client.get('/recruitments/facets/', {'salary_min': '10000000', 'salary_max': '50000000'}).json()
+        self.assertEqual(facets['count'], 1)
+        self.assertEqual(facets['category'], [{'id': self.sales.id, 'name': 'Kinh doanh', 'count': 1}])
+
+        listing = self.client.get('/recruitments/', {'salary_min': '10000000'}).json()
+        self.assertEqual(listing['count'], 2)
+
+    def test_invalid_salary(self):
+        for params in [{'salary_min': 'abc'}, {'salary_max': '-1'}, {'salary_min': 'NaN'}]:
+            with self.subTest(params=params):
+                for url in ['/recruitments/', '/recruitments/facets/']:
+                    response = self.client.get(url, params)
+                    self.assertEqual(response.status_code, 400)
+                    self.assertEqual(response.json(), {name: 'Mức lương không hợp lệ.' for name in params})
+
+
+@override_settings(RECOMMEND_REFRESH_INTERVAL=0)
+class RecommendTests(WorkspaceTestCase):
+    def setUp(self):
+        super().setUp()
+        recommend.reset()
+        other = models.Company.objects.create(name='Khác', code='K', user=models.User.objects.create_user('other'))
+        sales = models.Category.objects.create(name='Kinh doanh', description='')
+
+        def create(category, company, salary, active=True):
+            return models.Recruitment.objects.create(
+                title='Tin', description='', salary=salary, date_start=date(2025, 1, 1), location='Hồ Chí Minh',
+                category=category, work_type=self.work_type, company=company, active=active)
+
+        self.same = create(self.category, self.company, 1000)
+        self.company_only = create(sales, self.company, 1000)
+        self.unrelated = create(sales, other, 60_000_000)
+        self.newest_unrelated = create(sales, other, 60_000_000)
+        self.inactive = create(self.category, self.company, 1000, active=False)
+
+    def test_ranked_by_history(self):
+        # the candidate applied to every posting in WorkspaceTestCase and follows their company
+        expected = [self.same.id, self.company_only.id, self.newest_unrelated.id, self.unrelated.id]
+        self.assertEqual(recommend.recommend(self.candidate), expected)
+
+        self.client.force_authenticate(self.candidate)
+        response = self.client.get('/recruitments/recommended/')
+        self.assertEqual([r['id'] for r in response.json()['results']], expected)
+
+        self.client.force_authenticate(None)
+        self.assertEqual(self.client.get('/recruitments/recommended/').status_code, 401)
+
+    def test_refresh_picks_up_changed_rows(self):
+        recommend.recommend(self.candidate)
+        built = recommend.matrix().built
+
+        models.Recruitment.objects.filter(id=self.unrelated.id).update(
+            category=self.category, company=self.company, salary=1000, updated_date=timezone.now())
+        models.Recruitment.objects.filter(id=self.same.id).update(active=False, updated_date=timezone.now())
+        models.Recruitment.objects.filter(id=self.inactive.id).update(active=True, updated_date=timezone.now())
+
+        ranked = recommend.recommend(self.candidate)
+        self.assertEqual(recommend.matrix().built, built)
+        self.assertEqual(ranked, [self.inactive.id, self.unrelated.id, self.company_only.id,
+                                  self.newest_unrelated.id])
+
+    def test_refresh_drops_deleted_rows(self):
+        self.client.force_authenticate(self.candidate)
+        self.assertEqual(self.client.get('/recruitments/recommended/').json()['count'], 4)
+
+        # switched off without a save, then archived: no row left to pull by updated_date
+        models.Recruitment.objects.filter(id=self.same.id).update(
+            active=False, deactivated_date=timezone.now() - timedelta(days=200))
+        self.assertEqual(archive.archive_recruitments(), 1)
+        self.unrelated.delete()
+
+        response = self.client.get('/recruitments/recommended/').json()
+        self.assertEqual(response['count'], 2)
+        self.assertEqual([r['id'] for r in response['results']], [self.company_only.id, self.newest_unrelated.id])
+
+
+class CursorPaginationTests(WorkspaceTestCase):
+    def test_cursor_round_trip(self):
+        extra = models.Recruitment.objects.bulk_create([
+            models.Recruitment(title=f'Tin {i}', description='', salary=1, date_start=date(2025, 1, 1), location='',
+                               category=self.category, work_type=self.work_type, company=self.company)
+            for i in range(3)
+        ])
+
+        first = self.client.get('/recruitments/', {'pagination': 'cursor', 'page': 2}).json()
+        self.assertNotIn('count', first)
+        self.assertEqual([r['id'] for r in first['results']], [r.id for r in self.recruitments])
+        self.assertIn('cursor=', first['next'])
+        self.assertNotIn('page=', first['next'])
+
+        second = self.client.get(first['next']).json()
+        self.assertEqual([r['id'] for r in second['results']], [r.id for r in extra])
+        self.assertIsNone(second['next'])
+
+    def test_tampered_cursor(self):
+        payloads = [b'{"id": 1}', b'[1, 2]', b'["abc"]', b'[null]', b'[{"a": 1}]', b'[[1]]']
+        for cursor in ['%%%'] + [base64.urlsafe_b64encode(payload).decode() for payload in payloads]:
+            response = self.client.get('/recruitments/', {'cursor': cursor})
+            self.assertEqual(response.status_code, 404, cursor)
+            self.assertEqual(response.json(), {'detail': 'Invalid cursor'})
+
+
+class AsyncViewTests(WorkspaceTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        application = Application.objects.create(name='app', client_type='confidential',
+                                                 authorization_grant_type='password', user=cls.candidate)
+        AccessToken.objects.create(user=cls.candidate, token='candidate-token', application=application,
+                                   expires=timezone.now() + timedelta(days=1), scope='read write')
+        models.Recruitment.objects.bulk_create([
+            models.Recruitment(title=f'Tin {i}', description='', salary=1, date_start=date(2025, 1, 1), location='',
+                               category=cls.category, work_type=cls.work_type, company=cls.company)
+            for i in range(3)
+        ])
+
+    async def assertSameResponse(self, url, token=None):
+        headers = {'Authorization': f'Bearer {token}'} if token else {}
+        sync = await sync_to_async(self.client.get)(url, headers=headers)
+        response = await AsyncClient().get('/async' + url, headers=headers)
+
+        self.assertEqual(response.status_code, sync.status_code, url)
+        # the page links point back at the async endpoint
+        body = response.content.replace(b'/async/', b'/')
+        self.assertEqual(json.loads(body or 'null'), json.loads(sync.content or 'null'), url)
+        for header in ['ETag', 'Last-Modified', 'WWW-Authenticate']:
+            self.assertEqual(response.get(header), sync.get(header), f'{url} {header}')
+        return response
+
+    async def test_recruitment_list(self):
+        first = await self.assertSameResponse('/recruitments/')
+        self.assertEqual(json.loads(first.content)['count'], 8)
+        await self.assertSameResponse('/recruitments/?page=2')
+        await self.assertSameResponse('/recruitments/?page=9')
+        await self.assertSameResponse(f'/recruitments/?category_id={self.category.id}&key=lap trinh')
+
+        cursor = json.loads((await self.assertSameResponse('/recruitments/?pagination=cursor')).content)
+        self.assertIn('/async/recruitments/?', cursor['next'])
+        await self.assertSameResponse(cursor['next'].split('/async', 1)[1])
+
+    async def test_recruitment_detail(self):
+        await self.assertSameResponse(f'/recruitments/{self.recruitments[0].id}/')
+        await self.assertSameResponse('/recruitments/99999/')
+        await self.assertSameResponse(f'/recruitments/{self.recruitments[0].id}/applied/', 'candidate-token')
+        await self.assertSameResponse(f'/recruitments/{self.recruitments[0].id}/applied/')
+
+    async def test_comments_require_auth(self):
+        await self.assertSameResponse(f'/company-comments/?company_id={self.company.id}', 'candidate-token')
+        await self.assertSameResponse(f'/user-comments/?user_id={self.candidate.id}', 'candidate-token')
+        response = await self.assertSameResponse('/user-comments/', 'wrong-token')
+        self.assertEqual(response.status_code, 401)
+        await self.assertSameResponse('/user-comments/')
+
+    async def test_reference_lists(self):
+        await self.assertSameResponse('/categories/')
+        await self.assertSameResponse('/work-types/')
+
+
+class ConditionalGetTests(WorkspaceTestCase):
+    def test_list_etag(self):
+        first = self.client.get('/recruitments/')
+        self.assertNotIn('Last-Modified', first)
+        etag = first['ETag']
+
+        self.assertEqual(self.client.get('/recruitments/', HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        self.assertEqual(self.client.get('/recruitments/', HTTP_IF_MODIFIED_SINCE=http_date(time.time())).status_code,
+                         200)
+
+        # a row leaving the list does not raise the newest updated_date of the rows left
+        models.Recruitment.objects.filter(id=self.recruitments[4].id).update(
+            active=False, updated_date=timezone.now() - timedelta(days=1))
+        response = self.client.get('/recruitments/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_list_etag_follows_swapped_rows(self):
+        etag = self.client.get(f'/recruitments/?category_id={self.category.id}')['ETag']
+        recruitment = self.recruitments[0]
+        models.Recruitment.objects.filter(id=recruitment.id).update(
+            category=models.Category.objects.create(name='Khác', description=''), updated_date=recruitment.updated_date)
+        models.Recruitment.objects.create(
+            title='Tin', description='', salary=1, date_start=date(2025, 1, 1), location='', category=self.category,
+            work_type=self.work_type, company=self.company)
+        models.Recruitment.objects.filter(title='Tin').update(updated_date=recruitment.updated_date)
+
+        response = self.client.get(f'/recruitments/?category_id={self.category.id}', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+    def test_detail_validators(self):
+        url = f'/recruitments/{self.recruitments[0].id}/'
+        first = self.client.get(url)
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=first['ETag']).status_code, 304)
+        self.assertEqual(self.client.get(url, HTTP_IF_MODIFIED_SINCE=first['Last-Modified']).status_code, 304)
+
+        models.Recruitment.objects.filter(id=self.recruitments[0].id).update(
+            title='Đổi', updated_date=timezone.now() + timedelta(seconds=2))
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['title'], 'Đổi')
+        self.assertEqual(self.client.get(url, HTTP_IF_MODIFIED_SINCE=first['Last-Modified']).status_code, 200)
+
+
+class ApplyStatusTests(WorkspaceTestCase):
+    def test_bulk_status_change(self):
+        other = models.User.objects.create_user('other', role=1)
+        other_recruitment = models.Recruitment.objects.create(
+            title='Tin', description='', salary=1, date_start=date(2025, 1, 1), location='', category=self.category,
+            work_type=self.work_type, company=models.Company.objects.create(name='Khác', code='K', user=other)
+        )
+        foreign = models.Apply.objects.create(resume=self.resume, recruitment=other_recruitment)
+        closed = models.Apply.objects.create(resume=self.resume, recruitment=self.recruitments[0], status=5)
+
+        self.client.force_authenticate(self.employer)
+        response = self.client.patch('/applies/change/', {'items': [
+            {'id': self.applies[0].id, 'status': '4'},
+            {'id': self.applies[1].id, 'status': 9},
+            {'id': foreign.id, 'status': 2},
+            {'id': closed.id, 'status': 2},
+            {'id': 'x'},
+        ]}, format='json')
+
+        self.assertEqual(response.status_code, 200)
+        body = response.json()
+        self.assertEqual([(a['id'], a['status']) for a in body['updated']], [(self.applies[0].id, 4)])
+        self.assertEqual(sorted(e['detail'] for e in body['errors']),
+                         ['Application is closed', 'Invalid item', 'Invalid status', 'Not found'])
+
+        self.assertEqual(models.Apply.objects.get(id=foreign.id).status, 0)
+        recruitment = models.Recruitment.objects.get(id=self.recruitments[0].id)
+        self.assertEqual((recruitment.default_count, recruitment.hired_count, recruitment.cancelled_count), (0, 1, 1))
+        self.company.refresh_from_db()
+        self.assertEqual(self.company.hire_count, 2)
+        self.assertEqual(counters.reconcile(), 0)
+
+    def test_status_from_form(self):
+        self.client.force_authenticate(self.employer)
+        url = f'/applies/{self.applies[0].id}/change/'
+        response = self.client.patch(url, {'status': '2'}, format='multipart')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['status'], 2)
+        recruitment = models.Recruitment.objects.get(id=self.recruitments[0].id)
+        self.assertEqual((recruitment.applicant_count, recruitment.default_count, recruitment.interview_count),
+                         (1, 0, 1))
+
+        self.assertEqual(self.client.patch(url, {'status': '9'}, format='multipart').status_code, 400)
+        self.assertEqual(models.Apply.objects.get(id=self.applies[0].id).status, 2)
+        self.assertEqual(counters.reconcile(), 0)
+
+    def test_reconcile_repairs_drift(self):
+        models.Recruitment.objects.filter(id=self.recruitments[0].id).update(applicant_count=7, rejected_count=3)
+        models.Company.objects.filter(id=self.company.id).update(hire_count=0, follower_count=5)
+
+        self.assertEqual(counters.reconcile(chunk_size=2), 2)
+        recruitment = models.Recruitment.objects.get(id=self.recruitments[0].id)
+        self.assertEqual((recruitment.applicant_count, recruitment.default_count, recruitment.rejected_count),
+                         (1, 1, 0))
+        self.company.refresh_from_db()
+        self.assertEqual((self.company.hire_count, self.company.follower_count), (1, 1))
+        self.assertEqual(counters.reconcile(), 0)
+
+    def test_batch_size_limit(self):
+        self.client.force_authenticate(self.employer)
+        response = self.client.patch('/applies/change/', [{'id': 1, 'status': 1}] * 501, format='json')
+        self.assertEqual(response.status_code, 400)
+
+    def test_batch_reads_statuses_under_lock(self):
+        locks = []
+        select_for_update = QuerySet.select_for_update
+
+        def spy(queryset, **kwargs):
+            locks.append((queryset.model, kwargs, len(connection.atomic_blocks)))
+            return select_for_update(queryset, **kwargs)
+
+        depth = len(connection.atomic_blocks)
+        self.client.force_authenticate(self.employer)
+        with mock.patch.object(QuerySet, 'select_for_update', spy):
+            self.client.patch('/applies/change/', [{'id': self.applies[0].id, 'status': 2}], format='json')
+        self.assertEqual(locks, [(models.Apply, {'of': ('self',)}, depth + 1)])
+
+
+class ExportTests(WorkspaceTestCase):
+    def export(self, url, user=None):
+        self.client.force_authenticate(user or self.employer)
+        return self.client.get(url)
+
+    def test_csv(self):
+        response = self.export(f'/applies/candidate/{self.recruitments[0].id}/export/')
+
+        self.assertEqual(response['Content-Type'], 'text/csv; charset=utf-8')
+        self.assertEqual(response['Content-Disposition'], f'attachment; filename="applicants-{self.recruitments[0].id}.csv"')
+        content = b''.join(response.streaming_content).decode()
+        self.assertTrue(content.startswith('\ufeff'))
+        row, = csv.DictReader(io.StringIO(content[1:]))
+        self.assertEqual(row['id'], str(self.applies[0].id))
+        self.assertEqual(row['user_email'], 'candidate@test.com')
+        self.assertEqual(row['resume_detail_name'], 'CV')
+
+    def test_ndjson_in_chunks(self):
+        extra = [models.Apply.objects.create(resume=self.resume, recruitment=self.recruitments[1], status=4)
+                 for _ in range(2)]
+        response = self.export(f'/applies/employee/{self.company.id}/export/?file_type=ndjson')
+
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+        rows = [json.loads(line) for line in b''.join(response.streaming_content).decode().splitlines()]
+        self.assertEqual([r['id'] for r in rows], [self.applies[4].id] + [a.id for a in extra])
+        self.assertEqual(rows[0]['work'], self.recruitments[4].title)
+
+        hires = views.ApplyViewSet().hires(self.company.id)
+        self.assertEqual(list(exports.rows(hires, serializers.EmployeeApplySerializer, chunk_size=1)), rows)
+
+    def test_rejects_unknown_type_and_other_companies(self):
+        response = self.export(f'/applies/employee/{self.company.id}/export/?file_type=xlsx')
+        self.assertEqual(response.status_code, 400)
+        response = self.export(f'/applies/employee/{self.company.id}/export/', self.candidate)
+        self.assertEqual(response.status_code, 404)
+
+    async def test_streams_async_under_asgi(self):
+        application = await Application.objects.acreate(name='app', client_type='confidential',
+                                                        authorization_grant_type='password', user=self.employer)
+        await AccessToken.objects.acreate(user=self.employer, token='employer-token', application=application,
+                                          expires=timezone.now() + timedelta(days=1), scope='read write')
+        url = f'/applies/candidate/{self.recruitments[0].id}/export/?file_type=ndjson'
+
+        response = await AsyncClient().get(url, headers={'Authorization': 'Bearer employer-token'})
+        self.assertTrue(response.is_async)
+        content = b''.join([chunk async for chunk in response.streaming_content])
+        self.assertIn(b'candidate@test.com', content)
+        sync = await sync_to_async(lambda: b''.join(self.export(url).streaming_content))()
+        self.assertEqual(content, sync)
+
+
+class ApplyListingQueryTests(WorkspaceTestCase):
+    def add_candidates(self, count, status=0):
+        for i in range(count):
+            user = models.User.objects.create_user(f'extra{models.User.objects.count()}', avatar='image/upload/v1/a.jpg')
+            resume = models.Resume.objects.create(name='CV', user=user, cv='image/upload/v1/cv.pdf')
+            models.Apply.objects.create(resume=resume, recruitment=self.recruitments[0], status=status)
+
+    def count_queries(self, url, user):
+        self.client.force_authenticate(user)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200, url)
+        return len(queries)
+
+    def assertConstantQueries(self, url, user, grow):
+        small = self.count_queries(url, user)
+        grow()
+        self.assertEqual(self.count_queries(url, user), small, url)
+        # COUNT(*) for the page links plus one joined SELECT
+        self.assertEqual(small, 2, url)
+
+    def test_candidates(self):
+        url = f'/applies/candidate/{self.recruitments[0].id}/'
+        self.assertConstantQueries(url, self.employer, lambda: self.add_candidates(20))
+
+    def test_employees(self):
+        url = f'/applies/employee/{self.company.id}/'
+        self.assertConstantQueries(url, self.employer, lambda: self.add_candidates(20, status=4))
+
+    def test_mine(self):
+        def apply_everywhere():
+            for r in models.Recruitment.objects.bulk_create([
+                models.Recruitment(title='Tin', description='', salary=1, date_start=date(2025, 1, 1),
+                                   location='', category=self.category, work_type=self.work_type, company=self.company)
+                for _ in range(20)
+            ]):
+                models.Apply.objects.create(resume=self.resume, recruitment=r)
+
+        self.assertConstantQueries('/applies/mine/', self.candidate, apply_everywhere)
+
+    def test_candidate_fields(self):
+        self.client.force_authenticate(self.employer)
+        row = self.client.get(f'/applies/candidate/{self.recruitments[0].id}/').json()['results'][0]
+
+        self.assertEqual(row['user_id'], self.candidate.id)
+        self.assertEqual(row['user_email'], 'candidate@test.com')
+        self.assertEqual(row['user_avatar'], '')
+        self.assertEqual(row['resume_detail'], {'id': self.resume.id, 'name': 'CV', 'cv': ''})
+
+
+class ArchiveTests(WorkspaceTestCase):
+    def deactivate(self, recruitments, days_ago):
+        for r in recruitments:
+            r.active = False
+            r.save()
+        models.Recruitment.objects.filter(id__in=[r.id for r in recruitments]) \
+            .update(deactivated_date=timezone.now() - timedelta(days=days_ago))
+
+    def test_archives_old_inactive_recruitments(self):
+        self.deactivate(self.recruitments[:3], days_ago=200)
+        self.deactivate(self.recruitments[3:4], days_ago=1)
+
+        self.assertEqual(archive.archive_recruitments(chunk_size=2), 3)
+        self.assertEqual(set(models.ArchivedRecruitment.objects.values_list('id', flat=True)),
+                         {r.id for r in self.recruitments[:3]})
+        self.assertEqual(models.ArchivedApply.objects.count(), 3)
+        self.assertFalse(models.Apply.objects.filter(recruitment__in=self.recruitments[:3]).exists())
+        self.assertTrue(models.Recruitment.objects.filter(id=self.recruitments[3].id).exists())
+        self.assertEqual(archive.archive_recruitments(), 0)
+
+    def test_late_applications_do_not_reset_the_grace_period(self):
+        # the counters bump updated_date, not the deactivation time
+        self.deactivate(self.recruitments[:1], days_ago=200)
+        models.Apply.objects.create(resume=self.resume, recruitment=self.recruitments[0], status=4)
+        self.assertEqual(archive.archive_recruitments(), 1)
+
+    def test_reactivation_clears_the_deactivation_time(self):
+        self.deactivate(self.recruitments[:1], days_ago=200)
+        self.recruitments[0].refresh_from_db()
+        self.recruitments[0].active = True
+        self.recruitments[0].save()
+        self.assertIsNone(models.Recruitment.objects.get(id=self.recruitments[0].id).deactivated_date)
+        self.assertEqual(archive.archive_recruitments(), 0)
+
+    def test_archived_hires_still_listed(self):
+        hired = models.Apply.objects.create(resume=self.resume, recruitment=self.recruitments[1], status=4)
+        self.deactivate(self.recruitments[:2], days_ago=200)
+        archive.archive_recruitments()
+
+        self.client.force_authenticate(self.employer)
+        hires = self.client.get(f'/applies/employee/{self.company.id}/').json()['results']
+        cursor = self.client.get(f'/applies/employee/{self.company.id}/?pagination=cursor').json()['results']
+        self.assertEqual([r['id'] for r in hires], [self.applies[4].id, hired.id])
+        self.assertEqual([r['id'] for r in cursor], [self.applies[4].id, hired.id])
+
+        self.client.force_authenticate(self.candidate)
+        mine = self.client.get('/applies/mine/').json()['results']
+        self.assertIn(hired.id, [r['id'] for r in mine])
+
+        self.company.refresh_from_db()
+        self.assertEqual(self.company.hire_count, 2)
+        self.assertEqual(counters.reconcile(), 0)
+
+
+class ExpiryTests(WorkspaceTestCase):
+    def test_expires_postings_past_deadline(self):
+        self.assertEqual(self.recruitments[0].deadline, date(2025, 1, 31))
+
+        self.assertEqual(expiry.expire(today=date(2025, 2, 3), chunk_size=2), 3)
+        expired = [r.id for r in self.recruitments[:3]]
+        self.assertFalse(models.Recruitment.objects.filter(id__in=expired, active=True).exists())
+        self.assertFalse(models.Recruitment.objects.filter(id__in=expired, deactivated_date=None).exists())
+        self.assertEqual(models.Recruitment.objects.filter(active=True).count(), 2)
+        self.assertFalse(models.RecruitmentTerm.objects.filter(recruitment_id__in=expired).exists())
+        self.assertEqual(models.CategoryDailyStat.objects.filter(count__gt=0).count(), 2)
+        self.assertEqual(expiry.expire(today=date(2025, 2, 3)), 0)
+
+    def test_default_deadline_follows_start_date(self):
+        recruitment = self.recruitments[0]
+        recruitment.date_start = date(2025, 3, 1)
+        recruitment.save()
+        recruitment.refresh_from_db()
+        self.assertEqual(recruitment.deadline, date(2025, 3, 31))
+
+    def test_chosen_deadline_kept(self):
+        recruitment = self.recruitments[0]
+        recruitment.deadline = date(2025, 2, 15)
+        recruitment.save()
+        recruitment.date_start = date(2025, 2, 1)
+        recruitment.save()
+        recruitment.refresh_from_db()
+        self.assertEqual(recruitment.deadline, date(2025, 2, 15))
+
+        moved = serializers.RecruitmentSerializer(recruitment, data={'date_start': '2025-03-01'}, partial=True)
+        self.assertFalse(moved.is_valid())
+        self.assertIn('deadline', moved.errors)
+
+    def test_start_date_past_default_deadline_accepted(self):
+        moved = serializers.RecruitmentSerializer(self.recruitments[0], data={'date_start': '2025-03-01'}, partial=True)
+        self.assertTrue(moved.is_valid(), moved.errors)
+
+    def test_loop_refreshes_connections(self):
+        with mock.patch('workspace.management.commands.expire_recruitments.close_old_connections') as close, \
+                mock.patch('workspace.management.commands.expire_recruitments.time.sleep',
+                           side_effect=[None, KeyboardInterrupt]):
+            with self.assertRaises(KeyboardInterrupt):
+                call_command('expire_recruitments', loop=True, stdout=io.StringIO())
+        self.assertEqual(close.call_count, 2)
+
+
+def fake_upload(file, **options):
+    return {'public_id': 'bench/upload', 'version': 1, 'format': 'jpg', 'type': 'upload', 'resource_type': 'image'}
+
+
+@override_settings(EMAIL_BACKEND='django.core.mail.backends.locmem.EmailBackend')
+@mock.patch('cloudinary.uploader.upload', fake_upload)
+class BenchmarkTests(TestCase):
+    # BENCHMARK_SIZES=100,1000,10000 BENCHMARK_LATENCY_SCALE=2 BENCHMARK_REPORT=bench.json manage.py test
+    # The default run only holds the query budgets; wall-clock budgets need BENCHMARK=1 (or BENCHMARK_SIZES)
+    # so a loaded CI machine cannot fail the suite.
+    SIZES = [int(n) for n in os.environ.get('BENCHMARK_SIZES', '20,200').split(',')]
+    LATENCY = bool(os.environ.get('BENCHMARK') or os.environ.get('BENCHMARK_SIZES'))
+    LATENCY_SCALE = float(os.environ.get('BENCHMARK_LATENCY_SCALE', '1'))
+    REPEAT = 3
+
+    # name -> (method, url, user, body(context), max queries, max median ms at any size)
+    ENDPOINTS = {
+        'categories': ('get', '/categories/', None, None, 1, 100),
+        'work-types': ('get', '/work-types/', None, None, 1, 100),
+        'recruitments': ('get', '/recruitments/', None, None, 2, 150),
+        'recruitments-category': ('get', '/recruitments/?category_id={category}', None, None, 2, 150),
+        'recruitments-search': ('get', '/recruitments/?key=lap trinh', None, None, 2, 300),
+        'recruitments-province': ('get', '/recruitments/?province=Hà Nội', None, None, 2, 150),
+        # the conditional GET validators double as the page count, but cursor pages never needed a COUNT(*)
+        'recruitments-cursor': ('get', '/recruitments/?pagination=cursor', None, None, 2, 150),
+        'recruitment': ('get', '/recruitments/{recruitment}/', None, None, 1, 100),
+        'recruitment-applied': ('get', '/recruitments/{recruitment}/applied/', 'candidate', None, 1, 100),
+        'recruitment-create': ('post', '/recruitments/', 'employer', lambda c: {
+            'title': 'Tin mới', 'description': 'Mô tả', 'salary': '1000', 'date_start': '2025-06-01',
+            'location': 'Hà Nội', 'category': c['category'], 'work_type': c['work_type'], 'company': c['company'],
+        }, 15, 300),
+        # pre_save snapshot, UPDATE, search terms and daily rollups, then the refresh_from_db
+        'recruitment-change': ('patch', '/recruitments/{recruitment}/change/', 'employer',
+                               lambda c: {'active': True}, 9, 150),
+        'recruitments-facets': ('get', '/recruitments/facets/', None, None, 1, 300),
+        # the feature matrix is built on the warm-up call; then the user's history and one in_bulk page
+        'recruitments-recommended': ('get', '/recruitments/recommended/', 'candidate', None, 3, 300),
+        'resumes': ('get', '/resumes/?user_id={candidate}', None, None, 2, 100),
+        'resume-create': ('post', '/resumes/', 'candidate', lambda c: {'name': f'CV {uuid.uuid4().hex}'}, 2, 150),
+        'resumes-owner': ('get', '/resumes/owner/', 'candidate', None, 2, 100),
+        'applies': ('get', '/applies/', 'candidate', None, 2, 100),
+        'applies-candidate': ('get', '/applies/candidate/{recruitment}/', 'employer', None, 2, 150),
+        'applies-employee': ('get', '/applies/employee/{company}/', 'employer', None, 2, 150),
+        'applies-mine': ('get', '/applies/mine/', 'candidate', None, 2, 150),
+        'apply-create': ('post', '/applies/', 'candidate',
+                         lambda c: {'resume': c['resume'], 'recruitment': c['recruitment']}, 4, 150),
+        'apply-status': ('patch', '/applies/{apply}/change/', 'employer', lambda c: {'status': 2}, 4, 150),
+        # ownership check, then keyset chunks until one comes back short
+        'applies-candidate-csv': ('get', '/applies/candidate/{recruitment}/export/?file_type=csv', 'employer',
+                                  None, 3, 300),
+        'applies-employee-ndjson': ('get', '/applies/employee/{company}/export/?file_type=ndjson', 'employer',
+                                    None, 3, 300),
+        # select, bulk UPDATE, recruitment and company counter UPDATEs, plus the savepoint pair under TestCase
+        'applies-bulk-status': ('patch', '/applies/change/', 'employer',
+                                lambda c: {'items': c['status_items']}, 6, 150),
+        'follows': ('get', '/follows/', 'candidate', None, 1, 100),
+        'companies': ('get', '/company/', None, None, 3, 500),  # unpaginated: validators, companies, images
+        'company-owner': ('get', '/company/owner/', 'employer', None, 2, 100),
+        'user-comments': ('get', '/user-comments/?user_id={candidate}', 'candidate', None, 2, 100),
+        'company-comments': ('get', '/company-comments/?company_id={company}', 'candidate', None, 2, 100),
+        'user-comment-create': ('post', '/user-comments/', 'employer', lambda c: {
+            'content': 'Tốt', 'user': c['candidate'], 'company': c['company'],
+        }, 3, 150),
+        'company-comment-create': ('post', '/company-comments/', 'candidate',
+                                   lambda c: {'content': 'Tốt', 'company': c['company']}, 2, 150),
+        'current-user': ('get', '/users/current-user/', 'candidate', None, 2, 100),
+    }
+
+    results = []
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        path = os.environ.get('BENCHMARK_REPORT')
+        if path:
+            with open(path, 'w') as f:
+                json.dump(cls.results, f, indent=2)
+
+    def context(self, data):
+        recruitment = next(r for r in data['recruitments'] if r.active)
+        company = recruitment.company
+        return {
+            'recruitment': recruitment.id,
+            'company': company.id,
+            'category': data['categories'][0].id,
+            'work_type': data['work_types'][0].id,
+            'candidate': data['candidates'][0].id,
+            'resume': data['resumes'][0].id,
+            'apply': models.Apply.objects.filter(recruitment__company=company)
+                           .exclude(status__in=models.Apply.CLOSED_STATUSES).values_list('id', flat=True).first(),
+            'status_items': [{'id': a.id, 'status': 2}
+                             for a in models.Apply.objects.filter(recruitment__company=company)[:50]],
+            'users': {'employer': company.user, 'candidate': data['candidates'][0]},
+        }
+
+    def request(self, client, method, url, body, context):
+        # bodies are built per request so creates with unique fields can repeat
+        if body is None:
+            response = getattr(client, method)(url)
+        else:
+            response = getattr(client, method)(url, body(context), format='json')
+        if response.streaming:
+            # exports run their queries while the body is consumed
+            b''.join(response.streaming_content)
+        return response
+
+    def measure(self, name, context, size):
+        method, url, user, body, max_queries, max_ms = self.ENDPOINTS[name]
+        url = url.format(**context)
+
+        client = APIClient()
+        client.force_authenticate(context['users'].get(user))
+        self.request(client, method, url, body, context)  # warm caches
+
+        timings = []
+        for _ in range(self.REPEAT):
+            with CaptureQueriesContext(connection) as queries:
+                start = time.perf_counter()
+                response = self.request(client, method, url, body, context)
+                timings.append((time.perf_counter() - start) * 1000)
+            self.assertLess(response.status_code, 300, f'{name}: {response.status_code}')
+
+        result = {'endpoint': name, 'size': size, 'queries': len(queries), 'median_ms': statistics.median(timings)}
+        self.results.append(result)
+        return result, max_queries, max_ms * self.LATENCY_SCALE
+
+    def test_endpoint_budgets(self):
+        for size in self.SIZES:
+            sid = transaction.savepoint()
+            context = self.context(seeding.seed(recruitments=size))
+
+            for name in self.ENDPOINTS:
+                with self.subTest(endpoint=name, size=size):
+                    result, max_queries, max_ms = self.measure(name, context, size)
+                    self.assertLessEqual(result['queries'], max_queries, result)
+                    if self.LATENCY:
+                        self.assertLessEqual(result['median_ms'], max_ms, result)
+
+            transaction.savepoint_rollback(sid)
+
+
+class FakeCloudinary:
+    # stands in for cloudinary.uploader.upload and records how many uploads overlapped
+    def __init__(self, delay=0.05):
+        self.delay = delay
+        self.lock = threading.Lock()
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.uploaded = []
+
+    def __call__(self, file, **options):
+        with self.lock:
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        time.sleep(self.delay)
+        with self.lock:
+            self.in_flight -= 1
+            self.uploaded.append(file.name)
+        return {'public_id': f'test/{file.name}', 'version': 1, 'format': 'jpg', 'type': 'upload',
+                'resource_type': 'image'}
+
+
+class UploadTests(TestCase):
+    def setUp(self):
+        self.cloudinary = FakeCloudinary()
+        patcher = mock.patch('cloudinary.uploader.upload', self.cloudinary)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        self.employer = models.User.objects.create_user('owner', password='x', role=1)
+        self.client = APIClient()
+        self.client.force_authenticate(self.employer)
+
+    def images(self, count):
+        return {f'images{i}': SimpleUploadedFile(f'img{i}.jpg', b'jpeg', content_type='image/jpeg')
+                for i in range(count)}
+
+    @override_settings(UPLOAD_WORKERS=4)
+    def test_company_images_upload_concurrently(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post('/company/', {'name': 'Công ty', 'code': 'C1', **self.images(4)})
+
+        self.assertEqual(response.status_code, 201)
+        self.assertGreater(self.cloudinary.max_in_flight, 1)
+        self.assertEqual(sorted(i['image'].rsplit('/', 1)[-1] for i in response.json()['images']),
+                         [f'img{i}.jpg.jpg' for i in range(4)])
+        inserts = [q for q in queries if q['sql'].startswith('INSERT INTO "workspace_companyimage"')]
+        self.assertEqual(len(inserts), 1)
+
+    @override_settings(UPLOAD_WORKERS=0)
+    def test_deferred_company_images(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post('/company/?defer_uploads=1', {'name': 'Công ty', 'code': 'C1', **self.images(3)})
+            self.assertEqual(response.status_code, 202)
+            self.assertEqual(response.json()['images'], [])
+            self.assertEqual(self.cloudinary.uploaded, [])
+
+        company = models.Company.objects.get(code='C1')
+        self.assertEqual(sorted(i.image.public_id for i in company.images.all()),
+                         ['test/img0.jpg', 'test/img1.jpg', 'test/img2.jpg'])
+
+    @override_settings(UPLOAD_WORKERS=0)
+    def test_deferred_avatar(self):
+        avatar = SimpleUploadedFile('me.jpg', b'jpeg', content_type='image/jpeg')
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.patch('/users/current-user/?defer_uploads=1', {'avatar': avatar, 'phone': '0909'},
+                                         format='multipart')
+            self.assertEqual(response.status_code, 202)
+
+        self.employer.refresh_from_db()
+        self.assertEqual(self.employer.phone, '0909')
+        self.assertEqual(self.employer.avatar.public_id, 'test/me.jpg')
+
+    def test_avatar(self):
+        avatar = SimpleUploadedFile('me.jpg', b'jpeg', content_type='image/jpeg')
+        response = self.client.patch('/users/current-user/', {'avatar': avatar}, format='multipart')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.json()['avatar'].endswith('/test/me.jpg.jpg'))
+
+
+class MediaTests(SimpleTestCase):
+    def test_matches_cloudinary_url(self):
+        resource = CloudinaryResource('a/b', format='jpg', version=1, type='upload', resource_type='image')
+        for options in [{}, {'format': 'png', 'width': 100, 'crop': 'fill'}, {'type': 'private'},
+                        {'transformation': [{'width': 100}, {'angle': 90}]}]:
+            with self.subTest(options=options):
+                self.assertEqual(media.url(resource, **options), resource.build_url(**options))
+
+
+@override_settings(THROTTLE_BACKEND='local', THROTTLES={
+    'send_mail': {'user': '2/hour'},
+    'search': {'anon': '60/min', 'burst': 2},
+    'signup': {'anon': '1/hour'},
+})
+class ThrottleTests(TestCase):
+    def setUp(self):
+        throttles.reset()
+        instrumentation.reset()
+        self.client = APIClient()
+
+    def test_send_mail_rejected_before_smtp(self):
+        self.client.force_authenticate(models.User.objects.create_user('sender', email='a@b.vn', password='x'))
+        payload = {'email': 'c@d.vn', 'subject': 's', 'message': 'm'}
+        with mock.patch('workspace.views.send_mail') as send_mail:
+            codes = [self.client.post('/send-mail/', payload, format='json').status_code for _ in range(3)]
+
+        self.assertEqual(codes, [200, 200, 429])
+        self.assertEqual(send_mail.call_count, 2)
+        self.assertEqual(instrumentation.snapshot()['counters'],
+                         {'throttle.send_mail.allowed': 2, 'throttle.send_mail.throttled': 1})
+
+    def test_search_only_throttles_keyword_queries(self):
+        for _ in range(3):
+            self.assertEqual(self.client.get('/recruitments/').status_code, 200)
+        codes = [self.client.get('/recruitments/', {'key': 'python'}).status_code for _ in range(3)]
+        self.assertEqual(codes, [200, 200, 429])
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get('/recruitments/', {'key': 'python'})
+        self.assertEqual(response.status_code, 429)
+        self.assertIn('Retry-After', response)
+        self.assertEqual(len(queries), 0)
+
+    def test_signup_rejected_before_db(self):
+        first = self.client.post('/users/', {'email': 'a@b.vn'}, REMOTE_ADDR='10.0.0.1')
+        with CaptureQueriesContext(connection) as queries:
+            second = self.client.post('/users/', {'email': 'c@d.vn'}, REMOTE_ADDR='10.0.0.1')
+
+        self.assertEqual((first.status_code, second.status_code), (201, 429))
+        self.assertEqual(len(queries), 0)
+
+
+class ProfileCacheTests(WorkspaceTestCase):
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+
+    def profile(self, user):
+        user = models.User.objects.get(id=user.id)
+        self.client.force_authenticate(user)
+        response = self.client.get('/users/current-user/')
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def test_cache_hit_runs_no_queries(self):
+        for user in (self.candidate, self.employer):
+            first = self.profile(user)
+            fresh = models.User.objects.get(id=user.id)
+            self.assertEqual(first, json.loads(json.dumps(profiles.build(fresh))))
+            self.client.force_authenticate(fresh)
+            with self.assertNumQueries(0):
+                self.assertEqual(self.client.get('/users/current-user/').json(), first)
+
+    def test_resume_write_invalidates(self):
+        self.assertTrue(self.profile(self.candidate)['verified'])
+        with self.captureOnCommitCallbacks(execute=True):
+            models.Resume.objects.filter(user=self.candidate).get().delete()
+        self.assertFalse(self.profile(self.candidate)['verified'])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            models.Resume.objects.create(name='CV mới', user=self.candidate)
+        self.assertTrue(self.profile(self.candidate)['verified'])
+
+    def test_company_write_invalidates(self):
+        self.assertEqual(self.profile(self.employer)['verified'], False)
+        with self.captureOnCommitCallbacks(execute=True):
+            company = models.Company.objects.get(id=self.company.id)
+            company.verified = True
+            company.save()
+        self.assertEqual(self.profile(self.employer)['verified'], True)
+
+    def test_user_write_invalidates(self):
+        self.assertEqual(self.profile(self.candidate)['phone'], None)
+        with self.captureOnCommitCallbacks(execute=True):
+            user = models.User.objects.get(id=self.candidate.id)
+            user.phone = '0900000000'
+            user.save()
+        self.assertEqual(self.profile(self.candidate)['phone'], '0900000000')
+
+    def test_invalidated_only_after_commit(self):
+        self.profile(self.candidate)
+        with self.captureOnCommitCallbacks() as callbacks:
+            models.Resume.objects.filter(user=self.candidate).get().delete()
+            self.assertTrue(self.profile(self.candidate)['verified'])
+        self.assertTrue(callbacks)
+
+
+class InstrumentationTests(WorkspaceTestCase):
+    METRICS = {'wall_ms', 'db_ms', 'queries', 'serializer_ms'}
+
+    def setUp(self):
+        super().setUp()
+        instrumentation.reset()
+
+    def recorded(self, key):
+        return instrumentation.snapshot()['requests'][key]
+
+    def test_request_recorded_per_view(self):
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(f'/recruitments/{self.recruitments[0].id}/')
+
+        detail = self.recorded('GET recruitment-detail')
+        self.assertEqual(set(detail), self.METRICS)
+        self.assertEqual({metric: h['count'] for metric, h in detail.items()}, dict.fromkeys(self.METRICS, 1))
+        self.assertEqual(detail['queries']['sum'], len(queries))
+        self.assertGreater(detail['serializer_ms']['sum'], 0)
+        self.assertGreaterEqual(detail['wall_ms']['sum'], detail['db_ms']['sum'])
+
+        self.client.get('/recruitments/')
+        self.assertEqual(self.recorded('GET recruitment-list')['wall_ms']['count'], 1)
+
+    async def test_async_path(self):
+        await AsyncClient().get(f'/async/recruitments/{self.recruitments[0].id}/')
+        detail = self.recorded('GET async-recruitment-detail')
+        self.assertEqual(detail['wall_ms']['count'], 1)
+        # the query timer is installed on the thread the async ORM runs on
+        self.assertGreater(detail['queries']['sum'], 0)
+
+    @override_settings(SLOW_QUERY_MS=0)
+    def test_slow_query_logged_with_plan(self):
+        with self.assertLogs('workspace.instrumentation', 'WARNING') as logs:
+            self.client.get(f'/recruitments/{self.recruitments[0].id}/')
+        slow = [line for line in logs.output if 'workspace_recruitment' in line]
+        self.assertTrue(slow)
+        self.assertTrue(all('Slow query' in line and ('SEARCH' in line or 'SCAN' in line) for line in slow), slow)
+        # the EXPLAIN itself is neither timed nor counted
+        self.assertEqual(self.recorded('GET recruitment-detail')['queries']['sum'], len(logs.output))
+
+    def test_metrics_for_admins_only(self):
+        self.client.get('/recruitments/')
+        self.client.force_authenticate(self.candidate)
+        self.assertEqual(self.client.get('/metrics/').status_code, 403)
+
+        self.client.force_authenticate(models.User.objects.create_user('admin', password='x', is_staff=True))
+        expected = instrumentation.snapshot()
+        response = self.client.get('/metrics/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), expected)
+        self.assertEqual(expected['requests']['GET metrics']['wall_ms']['count'], 1)
+
+
+class FakeConnection:
+    # stands in for a pymysql connection
+    def __init__(self):
+        self.alive = True
+        self.closed = False
+        self.pings = []
+
+    def ping(self, reconnect=True):
+        self.pings.append(reconnect)
+        if not self.alive:
+            raise DatabaseWrapper.Database.OperationalError(2006, 'gone away')
+
+    def close(self):
+        self.closed = True
+
+
+class ConnectionPoolTests(TestCase):
+    def setUp(self):
+        instrumentation.reset()
+        self.opened = []
+
+    def pool(self, **options):
+        def connect():
+            self.opened.append(FakeConnection())
+            return self.opened[-1]
+        return ConnectionPool('test', connect, **options)
+
+    def test_reuses_released_connections(self):
+        pool = self.pool()
+        first = pool.acquire()
+        pool.release(first)
+        self.assertIs(pool.acquire(), first)
+        self.assertEqual(len(self.opened), 1)
+        self.assertEqual(instrumentation.snapshot()['requests']['db_pool test']['wait_ms']['count'], 2)
+
+    def test_bounded_size_times_out(self):
+        pool = self.pool(max_size=2, timeout=0.05)
+        pool.acquire(), pool.acquire()
+        with self.assertRaises(PoolTimeout):
+            pool.acquire()
+        self.assertEqual(instrumentation.snapshot()['counters']['db_pool.test.timeouts'], 1)
+
+    def test_waiter_gets_released_connection(self):
+        pool = self.pool(max_size=1, timeout=2)
+        held = pool.acquire()
+        threading.Timer(0.05, pool.release, [held]).start()
+        self.assertIs(pool.acquire(), held)
+
+    def test_broken_connection_replaced_on_checkout(self):
+        pool = self.pool(check_after=0)
+        broken = pool.acquire()
+        pool.release(broken)
+        broken.alive = False
+
+        fresh = pool.acquire()
+        self.assertIsNot(fresh, broken)
+        self.assertTrue(broken.closed)
+        self.assertEqual(pool.stats()['size'], 1)
+
+    def test_idle_connections_evicted(self):
+        pool = self.pool(max_idle=0.01)
+        stale = pool.acquire()
+        pool.release(stale)
+        time.sleep(0.02)
+
+        self.assertIsNot(pool.acquire(), stale)
+        self.assertTrue(stale.closed)
+        self.assertEqual(instrumentation.snapshot()['counters']['db_pool.test.evicted'], 1)
+
+    def test_discarded_connection_frees_its_slot(self):
+        pool = self.pool(max_size=1, timeout=0.05)
+        conn = pool.acquire()
+        pool.release(conn, discard=True)
+        self.assertTrue(conn.closed)
+        self.assertIsNot(pool.acquire(), conn)
+
+    def test_health_check_does_not_reconnect(self):
+        pool = self.pool(check_after=0)
+        conn = pool.acquire()
+        pool.release(conn)
+        self.assertIs(pool.acquire(), conn)
+        self.assertEqual(conn.pings, [False])
+
+
+class PooledDatabaseWrapperTests(SimpleTestCase):
+    def setUp(self):
+        self.pool = ConnectionPool('test', FakeConnection)
+        self.wrapper = DatabaseWrapper({}, 'pooled')
+        self.wrapper.pool = self.pool
+        self.wrapper.autocommit = True
+        self.wrapper.connection = self.conn = self.pool.acquire()
+
+    def test_clean_connection_returns_to_pool(self):
+        self.wrapper._close()
+        self.assertFalse(self.conn.closed)
+        self.assertEqual(self.pool.stats(), {'size': 1, 'idle': 1, 'busy': 0, 'max_size': 10})
+
+    def test_errored_connection_discarded(self):
+        self.wrapper.errors_occurred = True
+        self.wrapper._close()
+        self.assertTrue(self.conn.closed)
+        self.assertEqual(self.pool.stats()['size'], 0)
+
+    def test_unusable_connection_discarded(self):
+        self.conn.alive = False
+        self.wrapper._close()
+        self.assertTrue(self.conn.closed)
+        self.assertEqual(self.pool.stats()['size'], 0)
+        self.assertEqual(self.conn.pings, [False])
+
+
+@override_settings(DATABASE_REPLICAS={'replica': 1})
+class ReplicaRoutingTests(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+        self.factory = RequestFactory()
+        self.router = replicas.ReplicaRouter()
+        self.reads = []
+
+    def request(self, method, write=False, model=models.Recruitment, **extra):
+        def view(request):
+            if write:
+                self.router.db_for_write(model)
+            self.reads.append(self.router.db_for_read(model))
+            return HttpResponse()
+
+        replicas.ReplicaMiddleware(view)(getattr(self.factory, method)('/recruitments/', **extra))
+        return self.reads[-1]
+
+    def test_safe_reads_use_replica(self):
+        self.assertEqual(self.request('get'), 'replica')
+        self.assertEqual(self.request('post'), 'default')
+        self.assertEqual(self.router.db_for_read(models.Recruitment), 'default')
+
+    def test_writer_pinned_to_primary(self):
+        self.request('patch', write=True, HTTP_AUTHORIZATION='Bearer a')
+        self.assertEqual(self.request('get', HTTP_AUTHORIZATION='Bearer a'), 'default')
+        self.assertEqual(self.request('get', HTTP_AUTHORIZATION='Bearer b'), 'replica')
+
+    def test_new_token_read_from_primary(self):
+        # login writes the token under one pin key; the next request authenticates with it under another
+        self.request('post', write=True, model=AccessToken)
+        self.assertEqual(self.request('get', model=AccessToken, HTTP_AUTHORIZATION='Bearer new'), 'default')
+        self.assertEqual(self.request('get', HTTP_AUTHORIZATION='Bearer new'), 'replica')
+
+    def test_reads_in_transaction_use_primary(self):
+        with mock.patch.object(connection, 'in_atomic_block', True):
+            self.assertEqual(self.request('get'), 'default')
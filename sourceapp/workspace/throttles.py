@@ -0,0 +1,114 @@
+import math
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from rest_framework.throttling import BaseThrottle
+
+from . import instrumentation
+
+PERIODS = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}
+
+# idle buckets are swept once the local table grows past this many keys
+MAX_LOCAL_BUCKETS = 10000
+
+
+def parse_rate(rate, burst=None):
+    # '30/min' -> (capacity, tokens refilled per second); the capacity defaults to one period's worth
+    count, period = rate.split('/')
+    return (burst or int(count)), int(count) / PERIODS[period[0]]
+
+
+class LocalBuckets:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.buckets = {}  # key -> (tokens, updated, full at)
+
+    def take(self, key, capacity, refill, now):
+        with self.lock:
+            if len(self.buckets) > MAX_LOCAL_BUCKETS:
+                self.buckets = {k: b for k, b in self.buckets.items() if b[2] > now}
+
+            tokens, updated, _ = self.buckets.get(key, (capacity, now, now))
+            tokens, wait = _take(tokens, updated, capacity, refill, now)
+            self.buckets[key] = (tokens, now, now + (capacity - tokens) / refill)
+            return wait
+
+
+class CacheBuckets:
+    # shared by every worker; get/set is not atomic, so concurrent requests may each spend the same token
+    def take(self, key, capacity, refill, now):
+        cache = caches[settings.THROTTLE_CACHE]
+        tokens, updated = cache.get(key) or (capacity, now)
+        tokens, wait = _take(tokens, updated, capacity, refill, now)
+        cache.set(key, (tokens, now), timeout=math.ceil(capacity / refill) + 1)
+        return wait
+
+
+def _take(tokens, updated, capacity, refill, now):
+    # refill for the time elapsed, then spend one token; returns (tokens left, seconds until one is available)
+    tokens = min(capacity, tokens + max(now - updated, 0) * refill)
+    if tokens >= 1:
+        return tokens - 1, 0
+    return tokens, (1 - tokens) / refill
+
+
+_backends = {'local': LocalBuckets(), 'cache': CacheBuckets()}
+
+
+def reset():
+    with _backends['local'].lock:
+        _backends['local'].buckets.clear()
+
+
+class TokenBucketThrottle(BaseThrottle):
+    # limits come from settings.THROTTLES[scope]: 'user' for authenticated clients (keyed by user id),
+    # 'anon' for everyone else (keyed by IP); a missing entry means no limit
+    scope = None
+
+    def get_rate(self, request):
+        spec = settings.THROTTLES.get(self.scope, {})
+        user = request.user
+        if user and user.is_authenticated:
+            return spec.get('user'), spec.get('burst'), f'user:{user.pk}'
+        return spec.get('anon'), spec.get('burst'), f'ip:{self.get_ident(request)}'
+
+    def applies(self, request, view):
+        return True
+
+    def allow_request(self, request, view):
+        self.wait_seconds = None
+        if not self.applies(request, view):
+            return True
+
+        rate, burst, ident = self.get_rate(request)
+        if not rate:
+            return True
+
+        capacity, refill = parse_rate(rate, burst)
+        backend = _backends[settings.THROTTLE_BACKEND]
+        self.wait_seconds = backend.take(f'throttle:{self.scope}:{ident}', capacity, refill, time.time())
+
+        allowed = not self.wait_seconds
+        instrumentation.incr(f'throttle.{self.scope}.{"allowed" if allowed else "throttled"}')
+        return allowed
+
+    def wait(self):
+        return self.wait_seconds
+
+
+class SendMailThrottle(TokenBucketThrottle):
+    scope = 'send_mail'
+
+
+class SearchThrottle(TokenBucketThrottle):
+    # only keyword searches hit the term index; plain listings are left alone
+    scope = 'search'
+
+    def applies(self, request, view):
+        return bool(request.query_params.get('key'))
+
+
+class SignupThrottle(TokenBucketThrottle):
+    scope = 'signup'
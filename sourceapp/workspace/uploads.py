@@ -0,0 +1,139 @@
+import logging
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+
+from cloudinary import uploader
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.db import close_old_connections, transaction
+
+from . import models
+
+logger = logging.getLogger(__name__)
+
+DEFER_QUERY_PARAM = 'defer_uploads'
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _pool():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=settings.UPLOAD_WORKERS, thread_name_prefix='upload')
+        return _executor
+
+
+def _submit(fn, *args):
+    # UPLOAD_WORKERS = 0 runs everything inline, which keeps tests and management commands single-threaded
+    if not settings.UPLOAD_WORKERS:
+        future = Future()
+        try:
+            future.set_result(fn(*args))
+        except Exception as e:
+            future.set_exception(e)
+        return future
+    return _pool().submit(fn, *args)
+
+
+def options(model, field_name):
+    # what CloudinaryField.pre_save would pass to the uploader
+    field = model._meta.get_field(field_name)
+    return {'type': field.type, 'resource_type': field.resource_type,
+            **{key: value for key, value in field.options.items() if not callable(value)}}
+
+
+def _upload(file, upload_options):
+    if hasattr(file, 'seekable') and file.seekable():
+        file.seek(0)
+    return uploader.upload_resource(file, **upload_options)
+
+
+def upload_many(files, upload_options):
+    # all files are in flight at once (bounded by the pool); the first failure is raised after the rest finish
+    futures = [_submit(_upload, file, upload_options) for file in files]
+    errors = [f.exception() for f in futures if f.exception()]
+    if errors:
+        raise errors[0]
+    return [f.result() for f in futures]
+
+
+def is_deferred(request):
+    return request.query_params.get(DEFER_QUERY_PARAM, '').lower() in ('1', 'true', 'yes')
+
+
+def _run_callback(callback, resources):
+    # pool threads hold their own DB connections, recycle them like a request would
+    pooled = bool(settings.UPLOAD_WORKERS)
+    if pooled:
+        close_old_connections()
+    try:
+        callback(resources)
+    except Exception:
+        logger.exception('Deferred upload callback failed')
+    finally:
+        if pooled:
+            close_old_connections()
+
+
+def defer(files, upload_options, callback):
+    # the request's temporary files are gone once the response is sent, so keep the bytes
+    files = [ContentFile(file.read(), name=file.name) for file in files]
+    if not files:
+        return
+
+    def start():
+        futures = [_submit(_upload, file, upload_options) for file in files]
+        remaining = [len(futures)]
+        lock = threading.Lock()
+
+        def done(_):
+            with lock:
+                remaining[0] -= 1
+                if remaining[0]:
+                    return
+
+            resources = []
+            for future in futures:
+                if future.exception():
+                    logger.error('Deferred upload failed: %s', future.exception())
+                else:
+                    resources.append(future.result())
+            if resources:
+                _run_callback(callback, resources)
+
+        for future in futures:
+            future.add_done_callback(done)
+
+    # the rows the callback writes reference objects created by this request
+    transaction.on_commit(start)
+
+
+def _create_company_images(company_id, resources):
+    models.CompanyImage.objects.bulk_create([
+        models.CompanyImage(company_id=company_id, image=resource) for resource in resources
+    ])
+
+
+def save_company_images(company, files):
+    _create_company_images(company.id, upload_many(files, options(models.CompanyImage, 'image')))
+
+
+def defer_company_images(company, files):
+    defer(files, options(models.CompanyImage, 'image'),
+          lambda resources: _create_company_images(company.id, resources))
+
+
+def upload_avatar(user, file):
+    user.avatar = upload_many([file], options(models.User, 'avatar'))[0]
+
+
+def _set_avatar(user_id, resource):
+    user = models.User.objects.get(pk=user_id)
+    user.avatar = resource
+    user.save(update_fields=['avatar'])
+
+
+def defer_avatar(user, file):
+    defer([file], options(models.User, 'avatar'), lambda resources: _set_avatar(user.id, resources[0]))
@@ -1,6 +1,6 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from . import views
+from . import views, async_views
 
 
 router = DefaultRouter()
@@ -17,4 +17,13 @@ router.register('users', views.UserViewSet, basename='user')
 urlpatterns = [
     path('', include(router.urls)),
     path('send-mail/', views.SendMailAPIView.as_view(), name='send-mail'),
+    path('metrics/', views.MetricsAPIView.as_view(), name='metrics'),
+    path('async/categories/', async_views.category_list, name='async-category-list'),
+    path('async/work-types/', async_views.work_type_list, name='async-workType-list'),
+    path('async/recruitments/', async_views.recruitment_list, name='async-recruitment-list'),
+    path('async/recruitments/<str:pk>/', async_views.recruitment_detail, name='async-recruitment-detail'),
+    path('async/recruitments/<str:pk>/applied/', async_views.recruitment_applied,
+         name='async-recruitment-get-applied'),
+    path('async/user-comments/', async_views.user_comment_list, name='async-userComment-list'),
+    path('async/company-comments/', async_views.company_comment_list, name='async-companyComment-list'),
 ]
\ No newline at end of file
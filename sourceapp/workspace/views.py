@@ -1,27 +1,53 @@
-from rest_framework import mixins, viewsets, generics, status, parsers, permissions
+from rest_framework import mixins, viewsets, generics, status, parsers, permissions, fields
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.views import APIView
+from django.core.handlers.asgi import ASGIRequest
 from django.core.mail import send_mail
-from django.db.models import Q
-from datetime import datetime
+from django.db import transaction
+from django.db.models import F, Q
+from django.shortcuts import get_object_or_404
+from django.utils import timezone
 
-from . import serializers, perms, models, paginators
+from . import serializers, perms, models, paginators, outbox, reference, instrumentation, filters, uploads, \
+    exports, conditional, profiles, counters, recommend, throttles, archive
 
 
-class CategoryViewSet(viewsets.ViewSet, generics.ListAPIView):
+class ReferenceViewSet(viewsets.ViewSet, generics.ListAPIView):
+    reference_name = None
+
+    def list(self, request, *args, **kwargs):
+        tag = reference.etag(self.reference_name)
+        if reference.not_modified(request, tag):
+            return Response(status=status.HTTP_304_NOT_MODIFIED, headers={'ETag': tag})
+
+        data = reference.listing(self.reference_name, self.serializer_class)
+        return Response(data, headers={'ETag': tag})
+
+
+class CategoryViewSet(ReferenceViewSet):
     queryset = models.Category.objects.filter(active=True)
     serializer_class = serializers.CategorySerializer
+    reference_name = 'category'
 
 
-class WorkTypeViewSet(viewsets.ViewSet, generics.ListAPIView):
+class WorkTypeViewSet(ReferenceViewSet):
     queryset = models.WorkType.objects.filter(active=True)
     serializer_class = serializers.WorkTypeSerializer
+    reference_name = 'work_type'
 
 
-class CompanyViewSet(viewsets.ViewSet, generics.ListCreateAPIView):
-    queryset = models.Company.objects.filter(active=True)
+class CompanyViewSet(conditional.ConditionalGetMixin, viewsets.ViewSet, generics.ListCreateAPIView):
+    queryset = models.Company.objects.prefetch_related('images').filter(active=True)
     serializer_class = serializers.CompanySerializer
+    conditional_related = ['images']
+
+    def create(self, request, *args, **kwargs):
+        response = super().create(request, *args, **kwargs)
+        if uploads.is_deferred(request):
+            # the images are still uploading and will show up on the company later
+            response.status_code = status.HTTP_202_ACCEPTED
+        return response
 
     @action(methods=['get'], detail=False, url_path='owner', permission_classes=[permissions.IsAuthenticated])
     def get_companies_by_user(self, request):
@@ -29,71 +55,41 @@ class CompanyViewSet(viewsets.ViewSet, generics.ListCreateAPIView):
         return Response(data)
 
 
-class RecruitmentViewSet(viewsets.ViewSet, generics.ListCreateAPIView, mixins.RetrieveModelMixin):
+class RecruitmentViewSet(conditional.ConditionalGetMixin, viewsets.ViewSet, generics.ListCreateAPIView,
+                         mixins.RetrieveModelMixin):
     queryset = models.Recruitment.objects.\
-        select_related('company', 'category', 'work_type').\
+        select_related('company').\
         filter(active=True).\
         order_by('id')
     pagination_class = paginators.RecruitmentPaginator
     serializer_class = serializers.RecruitmentSerializer
+    throttle_classes = [throttles.SearchThrottle]
+    conditional_related = ['company']
+    conditional_references = ['category', 'work_type', 'province']
 
     def get_permissions(self):
         if self.request.method in ['PUT', 'PATCH', 'DELETE']:
             return [perms.RecruitmentOwner()]
+        if self.action in ['get_applied', 'recommended']:
+            return [permissions.IsAuthenticated()]
         return [permissions.AllowAny()]
 
     def get_queryset(self):
-        query = self.queryset
-
-        com_id = self.request.query_params.get('company_id')
-        if com_id:
-            query = query.filter(company_id=com_id)
-
-        cate_id = self.request.query_params.get('category_id')
-        if cate_id:
-            query = query.filter(category__id=cate_id)
-
-        work_id = self.request.query_params.get('work_type_id')
-        if work_id:
-            query = query.filter(work_type__id=work_id)
-
-        k = self.request.query_params.get('key')
-        if k:
-            query = query.filter(title__icontains=k)
-
-        province = self.request.query_params.get('province')
-        if province:
-            query = query.filter(location__icontains=province)
-
-        date = self.request.query_params.get('date_start')
-        if date:
-            try:
-                date_obj = datetime.strptime(date, '%Y-%m-%d').date()
-                query = query.filter(date_start__gte=date_obj)
-            except ValueError:
-                pass
-
-        return query
+        return filters.recruitments(self.queryset, self.request.query_params)
 
     def perform_create(self, serializer):
         user = self.request.user
-        followers = models.Follow.objects.select_related('user').filter(company=user.company)
-        emails = [f.user.email for f in followers if f.user.email]
-
-        if emails:
-            send_mail(
-                subject='Thông báo từ công ty bạn đang theo dõi',
-                message=f'Công ty {user.company.name} vừa đăng tin tuyển dụng, hãy xem ngay!',
-                from_email=user.email,
-                recipient_list=emails,
-                fail_silently=False,
-            )
+        # the posting and its notifications are committed together or not at all
+        with transaction.atomic():
+            serializer.save()
+            outbox.notify_followers(user.company, from_email=user.email)
 
     @action(detail=True, methods=['patch'], url_path='change', permission_classes=[permissions.IsAuthenticated])
     def change_active(self, request, pk=None):
         recruitment = models.Recruitment.objects.get(id=pk)
         if 'active' in request.data:
-            recruitment.active = request.data['active']
+            # form posts send 'false'; the search index and rollups read the attribute before it is reloaded
+            recruitment.active = fields.BooleanField().run_validation(request.data['active'])
 
         recruitment.save()
         recruitment.refresh_from_db()
@@ -107,6 +103,18 @@ class RecruitmentViewSet(viewsets.ViewSet, generics.ListCreateAPIView, mixins.Re
         applied = models.Apply.objects.filter(resume__user=user, recruitment_id=pk).exists()
         return Response({'applied': applied}, status=status.HTTP_200_OK)
 
+    @action(detail=False, methods=['get'], url_path='facets')
+    def facets(self, request):
+        return Response(filters.facets(self.get_queryset()))
+
+    @action(detail=False, methods=['get'], url_path='recommended', permission_classes=[permissions.IsAuthenticated])
+    def recommended(self, request):
+        paginator = paginators.RecommendationPaginator()
+        page = paginator.paginate_queryset(recommend.recommend(request.user), request, view=self)
+        recruitments = self.queryset.in_bulk(page)
+        rows = [recruitments[pk] for pk in page if pk in recruitments]
+        return paginator.get_paginated_response(self.get_serializer(rows, many=True).data)
+
 
 class ResumeViewSet(
     mixins.ListModelMixin, mixins.CreateModelMixin,
@@ -148,84 +156,139 @@ class ResumeViewSet(
 
 
 class ApplyViewSet(viewsets.ViewSet, generics.ListCreateAPIView):
-    queryset = models.Apply.objects.filter(active=True)
+    queryset = models.Apply.objects.filter(active=True).order_by('id')
     serializer_class = serializers.ApplySerializer
     pagination_class = paginators.ApplyPagination
     permission_classes = [permissions.IsAuthenticated]
+    max_batch_size = 500
 
     @action(detail=True, methods=['patch'], url_path="change")
     def patch_status(self, request, pk=None):
         apply = models.Apply.objects.select_related('resume__user').get(id=pk)
         if 'status' in request.data:
-            apply.status = request.data['status']
+            # the counters key on the stored integer, so a form's '2' or an unknown status must not get through
+            apply.status = fields.ChoiceField(models.Apply.STATUS).run_validation(request.data['status'])
 
         apply.save()
         apply.refresh_from_db()
 
         return Response(serializers.ApplySerializer(apply).data)
 
+    @action(detail=False, methods=['patch'], url_path='change')
+    def patch_statuses(self, request):
+        items = request.data if isinstance(request.data, list) else request.data.get('items')
+        if not isinstance(items, list) or len(items) > self.max_batch_size:
+            return Response({'detail': f'Expected a list of at most {self.max_batch_size} items'},
+                            status=status.HTTP_400_BAD_REQUEST)
+
+        errors = []
+        wanted = {}
+        for item in items:
+            try:
+                pk, new_status = int(item['id']), int(item['status'])
+            except (KeyError, TypeError, ValueError):
+                errors.append({'item': item, 'detail': 'Invalid item'})
+                continue
+
+            if new_status not in models.Apply.EMPLOYER_STATUSES:
+                errors.append({'id': pk, 'detail': 'Invalid status'})
+            else:
+                wanted[pk] = new_status
+
+        # the rows are locked before their statuses are read: two batches moving the same applications
+        # would otherwise both move the counters away from the same old status
+        with transaction.atomic():
+            applies = list(models.Apply.objects.select_for_update(of=('self',)).filter(
+                id__in=wanted, active=True, recruitment__company__user=request.user
+            ).annotate(company_id=F('recruitment__company_id')).order_by('id'))
+
+            updated = []
+            moves = []
+            now = timezone.now()
+            for apply in applies:
+                if apply.status in models.Apply.CLOSED_STATUSES:
+                    errors.append({'id': apply.id, 'detail': 'Application is closed'})
+                    continue
+                moves.append(((apply.recruitment_id, apply.status), (apply.recruitment_id, wanted[apply.id])))
+                apply.status = wanted[apply.id]
+                apply.updated_date = now
+                updated.append(apply)
+
+            # bulk_update skips the signals, so move the counters for the whole batch here
+            models.Apply.objects.bulk_update(updated, ['status', 'updated_date'])
+            counters.move_applies(moves, companies={a.recruitment_id: a.company_id for a in applies})
+
+        found = {a.id for a in applies}
+        errors += [{'id': pk, 'detail': 'Not found'} for pk in wanted if pk not in found]
+
+        return Response({
+            'updated': serializers.ApplySerializer(updated, many=True).data,
+            'errors': errors,
+        })
+
+    def candidates(self, recruitment_id):
+        return models.Apply.objects.filter(active=True, recruitment_id=recruitment_id)
+
+    def hires(self, company_id):
+        return archive.union(
+            models.Apply.objects.filter(active=True, recruitment__company_id=company_id, status=4),
+            models.ArchivedApply.objects.filter(active=True, recruitment__company_id=company_id, status=4),
+            serializers.EmployeeApplySerializer.projection,
+        )
+
+    def export(self, request, applies, serializer_class, filename):
+        file_type = request.query_params.get('file_type', exports.CSV)
+        if file_type not in exports.CONTENT_TYPES:
+            return Response({'detail': f'file_type must be one of {", ".join(exports.CONTENT_TYPES)}'},
+                            status=status.HTTP_400_BAD_REQUEST)
+        return exports.stream(applies, serializer_class, file_type, filename,
+                              asynchronous=isinstance(request._request, ASGIRequest))
+
     @action(detail=False, methods=['get'], url_path='candidate/(?P<pk>[^/.]+)')
     def get_by_recruitment(self, request, pk=None):
-        applies = models.Apply.objects.select_related('resume__user') \
-            .filter(active=True, recruitment_id=pk).order_by('-status')
+        applies = self.candidates(pk) \
+            .order_by('-status') \
+            .values(*serializers.CandidateApplySerializer.projection)
 
         page = self.paginate_queryset(applies)
-        if page:
-            response = self.get_serializer(page, many=True).data
-            for i, apply in enumerate(page):
-                user = apply.resume.user
-                response[i]['user_id'] = user.id
-                response[i]['user_name'] = f"{user.first_name} {user.last_name}".strip()
-                response[i]['user_email'] = user.email
-                response[i]['user_avatar'] = user.avatar.url if user.avatar and hasattr(user.avatar, 'url') else ''
-                response[i]['resume_detail'] = serializers.ResumeSerializer(apply.resume).data
-
-            return self.get_paginated_response(response)
-        return self.get_paginated_response(serializers.ApplySerializer(applies, many=True).data)
+        return self.get_paginated_response(serializers.CandidateApplySerializer(page, many=True).data)
+
+    @action(detail=False, methods=['get'], url_path='candidate/(?P<pk>[0-9]+)/export')
+    def export_candidates(self, request, pk=None):
+        get_object_or_404(models.Recruitment, id=pk, company__user=request.user)
+        return self.export(request, self.candidates(pk), serializers.CandidateApplySerializer, f'applicants-{pk}')
 
     @action(detail=False, methods=['get'], url_path='employee/(?P<pk>[^/.]+)')
     def get_by_company(self, request, pk=None):
-        applies = models.Apply.objects.select_related('resume__user', 'recruitment__company') \
-            .filter(active=True, recruitment__company_id=pk, status=4) \
-            .order_by('id')
+        applies = self.hires(pk).order_by('id')
 
         page = self.paginate_queryset(applies)
-        if page:
-            response = self.get_serializer(page, many=True).data
-            for i, apply in enumerate(page):
-                user = apply.resume.user
-                response[i]['user_id'] = user.id
-                response[i]['user_name'] = f"{user.first_name} {user.last_name}".strip()
-                response[i]['user_avatar'] = user.avatar.url if user.avatar and hasattr(user.avatar, 'url') else ''
-                response[i]['work'] = apply.recruitment.title
+        return self.get_paginated_response(serializers.EmployeeApplySerializer(page, many=True).data)
 
-            return self.get_paginated_response(response)
-        return self.get_paginated_response(serializers.ApplySerializer(applies, many=True).data)
+    @action(detail=False, methods=['get'], url_path='employee/(?P<pk>[0-9]+)/export')
+    def export_hires(self, request, pk=None):
+        get_object_or_404(models.Company, id=pk, user=request.user)
+        return self.export(request, self.hires(pk), serializers.EmployeeApplySerializer, f'hires-{pk}')
 
     @action(detail=False, methods=['get'], url_path='mine')
     def get_by_i(self, request):
-        applies = models.Apply.objects.select_related('resume__user', 'recruitment__company') \
-            .filter(active=True, resume__user_id=request.user.id) \
-            .filter(Q(status=4) | Q(recruitment__active=True)) \
-            .order_by('status')
+        # archived recruitments are all inactive, so only the hires there are still listed
+        applies = archive.union(
+            models.Apply.objects.filter(active=True, resume__user_id=request.user.id)
+            .filter(Q(status=4) | Q(recruitment__active=True)),
+            models.ArchivedApply.objects.filter(active=True, resume__user_id=request.user.id, status=4),
+            serializers.MyApplySerializer.projection,
+        ).order_by('status')
 
         page = self.paginate_queryset(applies)
-        if page:
-            response = self.get_serializer(page, many=True).data
-            for i, apply in enumerate(page):
-                recruitment = apply.recruitment
-                response[i]['work'] = recruitment.title
-                response[i]['company_id'] = recruitment.company.id
-                response[i]['company_name'] = recruitment.company.name
-
-            return self.get_paginated_response(response)
-        return self.get_paginated_response(serializers.ApplySerializer(applies, many=True).data)
+        return self.get_paginated_response(serializers.MyApplySerializer(page, many=True).data)
 
 
-class UserCommentViewSet(viewsets.ViewSet, generics.ListCreateAPIView):
-    queryset = models.UserComment.objects.filter(active=True)
+class UserCommentViewSet(conditional.ConditionalGetMixin, viewsets.ViewSet, generics.ListCreateAPIView):
+    queryset = models.UserComment.objects.select_related('company').filter(active=True).order_by('id')
     serializer_class = serializers.UserCommentSerializer
     pagination_class = paginators.CommentPaginator
+    conditional_related = ['company']
 
     def get_permissions(self):
         if self.request.method in ['PUT', 'PATCH']:
@@ -233,17 +296,11 @@ class UserCommentViewSet(viewsets.ViewSet, generics.ListCreateAPIView):
         return [permissions.IsAuthenticated()]
 
     def get_queryset(self):
-        query = self.queryset
-        user_id = self.request.query_params.get('user_id')
-
-        if user_id:
-            query = query.filter(user__id=user_id)
-
-        return query
+        return filters.user_comments(self.queryset, self.request.query_params)
 
 
-class CompanyCommentViewSet(viewsets.ViewSet, generics.ListCreateAPIView):
-    queryset = models.CompanyComment.objects.filter(active=True)
+class CompanyCommentViewSet(conditional.ConditionalGetMixin, viewsets.ViewSet, generics.ListCreateAPIView):
+    queryset = models.CompanyComment.objects.select_related('user').filter(active=True).order_by('id')
     serializer_class = serializers.CompanyCommentSerializer
     pagination_class = paginators.CommentPaginator
 
@@ -253,17 +310,11 @@ class CompanyCommentViewSet(viewsets.ViewSet, generics.ListCreateAPIView):
         return [permissions.IsAuthenticated()]
 
     def get_queryset(self):
-        query = self.queryset
-        company_id = self.request.query_params.get('company_id')
-
-        if company_id:
-            query = query.filter(company__id=company_id)
-
-        return query
+        return filters.company_comments(self.queryset, self.request.query_params)
 
 
 class FollowViewSet(viewsets.ViewSet, mixins.DestroyModelMixin, generics.ListCreateAPIView):
-    queryset = models.Follow.objects.filter(active=True)
+    queryset = models.Follow.objects.select_related('company').filter(active=True)
     serializer_class = serializers.FollowSerializer
 
     def get_permissions(self):
@@ -286,37 +337,37 @@ class UserViewSet(viewsets.ViewSet, generics.CreateAPIView):
             return [perms.Self()]
         return [permissions.AllowAny()]
 
+    def get_throttles(self):
+        if self.action == 'create':
+            return [throttles.SignupThrottle()]
+        return super().get_throttles()
+
     @action(methods=['get', 'patch'], url_path="current-user", detail=False, permission_classes=[permissions.IsAuthenticated])
     def current_user(self, request):
         user = request.user
 
+        avatar = request.FILES.get('avatar') if request.method == 'PATCH' else None
+        deferred = avatar is not None and uploads.is_deferred(request)
+
         if request.method == 'PATCH':
-            if 'avatar' in request.FILES:
-                user.avatar = request.FILES['avatar']
+            if avatar and not deferred:
+                uploads.upload_avatar(user, avatar)
             for key, value in request.data.items():
                 if key in ['email', 'phone', 'role']:
                     setattr(user, key, value)
             user.save()
             user.refresh_from_db()
+            if deferred:
+                # queued after the save so this request cannot overwrite the new avatar
+                uploads.defer_avatar(user, avatar)
 
-        response = serializers.UserSerializer(user).data
-        response['supply'] = bool(user.email and user.avatar and user.phone)
-
-        if user.is_employer():
-            if hasattr(user, 'company'):
-                response['has_company'] = True
-                response['verified'] = user.company.verified
-            else:
-                response['has_company'] = False
-                response['verified'] = False
-        else:
-            response['verified'] = user.resumes.exists()
-
-        return Response(response)
+        data = profiles.get(user, refresh=request.method == 'PATCH')
+        return Response(data, status=status.HTTP_202_ACCEPTED if deferred else status.HTTP_200_OK)
 
 
 class SendMailAPIView(APIView):
     permission_classes = [permissions.IsAuthenticated]
+    throttle_classes = [throttles.SendMailThrottle]
 
     def post(self, request):
         email = request.data.get('email')
@@ -338,3 +389,10 @@ class SendMailAPIView(APIView):
 
         except Exception as e:
             return Response({'detail': f'Failed to send email: {str(e)}'}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+class MetricsAPIView(APIView):
+    permission_classes = [permissions.IsAdminUser]
+
+    def get(self, request):
+        return Response(instrumentation.snapshot())